@@ -0,0 +1,57 @@
+import polars as pl
+import pytest
+
+ROW_COUNTS = [10, 100, 1_000, 10_000]
+
+# One patient's regimen, repeated (with varied frequencies) to reach each size
+REGIMEN = [
+    ("breakfast", "food", [], ["08:00-09:00"]),
+    ("dinner", "food", [], ["18:00-20:00"]),
+    ("antacid", "med", ["≥1h before food"], []),
+    ("antibiotic", "med", ["≥6h apart", "≥2h after food"], []),
+    ("painkiller", "med", ["≥4h apart"], []),
+]
+FREQUENCIES = ["1x daily", "2x daily", "3x daily"]
+
+
+def events_df(n_rows: int) -> pl.DataFrame:
+    """Events for `n_rows // 5` patients, each an independent schedule of 5 rows."""
+    rows = []
+    for i in range(n_rows):
+        patient, j = divmod(i, len(REGIMEN))
+        event, category, constraints, windows = REGIMEN[j]
+        frequency = "1x daily" if category == "food" else FREQUENCIES[(patient + j) % 3]
+        rows.append(
+            {
+                "patient": patient,
+                "Event": event,
+                "Category": category,
+                "Unit": None,
+                "Amount": None,
+                "Divisor": None,
+                "Frequency": frequency,
+                "Constraints": constraints,
+                "Windows": windows,
+                "Note": None,
+            },
+        )
+    return pl.DataFrame(
+        rows,
+        schema={
+            "patient": pl.Int64,
+            "Event": pl.String,
+            "Category": pl.String,
+            "Unit": pl.String,
+            "Amount": pl.Float64,
+            "Divisor": pl.Int64,
+            "Frequency": pl.String,
+            "Constraints": pl.List(pl.String),
+            "Windows": pl.List(pl.String),
+            "Note": pl.String,
+        },
+    )
+
+
+@pytest.fixture(params=ROW_COUNTS, ids=lambda n: f"{n}_rows")
+def df(request) -> pl.DataFrame:
+    return events_df(request.param)
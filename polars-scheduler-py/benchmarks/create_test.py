@@ -0,0 +1,59 @@
+"""
+Time each stage of `Scheduler.create`, to tell the Python wrapper from the solver.
+
+Run with `pytest benchmarks --benchmark-group-by=param:df`. The stages are:
+
+- pack: building the struct column the plugin takes
+- plugin: the plugin call (FFI and solve) and unnesting its output
+- passthrough: the plugin call, also gathering the entity columns onto its output
+- create: all of the above, solving every schedule
+- create_cached: all of the above, with every schedule a cache hit, so the time
+  left is the wrapper's
+"""
+
+import polars as pl
+from polars_scheduler import Scheduler, clear_cache, schedule_events
+
+ENTITY_COLUMNS = list(Scheduler._schema)
+
+
+def pack(df: pl.DataFrame) -> pl.Expr:
+    return pl.struct(df.select(ENTITY_COLUMNS).get_columns()).alias("events")
+
+
+def solve(df: pl.DataFrame, cache: bool, passthrough: bool = False) -> pl.DataFrame:
+    return pl.select(
+        schedule_events(
+            pack(df),
+            partition_by=df.get_column("patient"),
+            cache=cache,
+            passthrough=ENTITY_COLUMNS[1:] if passthrough else None,
+        ),
+    ).unnest("events")
+
+
+def test_pack(benchmark, df):
+    benchmark(lambda: pl.select(pack(df)))
+
+
+def test_plugin(benchmark, df):
+    result = benchmark(solve, df, cache=False)
+    assert result.get_column("status").eq("optimal").all()
+
+
+def test_passthrough(benchmark, df):
+    result = benchmark(solve, df, cache=False, passthrough=True)
+    assert result.width == 7 + len(ENTITY_COLUMNS) - 1
+
+
+def test_create(benchmark, df):
+    scheduler = Scheduler(df)
+    result = benchmark(scheduler.create, partition_by="patient", cache=False)
+    assert result.get_column("status").eq("optimal").all()
+
+
+def test_create_cached(benchmark, df):
+    scheduler = Scheduler(df)
+    clear_cache()
+    scheduler.create(partition_by="patient", cache=True)
+    benchmark(scheduler.create, partition_by="patient", cache=True)
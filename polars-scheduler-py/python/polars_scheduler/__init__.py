@@ -1,14 +1,30 @@
 from __future__ import annotations
 
+import atexit
 import inspect
+import itertools
+import os
+import weakref
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import polars as pl
-from polars.api import register_dataframe_namespace
+from polars.api import register_dataframe_namespace, register_lazyframe_namespace
 from polars.plugins import register_plugin_function
 
+from ._polars_scheduler import cache_info, clear_cache, configure_cache, drop_session
+from ._polars_scheduler import set_profiling as _set_profiling
 from .utils import parse_into_expr, parse_version  # noqa: F401
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from typing import Any, TypeVar
+
+    import pyarrow as pa
+    from polars.type_aliases import IntoExpr
+
+    FrameT = TypeVar("FrameT", pl.DataFrame, pl.LazyFrame)
+
 # Determine the correct plugin path
 if parse_version(pl.__version__) < parse_version("0.20.16"):
     from polars.utils.udfs import _get_shared_lib_location
@@ -17,20 +33,50 @@ if parse_version(pl.__version__) < parse_version("0.20.16"):
 else:
     lib = Path(__file__).parent
 
-__all__ = ["schedule_events"]
+__all__ = [
+    "cache_info",
+    "clear_cache",
+    "configure_cache",
+    "schedule_events",
+    "set_profiling",
+]
+
+
+def set_profiling(path: str | os.PathLike[str] | None) -> None:
+    """
+    Write a Chrome trace (viewable in Perfetto or `chrome://tracing`) of every
+    following solve to the file at `path`, with spans for parsing, building each
+    family of constraints, solving and extracting. Pass None to stop profiling,
+    which completes the file. Profiling costs next to nothing while disabled.
+    Raises OSError if the file cannot be created.
+
+    Profiling can also be enabled on import with the `POLARS_SCHEDULER_PROFILE`
+    environment variable set to the path of the trace file.
+    """
+    _set_profiling(None if path is None else os.fspath(path))
+
 
+# Complete any trace being written when the interpreter exits
+atexit.register(_set_profiling, None)
+if profile_path := os.environ.get("POLARS_SCHEDULER_PROFILE"):
+    set_profiling(profile_path)
 
-def plug(expr: pl.Expr, **kwargs) -> pl.Expr:
+
+def plug(expr: pl.Expr | list[pl.Expr], **kwargs) -> pl.Expr:
     """
     Wrap Polars' `register_plugin_function` helper to always
     pass the same `lib` (the directory where _polars_scheduler.so/pyd lives).
+
+    A schedule is solved over the whole input column (or each partition of it),
+    so the function is not elementwise and its output length differs from the input.
     """
     func_name = inspect.stack()[1].function
     return register_plugin_function(
         plugin_path=lib,
         function_name=func_name,
         args=expr,
-        is_elementwise=True,
+        is_elementwise=False,
+        changes_length=True,
         kwargs=kwargs,
     )
 
@@ -38,12 +84,26 @@ def plug(expr: pl.Expr, **kwargs) -> pl.Expr:
 def schedule_events(
     expr: pl.Expr,
     *,
+    partition_by: IntoExpr | None = None,
     strategy: str = "earliest",
     day_start: str = "08:00",
     day_end: str = "22:00",
     windows: list[str] | None = None,
     penalty_weight: float = 0.3,
     window_tolerance: float = 0.0,
+    n_threads: int = 0,
+    solver_backend: str = "microlp",
+    time_limit_ms: int | None = None,
+    mip_gap: float | None = None,
+    node_limit: int | None = None,
+    horizon_days: int = 1,
+    window_formulation: str = "big_m",
+    session: int | None = None,
+    cache: bool = False,
+    stats: bool = False,
+    row_index: bool = False,
+    passthrough: list[str] | None = None,
+    compact: bool = False,
     debug: bool = False,
 ) -> pl.Expr:
     """
@@ -54,6 +114,10 @@ def schedule_events(
     ----------
     expr : pl.Expr
         Expression representing a struct column containing the event definitions
+    partition_by : IntoExpr, optional
+        Key identifying independent schedules (e.g. a patient or regimen id).
+        Each group of rows with the same key is solved as its own problem, and
+        the key is returned as the first field of the output struct.
     strategy : str, default "earliest"
         Scheduling strategy, either "earliest" or "latest"
     day_start : str, default "08:00"
@@ -66,14 +130,69 @@ def schedule_events(
         Weight for time window penalties in the scheduling objective function
     window_tolerance : float, default 0.0
         Distance tolerance for considering an event to be within a time window
+    n_threads : int, default 0
+        Number of threads used to solve partitions in parallel (0 = one per core)
+    solver_backend : str, default "microlp"
+        MILP solver to use: "microlp", or "highs" / "cbc" if the extension was
+        built with the corresponding cargo feature
+    time_limit_ms : int, optional
+        Stop solving after this many milliseconds and return the best schedule
+        found so far (none, if microlp found none by then)
+    mip_gap : float, optional
+        Stop once the relative gap to optimal is at most this (HiGHS and CBC only)
+    node_limit : int, optional
+        Stop after this many branch-and-bound nodes (HiGHS and CBC only)
+    horizon_days : int, default 1
+        Number of days to schedule. Frequencies such as "every 8h", "every other
+        day" and "3x weekly" are spread over the days, and each event's `day`
+        (counting from 0) is returned with its time of day. "Apart" gaps also
+        hold overnight between consecutive days.
+    window_formulation : str, default "big_m"
+        How the solver models which window each instance uses: "big_m", or
+        "ordered" for a smaller model (without big-M constraints) that applies
+        when an entity's windows are further apart than twice the tolerance.
+        Both give the same schedules.
+    session : int, optional
+        Id of an incremental session kept between calls: groups of linked events
+        that are unchanged since the session's last solve reuse their previous
+        result instead of being re-solved, and a changed group starts from its
+        previous times with HiGHS or CBC. Ignored when partitioning.
+    cache : bool, default False
+        Reuse the result of any identical problem (same events and settings)
+        solved before, from the process-wide cache set up with `configure_cache`.
+        Hits and misses are counted in `cache_info()`.
+    stats : bool, default False
+        Add a `stats` struct field with the statistics of each event's schedule:
+        the size of its model (`variables`, `binaries`, `constraints`), the time
+        spent reading the input column and building, solving and extracting the
+        model (`parse_time_ms` and so on), and its `objective` value. A cached
+        result reports the statistics of the solve that produced it, with
+        `cached` set.
+    row_index : bool, default False
+        Add a `row_index` field with the input row each event was scheduled from
+        (the first row with its name, within its partition)
+    passthrough : list[str], optional
+        Fields of the input struct to gather from each event's input row onto
+        its output row (as with `row_index`), after the other fields
+    compact : bool, default False
+        Return `entity_name` and `status` as categoricals, and the time of day as
+        a native `time` field (`pl.Time`) instead of the `time_hhmm` string, for
+        a smaller output that needs no per-row string formatting
     debug : bool, default False
         Whether to print debug information
 
     Returns
     -------
     pl.Expr
-        Expression representing the scheduled events
+        Expression representing the scheduled events, each with the `status` of
+        its schedule: "optimal", "feasible_within_gap", "node_limited",
+        "timed_out" or "infeasible". A schedule with no events to return
+        (infeasible, or timed out before any was found) gets a single row of
+        nulls with its status.
+        Events come grouped by partition, in order of each key's first row,
+        then in order of day and time.
     """
+    args = expr if partition_by is None else [expr, parse_into_expr(partition_by)]
     kwargs = {
         "strategy": strategy,
         "day_start": day_start,
@@ -82,8 +201,46 @@ def schedule_events(
         **({"windows": windows} if windows is not None else {}),
         "penalty_weight": penalty_weight,
         "window_tolerance": window_tolerance,
+        "n_threads": n_threads,
+        "solver_backend": solver_backend,
+        "time_limit_ms": time_limit_ms,
+        "mip_gap": mip_gap,
+        "node_limit": node_limit,
+        "horizon_days": horizon_days,
+        "window_formulation": window_formulation,
+        "session": session,
+        "cache": cache,
+        "stats": stats,
+        "row_index": row_index,
+        "passthrough": passthrough or [],
+        "compact": compact,
     }
-    return plug(expr, **kwargs)
+    return plug(args, **kwargs)
+
+
+def _schedule_plan(
+    frame: pl.LazyFrame,
+    partition_by: str | None = None,
+    **kwargs,
+) -> pl.LazyFrame:
+    """
+    Plan the scheduling of the events in a frame (conformed to `Scheduler._schema`),
+    with the columns of each scheduled event's row gathered onto it by the plugin.
+    Only the event columns and the partition key are read from the frame.
+
+    Events come grouped by partition, in order of each key's first row, then in
+    order of day and time, as the plugin returns them (so they need no sorting).
+    """
+    event_columns = list(Scheduler._schema)
+    key = None if partition_by is None else pl.col(partition_by)
+    return frame.select(
+        schedule_events(
+            pl.struct(event_columns).alias("events"),
+            partition_by=key,
+            passthrough=[c for c in event_columns if c != "Event"],
+            **kwargs,
+        ),
+    ).unnest("events")
 
 
 @register_dataframe_namespace("scheduler")
@@ -100,17 +257,71 @@ class Scheduler:
         "Note": pl.String,
     }
 
-    def __init__(self, df: pl.DataFrame | None = None):
-        """Store schedule constraints, recreate the DataFrame if its schema is wrong."""
+    _session_ids = itertools.count(1)
+
+    def __init__(self, df: pl.DataFrame | None = None, *, incremental: bool = False):
+        """
+        Store schedule constraints, recreate the DataFrame if its schema is wrong.
+
+        Args:
+            df: DataFrame of events, or None to start from an empty schedule
+            incremental: Keep the solved schedule between calls to `create`, so that
+                after an edit only the groups of linked events containing a changed
+                event are re-solved (the whole schedule, when every event is linked).
+                The events are still read in full on every call
+        """
+        self._session = None
+        if incremental:
+            self._session = next(self._session_ids)
+            weakref.finalize(self, drop_session, self._session)
         if df is None or df.height == 0:
             # Create a new empty DataFrame with the correct schema
             self._df = pl.DataFrame(schema=self._schema)
         else:
-            # Check if existing DataFrame has correct schema
-            usable = df.schema == self._schema
-            self._df = (
-                df if usable else pl.DataFrame(df.to_dicts(), schema=self._schema)
+            self._df = self._conform(df)
+
+    @classmethod
+    def _conform(cls, df: FrameT) -> FrameT:
+        """
+        Cast the event columns of a (lazy) frame to the schema, column by column.
+
+        Missing event columns are added as nulls, and extra columns (such as a
+        partition key) are kept as they are, after the event columns.
+        """
+        schema = df.collect_schema()
+        if all(schema.get(k) == v for k, v in cls._schema.items()):
+            return df
+        return df.with_columns(
+            pl.col(k).cast(v) if k in schema else pl.lit(None, dtype=v).alias(k)
+            for k, v in cls._schema.items()
+        ).select(*cls._schema, pl.exclude(list(cls._schema)))
+
+    @property
+    def _df(self) -> pl.DataFrame:
+        """The events, with any added since the last read appended as one chunk."""
+        self._buffer_rows()
+        if self._pending:
+            self._frame = pl.concat(
+                [self._frame, *self._pending],
+                how="diagonal",
+                rechunk=True,
+            )
+            self._pending = []
+        return self._frame
+
+    @_df.setter
+    def _df(self, df: pl.DataFrame) -> None:
+        self._frame = df
+        self._pending: list[pl.DataFrame] = []
+        self._rows: list[tuple] = []
+
+    def _buffer_rows(self) -> None:
+        """Gather the rows added one at a time into one pending chunk."""
+        if self._rows:
+            self._pending.append(
+                pl.DataFrame(self._rows, schema=self._schema, orient="row"),
             )
+            self._rows = []
 
     def add(
         self,
@@ -127,6 +338,9 @@ class Scheduler:
         """
         Add a new resource event to the schedule.
 
+        Events added are buffered, and appended to the DataFrame in one go when
+        it is next read, so adding many events one at a time stays linear.
+
         Args:
             event: Name of the event
             category: Category type
@@ -147,25 +361,48 @@ class Scheduler:
         if frequency is None:
             frequency = "1x daily"
 
-        # Create a new row
-        new_row = pl.DataFrame(
-            {
-                "Event": [event],
-                "Category": [category],
-                "Unit": [unit],
-                "Amount": [amount],
-                "Divisor": [divisor],
-                "Frequency": [frequency],
-                "Constraints": [constraints],
-                "Windows": [windows],
-                "Note": [note],
-            },
-            schema=self._schema,
+        # Buffer the row (in schema order) until the DataFrame is read
+        self._rows.append(
+            (
+                event,
+                category,
+                unit,
+                amount,
+                divisor,
+                frequency,
+                constraints,
+                windows,
+                note,
+            ),
         )
 
-        # Append to existing DataFrame
-        self._df = pl.concat([self._df, new_row], how="vertical")
-        return
+    def extend(
+        self,
+        events: pl.DataFrame | pa.Table | Iterable[Mapping[str, Any]],
+    ) -> None:
+        """
+        Add many resource events to the schedule at once.
+
+        Args:
+            events: A DataFrame or Arrow table with the event columns ("Event",
+                "Category", and so on, any missing being null), or an iterable of
+                dicts of the arguments to `add` (such as `{"event": "pill",
+                "category": "med", "unit": "tablet"}`)
+        """
+        if isinstance(events, pl.DataFrame):
+            frame = events
+        elif type(events).__module__.partition(".")[0] == "pyarrow":
+            frame = pl.from_arrow(events)
+        else:
+            for kwargs in events:
+                self.add(**kwargs)
+            return
+
+        if frame.height > 0:
+            self._buffer_rows()
+            self._pending.append(self._conform(frame))
+
+    add_many = extend
 
     def create(
         self,
@@ -176,6 +413,17 @@ class Scheduler:
         penalty_weight: float = 0.3,
         window_tolerance: float = 0.0,
         debug: bool = False,
+        partition_by: str | None = None,
+        n_threads: int = 0,
+        solver_backend: str = "microlp",
+        time_limit_ms: int | None = None,
+        mip_gap: float | None = None,
+        node_limit: int | None = None,
+        horizon_days: int = 1,
+        window_formulation: str = "big_m",
+        cache: bool = False,
+        stats: bool = False,
+        compact: bool = False,
     ) -> pl.DataFrame:
         """
         Schedule events based on the constraints in the DataFrame.
@@ -188,46 +436,223 @@ class Scheduler:
             penalty_weight: Weight for time window penalties in the objective function (default: 0.3)
             window_tolerance: Distance tolerance for considering an event within a time window (default: 0.0)
             debug: Whether to print debug information
+            partition_by: Optional name of a column identifying independent schedules,
+                each of which is solved separately
+            n_threads: Number of threads used to solve partitions in parallel (0 = one per core)
+            solver_backend: MILP solver, "microlp" (default), "highs" or "cbc"
+            time_limit_ms: Optional time limit, after which the best schedule found is returned
+            mip_gap: Optional relative MIP gap at which to stop (HiGHS and CBC only)
+            node_limit: Optional branch-and-bound node limit (HiGHS and CBC only)
+            horizon_days: Number of days to schedule, each event getting its `day` (from 0)
+            window_formulation: Window model, "big_m" (default) or "ordered"
+            cache: Whether to reuse the result of an identical problem solved before
+            stats: Whether to add a `stats` struct column with the model size, stage
+                timings and objective of each event's schedule
+            compact: Whether to return `entity_name` and `status` as categoricals and
+                the time of day as a `time` column (`pl.Time`) instead of `time_hhmm`
 
         Returns:
-            A DataFrame with the scheduled events
-        """
-        # Convert DataFrame to struct column
-        struct_col = pl.struct(self._df.get_columns()).alias("events")
-
-        # Call the schedule_events function on the struct column
-        result = pl.select(
-            schedule_events(
-                struct_col,
-                strategy=strategy,
-                day_start=day_start,
-                day_end=day_end,
-                windows=windows,
-                penalty_weight=penalty_weight,
-                window_tolerance=window_tolerance,
-                debug=debug,
-            ),
-        ).unnest("events")
-
-        # Join with original dataframe for context
-        entity_columns = [
-            "Event",
-            "Category",
-            "Unit",
-            "Amount",
-            "Divisor",
-            "Frequency",
-            "Constraints",
-            "Windows",
-            "Note",
-        ]
-
-        joined = result.join(
-            self._df.select(entity_columns),
-            left_on="entity_name",
-            right_on="Event",
-            how="left",
+            A DataFrame with the scheduled events, and the status of the solve, in
+            order of day and time (grouped by partition, in order of first appearance)
+        """
+        return _schedule_plan(
+            self._df.lazy(),
+            partition_by=partition_by,
+            strategy=strategy,
+            day_start=day_start,
+            day_end=day_end,
+            windows=windows,
+            penalty_weight=penalty_weight,
+            window_tolerance=window_tolerance,
+            n_threads=n_threads,
+            solver_backend=solver_backend,
+            time_limit_ms=time_limit_ms,
+            mip_gap=mip_gap,
+            node_limit=node_limit,
+            horizon_days=horizon_days,
+            window_formulation=window_formulation,
+            session=self._session if partition_by is None else None,
+            cache=cache,
+            stats=stats,
+            compact=compact,
+            debug=debug,
+        ).collect()
+
+    @classmethod
+    def create_many(
+        cls,
+        schedules: Iterable[Scheduler | pl.DataFrame],
+        strategy: str = "earliest",
+        day_start: str = "08:00",
+        day_end: str = "22:00",
+        windows: list[str] | None = None,
+        penalty_weight: float = 0.3,
+        window_tolerance: float = 0.0,
+        debug: bool = False,
+        n_threads: int = 0,
+        solver_backend: str = "microlp",
+        time_limit_ms: int | None = None,
+        mip_gap: float | None = None,
+        node_limit: int | None = None,
+        horizon_days: int = 1,
+        window_formulation: str = "big_m",
+        cache: bool = False,
+        compact: bool = False,
+    ) -> list[pl.DataFrame]:
+        """
+        Schedule many independent sets of events in one parallel batch.
+
+        Args:
+            schedules: Schedulers (or DataFrames of events) to solve independently
+            strategy: Either "earliest" or "latest"
+            day_start: Start time in "HH:MM" format
+            day_end: End time in "HH:MM" format
+            windows: Optional list of global time windows in "HH:MM" or "HH:MM-HH:MM" format
+            penalty_weight: Weight for time window penalties in the objective function (default: 0.3)
+            window_tolerance: Distance tolerance for considering an event within a time window (default: 0.0)
+            debug: Whether to print debug information
+            n_threads: Number of threads to solve with (0 = one per core)
+            solver_backend: MILP solver, "microlp" (default), "highs" or "cbc"
+            time_limit_ms: Optional time limit per schedule
+            mip_gap: Optional relative MIP gap at which to stop (HiGHS and CBC only)
+            node_limit: Optional branch-and-bound node limit (HiGHS and CBC only)
+            horizon_days: Number of days to schedule, each event getting its `day` (from 0)
+            window_formulation: Window model, "big_m" (default) or "ordered"
+            cache: Whether to reuse the result of an identical problem solved before
+            compact: Whether to return `entity_name` and `status` as categoricals and
+                the time of day as a `time` column (`pl.Time`) instead of `time_hhmm`
+
+        Returns:
+            One DataFrame of scheduled events per input, in the same order
+        """
+        frames = [s._df if isinstance(s, Scheduler) else cls(s)._df for s in schedules]
+        if not frames:
+            return []
+
+        key = "__schedule_index__"
+        combined = pl.concat(
+            [
+                f.select(list(cls._schema)).with_columns(
+                    pl.lit(i, dtype=pl.UInt32).alias(key),
+                )
+                for i, f in enumerate(frames)
+            ],
+            how="vertical",
         )
+        options = {
+            "strategy": strategy,
+            "day_start": day_start,
+            "day_end": day_end,
+            "windows": windows,
+            "penalty_weight": penalty_weight,
+            "window_tolerance": window_tolerance,
+            "debug": debug,
+            "n_threads": n_threads,
+            "solver_backend": solver_backend,
+            "time_limit_ms": time_limit_ms,
+            "mip_gap": mip_gap,
+            "node_limit": node_limit,
+            "horizon_days": horizon_days,
+            "window_formulation": window_formulation,
+            "cache": cache,
+            "compact": compact,
+        }
+        if combined.height == 0:
+            # An empty Scheduler drops the key column, so there is nothing to partition
+            empty = cls().create(**options)
+            return [empty.clone() for _ in frames]
+        result = cls(combined).create(partition_by=key, **options)
+
+        parts = result.partition_by(key, as_dict=True, include_key=False)
+        empty = result.clear().drop(key)
+        return [parts.get((i,), empty) for i in range(len(frames))]
+
 
-        # Return sorted by time
-        return joined.sort("time_minutes")
+@register_lazyframe_namespace("scheduler")
+class LazyScheduler:
+    def __init__(self, lf: pl.LazyFrame):
+        """
+        Schedule the events of a LazyFrame, such as one from `pl.scan_parquet`.
+
+        Args:
+            lf: LazyFrame of events, with the columns of `Scheduler._schema` (any
+                missing are taken as null, and any of another type are cast)
+        """
+        self._lf = Scheduler._conform(lf)
+
+    def create(
+        self,
+        strategy: str = "earliest",
+        day_start: str = "08:00",
+        day_end: str = "22:00",
+        windows: list[str] | None = None,
+        penalty_weight: float = 0.3,
+        window_tolerance: float = 0.0,
+        debug: bool = False,
+        partition_by: str | None = None,
+        n_threads: int = 0,
+        solver_backend: str = "microlp",
+        time_limit_ms: int | None = None,
+        mip_gap: float | None = None,
+        node_limit: int | None = None,
+        horizon_days: int = 1,
+        window_formulation: str = "big_m",
+        cache: bool = False,
+        stats: bool = False,
+        compact: bool = False,
+    ) -> pl.LazyFrame:
+        """
+        Plan the scheduling of the events, as `Scheduler.create` does eagerly.
+
+        Only the event columns (and the partition key) are read from the input, so
+        other columns are never loaded from a scan. The solver takes the event
+        columns of every row at once, so the plan does not stream rows through it.
+
+        Args:
+            strategy: Either "earliest" or "latest"
+            day_start: Start time in "HH:MM" format
+            day_end: End time in "HH:MM" format
+            windows: Optional list of global time windows in "HH:MM" or "HH:MM-HH:MM" format
+            penalty_weight: Weight for time window penalties in the objective function (default: 0.3)
+            window_tolerance: Distance tolerance for considering an event within a time window (default: 0.0)
+            debug: Whether to print debug information
+            partition_by: Optional name of a column identifying independent schedules,
+                each of which is solved separately
+            n_threads: Number of threads used to solve partitions in parallel (0 = one per core)
+            solver_backend: MILP solver, "microlp" (default), "highs" or "cbc"
+            time_limit_ms: Optional time limit, after which the best schedule found is returned
+            mip_gap: Optional relative MIP gap at which to stop (HiGHS and CBC only)
+            node_limit: Optional branch-and-bound node limit (HiGHS and CBC only)
+            horizon_days: Number of days to schedule, each event getting its `day` (from 0)
+            window_formulation: Window model, "big_m" (default) or "ordered"
+            cache: Whether to reuse the result of an identical problem solved before
+            stats: Whether to add a `stats` struct column with the model size, stage
+                timings and objective of each event's schedule
+            compact: Whether to return `entity_name` and `status` as categoricals and
+                the time of day as a `time` column (`pl.Time`) instead of `time_hhmm`
+
+        Returns:
+            A LazyFrame of the scheduled events, and the status of the solve, in
+            order of day and time (grouped by partition, in order of first appearance)
+        """
+        return _schedule_plan(
+            self._lf,
+            partition_by=partition_by,
+            strategy=strategy,
+            day_start=day_start,
+            day_end=day_end,
+            windows=windows,
+            penalty_weight=penalty_weight,
+            window_tolerance=window_tolerance,
+            n_threads=n_threads,
+            solver_backend=solver_backend,
+            time_limit_ms=time_limit_ms,
+            mip_gap=mip_gap,
+            node_limit=node_limit,
+            horizon_days=horizon_days,
+            window_formulation=window_formulation,
+            cache=cache,
+            stats=stats,
+            compact=compact,
+            debug=debug,
+        )
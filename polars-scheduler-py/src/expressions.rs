@@ -1,10 +1,88 @@
 use polars::prelude::*;
+use polars_arrow::array::{Array, Utf8ViewArray};
 use pyo3_polars::derive::polars_expr;
 use scheduler_core::{
     format_minutes_to_hhmm, format_schedule, parse_one_constraint, parse_one_window,
-    solve_schedule, Entity, ScheduleStrategy, SchedulerConfig,
+    solve_schedule, solve_schedules_batch, solve_schedules_batch_cached, ConstraintExpr, Entity,
+    Frequency, Interner, ResultCache, ScheduleResult, ScheduleStatus, ScheduleStrategy,
+    SchedulerConfig, SchedulerSession, SolveStats, SolverBackend, WindowFormulation, WindowSpec,
 };
 use serde::Deserialize;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex, OnceLock};
+use std::time::Instant;
+
+/// Results held in memory by the default cache
+pub const DEFAULT_CACHE_CAPACITY: usize = 1024;
+
+static CACHE: OnceLock<Mutex<Arc<ResultCache>>> = OnceLock::new();
+
+fn cache_slot() -> &'static Mutex<Arc<ResultCache>> {
+    CACHE.get_or_init(|| Mutex::new(Arc::new(ResultCache::new(DEFAULT_CACHE_CAPACITY))))
+}
+
+/// The result cache shared by every call of the expression
+pub fn result_cache() -> Arc<ResultCache> {
+    match cache_slot().lock() {
+        Ok(cache) => cache.clone(),
+        Err(poisoned) => poisoned.into_inner().clone(),
+    }
+}
+
+/// Replace the result cache (dropping its results) with one of this capacity,
+/// optionally backed by a directory on disk holding up to `disk_capacity` results
+pub fn configure_cache(
+    capacity: usize,
+    dir: Option<String>,
+    disk_capacity: usize,
+) -> Result<(), String> {
+    let mut cache = ResultCache::new(capacity).with_disk_capacity(disk_capacity);
+    if let Some(dir) = dir {
+        cache = cache.with_dir(dir)?;
+    }
+    match cache_slot().lock() {
+        Ok(mut slot) => *slot = Arc::new(cache),
+        Err(poisoned) => *poisoned.into_inner() = Arc::new(cache),
+    }
+    Ok(())
+}
+
+/// Sessions kept between calls, by the id the Python `Scheduler` was given
+type Sessions = Mutex<HashMap<u64, Arc<Mutex<SchedulerSession>>>>;
+
+static SESSIONS: OnceLock<Sessions> = OnceLock::new();
+
+fn sessions() -> &'static Sessions {
+    SESSIONS.get_or_init(Default::default)
+}
+
+/// Solve in the session with this id (created on first use), re-solving only the
+/// parts of the schedule that changed since its last solve
+fn solve_in_session(
+    id: u64,
+    entities: Vec<Entity>,
+    config: SchedulerConfig,
+    debug: bool,
+) -> Result<ScheduleResult, String> {
+    let session = sessions()
+        .lock()
+        .map_err(|e| e.to_string())?
+        .entry(id)
+        .or_insert_with(|| Arc::new(Mutex::new(SchedulerSession::new(config.clone()))))
+        .clone();
+    let mut session = session.lock().map_err(|e| e.to_string())?;
+    session.set_config(config);
+    session.set_entities(entities);
+    session.solve(debug)
+}
+
+/// Forget a session, returning whether it existed
+pub fn drop_session(id: u64) -> bool {
+    sessions()
+        .lock()
+        .map(|mut s| s.remove(&id).is_some())
+        .unwrap_or(false)
+}
 
 #[derive(Deserialize)]
 pub struct ScheduleKwargs {
@@ -26,148 +104,328 @@ pub struct ScheduleKwargs {
     #[serde(default)]
     pub window_tolerance: f64,
 
+    #[serde(default)]
+    pub n_threads: usize,
+
+    #[serde(default)]
+    pub solver_backend: String,
+
+    #[serde(default)]
+    pub time_limit_ms: Option<u64>,
+
+    #[serde(default)]
+    pub mip_gap: Option<f64>,
+
+    #[serde(default)]
+    pub node_limit: Option<u64>,
+
+    #[serde(default)]
+    pub horizon_days: u32,
+
+    #[serde(default)]
+    pub window_formulation: String,
+
+    #[serde(default)]
+    pub session: Option<u64>,
+
+    #[serde(default)]
+    pub cache: bool,
+
+    #[serde(default)]
+    pub stats: bool,
+
+    #[serde(default)]
+    pub row_index: bool,
+
+    #[serde(default)]
+    pub passthrough: Vec<String>,
+
+    #[serde(default)]
+    pub compact: bool,
+
     #[serde(default)]
     pub debug: bool,
 }
 
+/// Fields of the `stats` struct, the solve statistics of each event's schedule
+fn stats_fields() -> Vec<Field> {
+    vec![
+        Field::new("variables".into(), DataType::UInt64),
+        Field::new("binaries".into(), DataType::UInt64),
+        Field::new("constraints".into(), DataType::UInt64),
+        Field::new("parse_time_ms".into(), DataType::Float64),
+        Field::new("build_time_ms".into(), DataType::Float64),
+        Field::new("solve_time_ms".into(), DataType::Float64),
+        Field::new("extract_time_ms".into(), DataType::Float64),
+        Field::new("objective".into(), DataType::Float64),
+        Field::new("nodes".into(), DataType::UInt64),
+        Field::new("cached".into(), DataType::Boolean),
+    ]
+}
+
 /// Computes output type for the expression
-fn schedule_output_type(_input_fields: &[Field]) -> PolarsResult<Field> {
-    // We'll return a struct array with scheduled times for each event/instance
-    Ok(Field::new(
-        "schedule".into(),
-        DataType::Struct(vec![
-            Field::new("entity_name".into(), DataType::String),
-            Field::new("instance".into(), DataType::Int32),
-            Field::new("time_minutes".into(), DataType::Int32),
+fn schedule_output_type(input_fields: &[Field], kwargs: ScheduleKwargs) -> PolarsResult<Field> {
+    // We'll return a struct array with scheduled times for each event/instance,
+    // prefixed by the partition key when scheduling per group
+    let mut fields = Vec::with_capacity(8);
+    if let Some(key_field) = input_fields.get(1) {
+        fields.push(key_field.clone());
+    }
+    // Compact output encodes the repeated strings as categoricals, and gives the time
+    // of day as a native time rather than formatted as "HH:MM"
+    let (label, time) = if kwargs.compact {
+        (
+            DataType::Categorical(None, CategoricalOrdering::Lexical),
+            Field::new("time".into(), DataType::Time),
+        )
+    } else {
+        (
+            DataType::String,
             Field::new("time_hhmm".into(), DataType::String),
-        ]),
-    ))
+        )
+    };
+    fields.extend([
+        Field::new("entity_name".into(), label.clone()),
+        Field::new("instance".into(), DataType::Int32),
+        Field::new("day".into(), DataType::UInt32),
+        Field::new("time_minutes".into(), DataType::Int32),
+        time,
+        Field::new("status".into(), label),
+    ]);
+    if kwargs.stats {
+        fields.push(Field::new("stats".into(), DataType::Struct(stats_fields())));
+    }
+    if kwargs.row_index {
+        fields.push(Field::new("row_index".into(), IDX_DTYPE));
+    }
+    if !kwargs.passthrough.is_empty() {
+        let input_fields = match input_fields[0].dtype() {
+            DataType::Struct(input_fields) => input_fields,
+            _ => polars_bail!(
+                ComputeError: "Expected a struct column representing a DataFrame"
+            ),
+        };
+        for name in &kwargs.passthrough {
+            match input_fields.iter().find(|f| f.name() == name) {
+                Some(field) => fields.push(field.clone()),
+                None => polars_bail!(
+                    ColumnNotFound: "Cannot pass through '{}', not a field of the events", name
+                ),
+            }
+        }
+    }
+    Ok(Field::new("schedule".into(), DataType::Struct(fields)))
 }
 
-/// Polars expression that schedules events based on their constraints
-/// Input is a DataFrame with event definitions
-#[polars_expr(output_type_func=schedule_output_type)]
-pub fn schedule_events(inputs: &[Series], kwargs: ScheduleKwargs) -> PolarsResult<Series> {
-    // Validate that our input has all the necessary columns
-    let df = match inputs[0].struct_() {
-        Ok(ca) => ca,
-        Err(_) => polars_bail!(
-            ComputeError: "Expected a struct column representing a DataFrame"
+/// The `stats` struct column, from the solve statistics of each row's schedule
+fn stats_series(stats: &[&SolveStats]) -> PolarsResult<Series> {
+    let count =
+        |f: fn(&SolveStats) -> usize| -> Vec<u64> { stats.iter().map(|s| f(s) as u64).collect() };
+    let time = |f: fn(&SolveStats) -> f64| -> Vec<f64> { stats.iter().map(|s| f(s)).collect() };
+    let fields = [
+        Series::new("variables".into(), count(|s| s.variables)),
+        Series::new("binaries".into(), count(|s| s.binaries)),
+        Series::new("constraints".into(), count(|s| s.constraints)),
+        Series::new("parse_time_ms".into(), time(|s| s.parse_time_ms)),
+        Series::new("build_time_ms".into(), time(|s| s.build_time_ms)),
+        Series::new("solve_time_ms".into(), time(|s| s.solve_time_ms)),
+        Series::new("extract_time_ms".into(), time(|s| s.extract_time_ms)),
+        Series::new(
+            "objective".into(),
+            stats.iter().map(|s| s.objective).collect::<Vec<_>>(),
         ),
-    };
+        Series::new(
+            "nodes".into(),
+            stats.iter().map(|s| s.nodes).collect::<Vec<_>>(),
+        ),
+        Series::new(
+            "cached".into(),
+            stats.iter().map(|s| s.cached).collect::<Vec<_>>(),
+        ),
+    ];
+    StructChunked::from_series("stats".into(), stats.len(), fields.iter())
+        .map(|ca| ca.into_series())
+}
+
+/// A categorical column of strings, each distinct string stored once
+fn categorical_series<'a>(
+    name: &str,
+    values: impl ExactSizeIterator<Item = Option<&'a str>>,
+) -> Series {
+    let mut builder =
+        CategoricalChunkedBuilder::new(name.into(), values.len(), CategoricalOrdering::Lexical);
+    for value in values {
+        builder.append(value);
+    }
+    builder.finish().into_series()
+}
+
+/// Assign each row of the partition key to a group, in order of first appearance.
+/// Returns the group id of every row, and the first row index of every group
+/// (used to gather the key values back onto the output).
+fn partition_rows(key: &Series) -> PolarsResult<(Vec<usize>, Vec<IdxSize>)> {
+    let key_str = key.cast(&DataType::String)?;
+    let key_ca = key_str.str()?;
+
+    let mut group_ids: PlHashMap<Option<&str>, usize> = PlHashMap::new();
+    let mut row_groups = Vec::with_capacity(key_ca.len());
+    let mut first_rows = Vec::new();
+
+    for (i, value) in key_ca.iter().enumerate() {
+        let next_id = group_ids.len();
+        let g = *group_ids.entry(value).or_insert_with(|| {
+            first_rows.push(i as IdxSize);
+            next_id
+        });
+        row_groups.push(g);
+    }
+
+    Ok((row_groups, first_rows))
+}
+
+/// Call `f(row, value)` for every non-null string in every non-null list of a
+/// `List(String)` column, reading the Arrow offsets and string views directly
+/// (no per-row `Series` is materialised).
+fn for_each_list_str<'a>(
+    ca: &'a ListChunked,
+    mut f: impl FnMut(usize, &'a str) -> PolarsResult<()>,
+) -> PolarsResult<()> {
+    let mut row_offset = 0;
+    for arr in ca.downcast_iter() {
+        let values: &dyn Array = &**arr.values();
+        let values = match values.as_any().downcast_ref::<Utf8ViewArray>() {
+            Some(v) => v,
+            None => polars_bail!(
+                ComputeError: "Expected a list of strings in column '{}'", ca.name()
+            ),
+        };
+        for i in 0..arr.len() {
+            if !arr.is_valid(i) {
+                continue;
+            }
+            let (start, end) = arr.offsets().start_end(i);
+            for j in start..end {
+                if values.is_valid(j) {
+                    f(row_offset + i, values.value(j))?;
+                }
+            }
+        }
+        row_offset += arr.len();
+    }
+    Ok(())
+}
+
+/// Fetch an optional list field of the struct as `List(String)`
+fn list_field(df: &StructChunked, name: &str) -> PolarsResult<Option<ListChunked>> {
+    match df.field_by_name(name) {
+        Ok(s) => Ok(Some(
+            s.cast(&DataType::List(Box::new(DataType::String)))?
+                .list()?
+                .clone(),
+        )),
+        Err(_) => Ok(None),
+    }
+}
+
+/// Convert the rows of the struct column into `Entity` objects
+///
+/// Columns are scanned straight from their buffers, and each distinct frequency,
+/// constraint or window string is parsed only once. Event names, categories and
+/// constraint references are interned, so rows share one allocation per distinct
+/// string and copying a parsed constraint onto a row only bumps a refcount.
+fn entities_from_struct(df: &StructChunked) -> PolarsResult<Vec<Entity>> {
+    let n_rows = df.len();
 
     // Extract the required columns from the struct array
     let event_col = df.field_by_name("Event")?.cast(&DataType::String)?;
     let category_col = df.field_by_name("Category")?.cast(&DataType::String)?;
     let frequency_col = df.field_by_name("Frequency")?.cast(&DataType::String)?;
 
-    // Extract optional columns with the correct type
-    let constraints_col = df
-        .field_by_name("Constraints")
-        .and_then(|s| s.list().map(|lc| lc.clone()))
-        .unwrap_or_else(|_| ListChunked::full_null("Constraints".into(), df.len()));
-
-    let windows_col = df
-        .field_by_name("Windows")
-        .and_then(|s| s.list().map(|lc| lc.clone()))
-        .unwrap_or_else(|_| ListChunked::full_null("Windows".into(), df.len()));
+    // Parse constraints and windows for all rows in one pass over each list column
+    let mut constraints = vec![Vec::new(); n_rows];
+    if let Some(constraints_col) = list_field(df, "Constraints")? {
+        let mut parsed: PlHashMap<&str, ConstraintExpr> = PlHashMap::new();
+        for_each_list_str(&constraints_col, |row, constraint_str| {
+            let constraint = match parsed.get(constraint_str) {
+                Some(c) => c.clone(),
+                None => match parse_one_constraint(constraint_str) {
+                    Ok(c) => parsed.entry(constraint_str).or_insert(c).clone(),
+                    Err(e) => polars_bail!(
+                        ComputeError: format!("Error parsing constraint '{}': {}", constraint_str, e)
+                    ),
+                },
+            };
+            constraints[row].push(constraint);
+            Ok(())
+        })?;
+    }
 
-    // Pre-compute null masks for both list columns
-    let constraints_null_mask = constraints_col.is_null();
-    let windows_null_mask = windows_col.is_null();
+    let mut windows = vec![Vec::new(); n_rows];
+    if let Some(windows_col) = list_field(df, "Windows")? {
+        let mut parsed: PlHashMap<&str, WindowSpec> = PlHashMap::new();
+        for_each_list_str(&windows_col, |row, window_str| {
+            let window = match parsed.get(window_str) {
+                Some(w) => w.clone(),
+                None => match parse_one_window(window_str) {
+                    Ok(w) => parsed.entry(window_str).or_insert(w).clone(),
+                    Err(e) => polars_bail!(
+                        ComputeError: format!("Error parsing window '{}': {}", window_str, e)
+                    ),
+                },
+            };
+            windows[row].push(window);
+            Ok(())
+        })?;
+    }
 
     // Convert to Entity objects
-    let mut entities: Vec<Entity> = Vec::with_capacity(df.len());
-
-    for i in 0..df.len() {
-        // Extract basic fields
-        let event = event_col
-            .get(i)
-            .or_else(|_| Err(PolarsError::ComputeError("Missing event name".into())))?;
-
-        let category = category_col
-            .get(i)
-            .or_else(|_| Err(PolarsError::ComputeError("Missing category".into())))?;
-
-        let frequency_str = frequency_col
-            .get(i)
-            .or_else(|_| Err(PolarsError::ComputeError("Missing frequency".into())))?;
-
-        let frequency = match scheduler_core::Frequency::from_frequency_str(
-            &frequency_str.to_string().trim_matches('"'),
-        ) {
-            Ok(freq) => freq,
-            Err(e) => polars_bail!(
-                ComputeError: format!("Failed to parse frequency from '{}': {}", frequency_str, e)
-            ),
-        };
-
-        // Parse constraints using a simpler approach
-        let constraints = {
-            let mut parsed_constraints = Vec::new();
-
-            // Check if we have any constraints at this index using the pre-computed mask
-            if !constraints_null_mask.get(i).unwrap_or(true) {
-                if let Ok(av) = constraints_col.get_any_value(i) {
-                    if let AnyValue::List(list_series) = av {
-                        // Now we have a proper Series
-                        if let Ok(string_chunked) = list_series.str() {
-                            for j in 0..string_chunked.len() {
-                                if let Some(constraint_str) = string_chunked.get(j) {
-                                    match parse_one_constraint(constraint_str) {
-                                        Ok(constraint) => parsed_constraints.push(constraint),
-                                        Err(e) => polars_bail!(
-                                            ComputeError: format!("Error parsing constraint '{}': {}", constraint_str, e)
-                                        ),
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
+    let mut symbols = Interner::new();
+    let mut frequencies: PlHashMap<&str, Frequency> = PlHashMap::new();
+    let mut entities: Vec<Entity> = Vec::with_capacity(n_rows);
 
-            parsed_constraints
+    let rows = event_col
+        .str()?
+        .iter()
+        .zip(category_col.str()?.iter())
+        .zip(frequency_col.str()?.iter())
+        .zip(constraints.into_iter().zip(windows));
+
+    for (((event, category), frequency_str), (constraints, windows)) in rows {
+        let event = match event {
+            Some(name) => name,
+            None => polars_bail!(ComputeError: "Missing event name"),
+        };
+        let frequency_str = match frequency_str {
+            Some(f) => f,
+            None => polars_bail!(ComputeError: "Missing frequency for event '{}'", event),
         };
 
-        // Parse windows using same approach
-        let windows = {
-            let mut parsed_windows = Vec::new();
-
-            // Check if we have any windows at this index using the pre-computed mask
-            if !windows_null_mask.get(i).unwrap_or(true) {
-                if let Ok(av) = windows_col.get_any_value(i) {
-                    if let AnyValue::List(list_series) = av {
-                        // Now we have a proper Series
-                        if let Ok(string_chunked) = list_series.str() {
-                            for j in 0..string_chunked.len() {
-                                if let Some(window_str) = string_chunked.get(j) {
-                                    match parse_one_window(window_str) {
-                                        Ok(window) => parsed_windows.push(window),
-                                        Err(e) => polars_bail!(
-                                            ComputeError: format!("Error parsing window '{}': {}", window_str, e)
-                                        ),
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-
-            parsed_windows
+        let frequency = match frequencies.get(frequency_str) {
+            Some(freq) => freq.clone(),
+            None => match Frequency::from_frequency_str(frequency_str.trim_matches('"')) {
+                Ok(freq) => frequencies.entry(frequency_str).or_insert(freq).clone(),
+                Err(e) => polars_bail!(
+                    ComputeError: format!("Failed to parse frequency from '{}': {}", frequency_str, e)
+                ),
+            },
         };
 
         // Create Entity
         entities.push(Entity {
-            name: event.to_string(),
-            category: category.to_string(),
+            name: symbols.share(event),
+            category: symbols.share(category.unwrap_or_default()),
             frequency,
             constraints,
             windows,
+            wrap_minutes: None,
         });
     }
 
+    Ok(entities)
+}
+
+/// Build the scheduler configuration from the expression kwargs
+fn config_from_kwargs(kwargs: &ScheduleKwargs) -> PolarsResult<SchedulerConfig> {
     // Parse scheduler config from kwargs
     let strategy = match kwargs.strategy.to_lowercase().as_str() {
         "earliest" | "" => ScheduleStrategy::Earliest,
@@ -219,69 +477,271 @@ pub fn schedule_events(inputs: &[Series], kwargs: ScheduleKwargs) -> PolarsResul
     let penalty_weight = kwargs.penalty_weight;
     let window_tolerance = kwargs.window_tolerance;
 
+    let solver_backend = match kwargs.solver_backend.parse::<SolverBackend>() {
+        Ok(backend) if backend.is_available() => backend,
+        Ok(backend) => polars_bail!(
+            ComputeError: format!(
+                "Solver backend {:?} is not available: rebuild with its cargo feature",
+                backend
+            )
+        ),
+        Err(e) => polars_bail!(ComputeError: e),
+    };
+    if !solver_backend.has_mip_limits() && (kwargs.mip_gap.is_some() || kwargs.node_limit.is_some())
+    {
+        polars_bail!(
+            ComputeError: format!(
+                "Solver backend {:?} has no MIP gap or node limit: use 'highs' or 'cbc'",
+                solver_backend
+            )
+        );
+    }
+
+    let window_formulation = match kwargs.window_formulation.parse::<WindowFormulation>() {
+        Ok(formulation) => formulation,
+        Err(e) => polars_bail!(ComputeError: e),
+    };
+
     // Create scheduler config
-    let config = SchedulerConfig {
+    Ok(SchedulerConfig {
         day_start_minutes: day_start,
         day_end_minutes: day_end,
         strategy,
         global_windows,
         penalty_weight,
         window_tolerance,
-    };
+        solver_backend,
+        time_limit_ms: kwargs.time_limit_ms,
+        mip_gap: kwargs.mip_gap,
+        node_limit: kwargs.node_limit,
+        horizon_days: kwargs.horizon_days.max(1),
+        window_formulation,
+        ..SchedulerConfig::default()
+    })
+}
 
-    // Solve the schedule
-    let result = match solve_schedule(entities, config, kwargs.debug) {
+/// Surface a solver error as a Polars error, printing the schedule when debugging
+fn check_result(
+    result: Result<ScheduleResult, String>,
+    debug: bool,
+) -> PolarsResult<ScheduleResult> {
+    let result = match result {
         Ok(r) => r,
         Err(e) => polars_bail!(
             ComputeError: format!("Scheduler error: {}", e)
         ),
     };
 
-    if kwargs.debug {
+    if debug {
         eprintln!(
             "--- DEBUG: Final schedule ---\n{}",
             format_schedule(&result)
         );
     }
 
+    Ok(result)
+}
+
+/// Polars expression that schedules events based on their constraints
+/// Input is a DataFrame with event definitions, and optionally a partition key:
+/// when a key is given, each group of rows is solved as its own independent schedule,
+/// with the groups spread across `n_threads` threads (0 = one per core).
+#[polars_expr(output_type_func_with_kwargs=schedule_output_type)]
+pub fn schedule_events(inputs: &[Series], kwargs: ScheduleKwargs) -> PolarsResult<Series> {
+    let _span = tracing::info_span!("schedule_events").entered();
+
+    // Validate that our input has all the necessary columns
+    let df = match inputs[0].struct_() {
+        Ok(ca) => ca,
+        Err(_) => polars_bail!(
+            ComputeError: "Expected a struct column representing a DataFrame"
+        ),
+    };
+
+    // Assign the rows to their partitions (all to one, without a partition key)
+    let partition_key = inputs.get(1);
+    let partition = match partition_key {
+        Some(key) => {
+            polars_ensure!(
+                key.len() == df.len(),
+                ShapeMismatch: "Partition key has length {} but the event column has length {}",
+                key.len(),
+                df.len()
+            );
+            Some(partition_rows(key)?)
+        }
+        None => None,
+    };
+
+    let parse_start = Instant::now();
+    let entities =
+        tracing::info_span!("parse", rows = df.len()).in_scope(|| entities_from_struct(df))?;
+    let parse_time_ms = parse_start.elapsed().as_secs_f64() * 1000.0;
+    let config = config_from_kwargs(&kwargs)?;
+
+    // The input row of each entity by partition and name (a repeated name maps to
+    // its first row), to gather the input columns onto the scheduled events
+    let gather = kwargs.row_index || !kwargs.passthrough.is_empty();
+    let mut source_rows: Vec<PlHashMap<Arc<str>, IdxSize>> = Vec::new();
+    if gather {
+        let n_groups = partition
+            .as_ref()
+            .map_or(1, |(_, first_rows)| first_rows.len());
+        source_rows.resize_with(n_groups, PlHashMap::new);
+        for (i, entity) in entities.iter().enumerate() {
+            let g = partition
+                .as_ref()
+                .map_or(0, |(row_groups, _)| row_groups[i]);
+            source_rows[g]
+                .entry(entity.name.clone())
+                .or_insert(i as IdxSize);
+        }
+    }
+
+    // Solve each partition separately (or the whole column as a single partition),
+    // recording which group every scheduled event came from
+    let (results, key_rows) = match partition {
+        Some((row_groups, first_rows)) => {
+            let mut groups: Vec<Vec<Entity>> = vec![Vec::new(); first_rows.len()];
+            for (entity, g) in entities.into_iter().zip(row_groups) {
+                groups[g].push(entity);
+            }
+
+            let problems = groups
+                .into_iter()
+                .map(|group| (group, config.clone()))
+                .collect();
+            let results = if kwargs.cache {
+                let cache = result_cache();
+                solve_schedules_batch_cached(problems, &cache, kwargs.n_threads, kwargs.debug)
+            } else {
+                solve_schedules_batch(problems, kwargs.n_threads, kwargs.debug)
+            };
+            let results = results
+                .into_iter()
+                .map(|r| check_result(r, kwargs.debug))
+                .collect::<PolarsResult<Vec<_>>>()?;
+            (results, Some(first_rows))
+        }
+        None => {
+            let result = match kwargs.session {
+                Some(id) => solve_in_session(id, entities, config, kwargs.debug),
+                None if kwargs.cache => result_cache().solve(entities, config, kwargs.debug),
+                None => solve_schedule(entities, config, kwargs.debug),
+            };
+            (vec![check_result(result, kwargs.debug)?], None)
+        }
+    };
+    // The whole column is read at once, so each partition reports the time for all of it
+    let results: Vec<ScheduleResult> = results
+        .into_iter()
+        .map(|mut r| {
+            r.stats.parse_time_ms = parse_time_ms;
+            r
+        })
+        .collect();
+
+    // A schedule that ended without any events (infeasible, or timed out before a
+    // solution was found) gets one row of nulls, so that its status is still reported
+    let events: Vec<_> = results
+        .iter()
+        .enumerate()
+        .flat_map(|(g, r)| {
+            let placeholder = (r.scheduled_events.is_empty()
+                && r.status != ScheduleStatus::Optimal)
+                .then_some((g, None));
+            r.scheduled_events
+                .iter()
+                .map(move |e| (g, Some(e)))
+                .chain(placeholder)
+        })
+        .collect();
+
     // Prepare result arrays
-    let entity_names: Vec<_> = result
-        .scheduled_events
+    let entity_names: Vec<_> = events
         .iter()
-        .map(|e| e.entity_name.trim_matches('"'))
+        .map(|(_, e)| e.map(|e| e.entity_name.trim_matches('"')))
         .collect();
 
-    let instances: Vec<_> = result
-        .scheduled_events
+    let instances: Vec<_> = events
         .iter()
-        .map(|e| e.instance as i32)
+        .map(|(_, e)| e.map(|e| e.instance as i32))
         .collect();
 
-    let time_minutes: Vec<_> = result
-        .scheduled_events
+    let days: Vec<_> = events.iter().map(|(_, e)| e.map(|e| e.day)).collect();
+
+    let time_minutes: Vec<_> = events
         .iter()
-        .map(|e| e.time_minutes)
+        .map(|(_, e)| e.map(|e| e.time_minutes))
         .collect();
 
-    let time_hhmm: Vec<_> = result
-        .scheduled_events
+    let statuses: Vec<_> = events
         .iter()
-        .map(|e| format_minutes_to_hhmm(e.time_minutes))
+        .map(|(g, _)| results[*g].status.as_str())
         .collect();
 
     // Create individual series with proper into() for string literals
-    let entity_series = Series::new("entity_name".into(), entity_names);
+    let (entity_series, time_series, status_series) = if kwargs.compact {
+        const NANOS_PER_MINUTE: i64 = 60_000_000_000;
+        let times = Int64Chunked::from_iter_options(
+            "time".into(),
+            time_minutes
+                .iter()
+                .map(|t| t.map(|t| t as i64 * NANOS_PER_MINUTE)),
+        );
+        (
+            categorical_series("entity_name", entity_names.into_iter()),
+            times.into_time().into_series(),
+            categorical_series("status", statuses.into_iter().map(Some)),
+        )
+    } else {
+        let time_hhmm: Vec<_> = time_minutes
+            .iter()
+            .map(|t| t.map(format_minutes_to_hhmm))
+            .collect();
+        (
+            Series::new("entity_name".into(), entity_names),
+            Series::new("time_hhmm".into(), time_hhmm),
+            Series::new("status".into(), statuses),
+        )
+    };
     let instance_series = Series::new("instance".into(), instances);
+    let day_series = Series::new("day".into(), days);
     let time_minutes_series = Series::new("time_minutes".into(), time_minutes);
-    let time_hhmm_series = Series::new("time_hhmm".into(), time_hhmm);
 
     // Create field series and determine output length
-    let field_series = vec![
+    let mut field_series = Vec::with_capacity(8);
+    if let (Some(key), Some(first_rows)) = (partition_key, key_rows) {
+        // Gather the original key value of each event's group (keeps the key dtype)
+        let idx: Vec<IdxSize> = events.iter().map(|(g, _)| first_rows[*g]).collect();
+        field_series.push(key.take(&IdxCa::from_vec("".into(), idx))?);
+    }
+    field_series.extend([
         entity_series,
         instance_series,
+        day_series,
         time_minutes_series,
-        time_hhmm_series,
-    ];
+        time_series,
+        status_series,
+    ]);
+    if kwargs.stats {
+        let stats: Vec<_> = events.iter().map(|(g, _)| &results[*g].stats).collect();
+        field_series.push(stats_series(&stats)?);
+    }
+    if gather {
+        let rows = IdxCa::from_iter_options(
+            "row_index".into(),
+            events
+                .iter()
+                .map(|(g, e)| e.and_then(|e| source_rows[*g].get(e.entity_name.as_str()).copied())),
+        );
+        if kwargs.row_index {
+            field_series.push(rows.clone().into_series());
+        }
+        for name in &kwargs.passthrough {
+            field_series.push(df.field_by_name(name)?.take(&rows)?);
+        }
+    }
 
     // Calculate result length (all fields should have the same length)
     let len = if field_series.is_empty() {
@@ -1,11 +1,66 @@
+use pyo3::exceptions::PyOSError;
 use pyo3::prelude::*;
 use pyo3_polars::PolarsAllocator;
+use std::collections::HashMap;
 
 mod expressions;
+mod profiling;
+
+/// Forget the incremental session with this id, returning whether it existed
+#[pyfunction]
+fn drop_session(id: u64) -> bool {
+    expressions::drop_session(id)
+}
+
+/// Replace the result cache with one holding up to `capacity` results in memory,
+/// also stored as files in the directory `path` if given (up to `disk_capacity`
+/// of them, removing the least recently written past that)
+#[pyfunction]
+#[pyo3(signature = (
+    capacity = expressions::DEFAULT_CACHE_CAPACITY,
+    path = None,
+    disk_capacity = scheduler_core::DEFAULT_DISK_CAPACITY,
+))]
+fn configure_cache(capacity: usize, path: Option<String>, disk_capacity: usize) -> PyResult<()> {
+    expressions::configure_cache(capacity, path, disk_capacity).map_err(PyOSError::new_err)
+}
+
+/// Hit and miss counts of the result cache, with its size and capacity
+#[pyfunction]
+fn cache_info() -> HashMap<&'static str, u64> {
+    let cache = expressions::result_cache();
+    let stats = cache.stats();
+    HashMap::from([
+        ("hits", stats.hits),
+        ("misses", stats.misses),
+        ("entries", stats.entries as u64),
+        ("capacity", cache.capacity() as u64),
+        ("disk_capacity", cache.disk_capacity() as u64),
+    ])
+}
+
+/// Drop every cached result and reset the counters (files on disk are kept)
+#[pyfunction]
+fn clear_cache() {
+    expressions::result_cache().clear()
+}
+
+/// Write a Chrome trace of every following solve to the file `path`, or stop
+/// profiling (completing the file) when `path` is None
+#[pyfunction]
+#[pyo3(signature = (path = None))]
+fn set_profiling(path: Option<String>) -> PyResult<()> {
+    profiling::set_profiling(path).map_err(PyOSError::new_err)
+}
 
 #[pymodule]
 fn _polars_scheduler(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add("__version__", env!("CARGO_PKG_VERSION"))?;
+    m.add_function(wrap_pyfunction!(drop_session, m)?)?;
+    m.add_function(wrap_pyfunction!(configure_cache, m)?)?;
+    m.add_function(wrap_pyfunction!(cache_info, m)?)?;
+    m.add_function(wrap_pyfunction!(clear_cache, m)?)?;
+    m.add_function(wrap_pyfunction!(set_profiling, m)?)?;
     Ok(())
 }
 
@@ -0,0 +1,88 @@
+use std::fs::File;
+use std::sync::{Mutex, OnceLock};
+use tracing_chrome::{ChromeLayer, ChromeLayerBuilder, FlushGuard};
+use tracing_subscriber::filter::LevelFilter;
+use tracing_subscriber::layer::{Layered, SubscriberExt};
+use tracing_subscriber::{reload, Registry};
+
+/// The registry behind the level filter that switches span creation on and off
+type Filtered = Layered<reload::Layer<LevelFilter, Registry>, Registry>;
+type FilterHandle = reload::Handle<LevelFilter, Registry>;
+type ChromeHandle = reload::Handle<Option<ChromeLayer<Filtered>>, Filtered>;
+
+/// The installed trace subscriber, and the guard that completes the current file
+struct Profiler {
+    filter: FilterHandle,
+    handle: ChromeHandle,
+    guard: Option<FlushGuard>,
+}
+
+static PROFILER: OnceLock<Mutex<Option<Profiler>>> = OnceLock::new();
+
+fn profiler() -> &'static Mutex<Option<Profiler>> {
+    PROFILER.get_or_init(|| Mutex::new(None))
+}
+
+/// Write the spans of every following solve to a Chrome trace file at `path`
+/// (viewable in Perfetto or `chrome://tracing`), or with `None` stop profiling,
+/// completing the file.
+///
+/// No subscriber is installed until profiling is first enabled, so until then
+/// the spans in scheduler-core cost one relaxed atomic load each. Once installed
+/// the subscriber stays, with its Chrome layer swapped in and out, but stopping
+/// profiling also turns its level filter off: the global max level drops back to
+/// off, so spans are again skipped at that one load rather than created.
+pub fn set_profiling(path: Option<String>) -> Result<(), String> {
+    let mut slot = profiler()
+        .lock()
+        .map_err(|_| "Profiler state is poisoned".to_string())?;
+    // Create the file here, as the builder panics on a path it cannot create
+    let (layer, guard) = match path {
+        Some(path) => {
+            let file = File::create(&path)
+                .map_err(|e| format!("Cannot create the trace file {}: {}", path, e))?;
+            let (layer, guard) = ChromeLayerBuilder::new()
+                .writer(file)
+                .include_args(true)
+                .build();
+            (Some(layer), Some(guard))
+        }
+        None => (None, None),
+    };
+
+    match slot.as_mut() {
+        Some(profiler) => {
+            let level = if layer.is_some() {
+                LevelFilter::TRACE
+            } else {
+                LevelFilter::OFF
+            };
+            let switch = |e: reload::Error| format!("Cannot switch the profiler: {}", e);
+            // Stop creating spans before removing the layer that records them, and
+            // only start again once the new layer is in place
+            if level == LevelFilter::OFF {
+                profiler.filter.reload(level).map_err(switch)?;
+                profiler.handle.reload(layer).map_err(switch)?;
+            } else {
+                profiler.handle.reload(layer).map_err(switch)?;
+                profiler.filter.reload(level).map_err(switch)?;
+            }
+            // Dropping the previous guard flushes and closes its file
+            profiler.guard = guard;
+        }
+        None if layer.is_some() => {
+            let (filter, filter_handle) = reload::Layer::new(LevelFilter::TRACE);
+            let (layer, handle) = reload::Layer::new(layer);
+            let subscriber = Registry::default().with(filter).with(layer);
+            tracing::subscriber::set_global_default(subscriber)
+                .map_err(|e| format!("Cannot install the profiler: {}", e))?;
+            *slot = Some(Profiler {
+                filter: filter_handle,
+                handle,
+                guard,
+            });
+        }
+        None => {}
+    }
+    Ok(())
+}
@@ -0,0 +1,98 @@
+import polars as pl
+import pytest
+from polars_scheduler import Scheduler, cache_info, clear_cache, configure_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    configure_cache()
+    yield
+    configure_cache()
+
+
+def regimen() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "Event": ["breakfast", "antepsin"],
+            "Category": ["food", "med"],
+            "Unit": ["meal", "tablet"],
+            "Amount": [None, None],
+            "Divisor": [None, None],
+            "Frequency": ["1x daily", "2x daily"],
+            "Constraints": [[], ["≥6h apart", "≥1h after food"]],
+            "Windows": [["08:00"], []],
+            "Note": [None, None],
+        },
+    )
+
+
+def test_repeat_is_a_hit():
+    """Test that solving an identical problem again is served from the cache."""
+    first = Scheduler(regimen()).create(cache=True)
+    second = Scheduler(regimen()).create(cache=True)
+    assert first.equals(second)
+    info = cache_info()
+    assert (info["hits"], info["misses"], info["entries"]) == (1, 1, 1)
+
+
+def test_row_order_shares_entry():
+    """Test that reordering the events does not change the cache key."""
+    Scheduler(regimen()).create(cache=True)
+    Scheduler(regimen().reverse()).create(cache=True)
+    assert cache_info()["hits"] == 1
+
+
+def test_settings_are_part_of_key():
+    """Test that a different config is a cache miss."""
+    Scheduler(regimen()).create(strategy="earliest", cache=True)
+    Scheduler(regimen()).create(strategy="latest", cache=True)
+    assert cache_info()["misses"] == 2
+
+
+def test_cache_disabled():
+    """Test that the cache is opt-in, and neither read nor counted otherwise."""
+    Scheduler(regimen()).create()
+    Scheduler(regimen()).create(cache=False)
+    assert cache_info()["hits"] == cache_info()["misses"] == 0
+
+
+def test_create_many_hits():
+    """Test that identical schedules in a batch reuse each other's results."""
+    results = Scheduler.create_many([regimen()] * 3, n_threads=1, cache=True)
+    assert all(r.equals(results[0]) for r in results)
+    assert cache_info()["hits"] == 2
+
+
+def test_capacity_evicts():
+    """Test that the cache holds at most its capacity."""
+    configure_cache(capacity=1)
+    Scheduler(regimen()).create(strategy="earliest", cache=True)
+    Scheduler(regimen()).create(strategy="latest", cache=True)
+    assert cache_info()["entries"] == 1
+
+
+def test_disk_store(tmp_path):
+    """Test that results stored on disk survive clearing the memory cache."""
+    configure_cache(path=str(tmp_path))
+    first = Scheduler(regimen()).create(cache=True)
+    assert list(tmp_path.glob("*.json"))
+    clear_cache()
+    second = Scheduler(regimen()).create(cache=True)
+    assert first.equals(second)
+    assert cache_info()["hits"] == 1
+
+
+def test_hits_are_marked():
+    """Test that a result served from the cache is marked in its statistics."""
+    first = Scheduler(regimen()).create(cache=True, stats=True)
+    second = Scheduler(regimen()).create(cache=True, stats=True)
+    assert not first.get_column("stats").struct.field("cached").any()
+    assert second.get_column("stats").struct.field("cached").all()
+
+
+def test_disk_capacity(tmp_path):
+    """Test that the disk store removes the oldest files past its capacity."""
+    configure_cache(path=str(tmp_path), disk_capacity=1)
+    Scheduler(regimen()).create(strategy="earliest", cache=True)
+    Scheduler(regimen()).create(strategy="latest", cache=True)
+    assert len(list(tmp_path.glob("*.json"))) <= 1
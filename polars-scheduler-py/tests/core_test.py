@@ -74,3 +74,30 @@ def test_plugin_api_works():
 
     # Should have one pill event
     assert result.filter(pl.col("entity_name") == "pill").height == 1
+
+
+def test_compact_output():
+    """Test that compact output encodes names as categoricals and times natively."""
+    scheduler = Scheduler()
+    scheduler.add(
+        event="pill",
+        category="medication",
+        unit="pill",
+        frequency="2x daily",
+        constraints=["≥8h apart"],
+    )
+    scheduler.add(event="meal", category="food", unit="meal", frequency="3x daily")
+    result = scheduler.create()
+    compact = scheduler.create(compact=True)
+
+    assert compact.schema["entity_name"] == pl.Categorical
+    assert compact.schema["status"] == pl.Categorical
+    assert compact.schema["time"] == pl.Time
+    assert "time_hhmm" not in compact.columns
+    assert compact.get_column("entity_name").cast(pl.String).equals(
+        result.get_column("entity_name"),
+    )
+    assert compact.get_column("time").dt.to_string("%H:%M").equals(
+        result.get_column("time_hhmm"),
+        check_names=False,
+    )
@@ -0,0 +1,75 @@
+import polars as pl
+from polars_scheduler import Scheduler
+
+
+def test_add_is_buffered_in_order():
+    """Test that events added one at a time are all kept, in order, in one chunk."""
+    scheduler = Scheduler()
+    for i in range(100):
+        scheduler.add(event=f"pill {i}", category="med", unit="tablet")
+    df = scheduler._df
+    assert df.height == 100
+    assert df.n_chunks() == 1
+    assert df.get_column("Event").to_list() == [f"pill {i}" for i in range(100)]
+    assert df.get_column("Frequency").unique().to_list() == ["1x daily"]
+
+
+def test_extend_from_dicts_and_frames():
+    """Test bulk adding from dicts and from a DataFrame with a different schema."""
+    scheduler = Scheduler()
+    scheduler.add(event="breakfast", category="food", unit="meal")
+    scheduler.extend(
+        [
+            {"event": "pill", "category": "med", "unit": "tablet", "amount": 1},
+            {
+                "event": "drops",
+                "category": "med",
+                "unit": "ml",
+                "frequency": "2x daily",
+            },
+        ],
+    )
+    # Amount as integers and no Note column, cast and filled in
+    scheduler.add_many(
+        pl.DataFrame(
+            {
+                "Event": ["dinner"],
+                "Category": ["food"],
+                "Unit": ["meal"],
+                "Amount": [1],
+                "Divisor": [None],
+                "Frequency": ["1x daily"],
+                "Constraints": [[]],
+                "Windows": [["18:00-20:00"]],
+            },
+        ),
+    )
+    df = scheduler._df
+    assert dict(df.schema) == Scheduler._schema
+    assert df.get_column("Event").to_list() == ["breakfast", "pill", "drops", "dinner"]
+    assert df.get_column("Amount").to_list() == [None, 1.0, None, 1.0]
+
+    names = scheduler.create().get_column("entity_name")
+    assert set(names) == {"breakfast", "pill", "drops", "dinner"}
+
+
+def test_mistyped_frame_is_cast_keeping_extra_columns():
+    """Test that a DataFrame with the wrong column types is cast column by column."""
+    df = pl.DataFrame(
+        {
+            "patient": ["a"],
+            "Event": ["pill"],
+            "Category": ["med"],
+            "Unit": [None],
+            "Amount": ["2.5"],
+            "Divisor": [None],
+            "Frequency": ["1x daily"],
+            "Constraints": [[]],
+            "Windows": [[]],
+            "Note": [None],
+        },
+    )
+    conformed = Scheduler(df)._df
+    assert conformed.columns == [*Scheduler._schema, "patient"]
+    assert conformed.get_column("Amount").item() == 2.5
+    assert conformed.get_column("Unit").dtype == pl.String
@@ -0,0 +1,77 @@
+import polars as pl
+import pytest
+from polars_scheduler import Scheduler
+
+
+def events_df(frequency: str, constraints: list[str] | None = None) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "Event": ["pill"],
+            "Category": ["med"],
+            "Unit": ["tablet"],
+            "Amount": [None],
+            "Divisor": [None],
+            "Frequency": [frequency],
+            "Constraints": [constraints or []],
+            "Windows": [[]],
+            "Note": [None],
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "frequency, horizon_days, expected_days",
+    [
+        ("2x daily", 3, [0, 0, 1, 1, 2, 2]),
+        ("every other day", 4, [0, 2]),
+        ("every 3 days", 7, [0, 3, 6]),
+        ("3x weekly", 7, [0, 2, 4]),
+        ("3x weekly", 14, [0, 2, 4, 7, 9, 11]),
+    ],
+)
+def test_days(frequency, horizon_days, expected_days):
+    """Test that each frequency is spread over the days of the horizon."""
+    result = Scheduler(events_df(frequency)).create(horizon_days=horizon_days)
+    assert result.get_column("day").to_list() == expected_days
+
+
+def test_every_hours():
+    """Test that 'every Nh' fits as many instances as the day allows, N hours apart."""
+    # 08:00-22:00 fits 08:00 and 16:00, but not a third instance at 00:00
+    result = Scheduler(events_df("every 8h")).create()
+    assert result.get_column("time_hhmm").to_list() == ["08:00", "16:00"]
+
+
+def test_apart_overnight():
+    """Test that an 'apart' gap also holds between the last and first instance overnight."""
+    result = Scheduler(events_df("2x daily", ["≥12h apart"])).create(horizon_days=2)
+    assert result.get_column("time_hhmm").to_list() == ["08:00", "20:00"] * 2
+
+
+def test_apart_overnight_infeasible():
+    """Test that a gap that cannot also hold overnight makes the horizon infeasible."""
+    # 08:00 and 21:00 are 13h apart, but only 11h apart overnight
+    single_day = Scheduler(events_df("2x daily", ["≥13h apart"])).create()
+    assert single_day.get_column("status").to_list() == ["optimal", "optimal"]
+    result = Scheduler(events_df("2x daily", ["≥13h apart"])).create(horizon_days=2)
+    assert result.get_column("status").item() == "infeasible"
+
+
+def test_overnight_conflict_is_a_status():
+    """Test that days solved apart breaking a gap overnight make only their partition
+    infeasible."""
+    # The vitamin is due on day 0 only, and pushes that day's pills to 09:00 and 21:00,
+    # which is 11h before the first pill of day 1 at 08:00
+    pills = events_df("2x daily", ["≥12h apart", "≥1h after vitamin"])
+    vitamin = events_df("every other day").with_columns(Event=pl.lit("vitamin"))
+    df = pl.concat(
+        [
+            pl.concat([pills, vitamin]).with_columns(patient=pl.lit("a")),
+            events_df("1x daily").with_columns(patient=pl.lit("b")),
+        ],
+    )
+    result = Scheduler(df).create(horizon_days=2, partition_by="patient")
+    a = result.filter(pl.col("patient") == "a")
+    assert a.get_column("status").to_list() == ["infeasible"]
+    b = result.filter(pl.col("patient") == "b")
+    assert b.get_column("status").to_list() == ["optimal", "optimal"]
@@ -0,0 +1,42 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+from polars_scheduler import Scheduler
+
+
+def regimen_df() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "patient": ["a", "a", "b"],
+            "Event": ["pill", "meal", "pill"],
+            "Category": ["medication", "food", "medication"],
+            "Unit": ["pill", "meal", "pill"],
+            "Amount": [None, None, None],
+            "Divisor": [None, None, None],
+            "Frequency": ["2x daily", "1x daily", "1x daily"],
+            "Constraints": [["≥6h apart", "≥1h before food"], [], []],
+            "Windows": [[], ["12:00-13:00"], []],
+            "Note": [None, None, None],
+            "comment": ["unused", "unused", "unused"],
+        },
+    )
+
+
+def test_lazy_create_matches_eager():
+    """Test that the lazy namespace plans the same schedule as the eager one."""
+    df = regimen_df()
+    plan = df.lazy().scheduler.create(partition_by="patient")
+    assert isinstance(plan, pl.LazyFrame)
+    assert_frame_equal(
+        plan.collect(),
+        Scheduler(df).create(partition_by="patient"),
+    )
+
+
+def test_lazy_create_from_parquet_scan(tmp_path):
+    """Test scheduling straight from a Parquet scan, casting mismatched columns."""
+    path = tmp_path / "events.parquet"
+    regimen_df().filter(pl.col("patient") == "a").drop("patient").write_parquet(path)
+
+    result = pl.scan_parquet(path).scheduler.create().collect()
+    assert sorted(result.get_column("entity_name")) == ["meal", "pill", "pill"]
+    assert "comment" not in result.columns
@@ -0,0 +1,128 @@
+import polars as pl
+from polars_scheduler import Scheduler, schedule_events
+
+
+def regimen_df() -> pl.DataFrame:
+    """Two patients with the same event names but different constraints."""
+    return pl.DataFrame(
+        {
+            "patient": ["a", "a", "b", "b"],
+            "Event": ["pill", "meal", "pill", "meal"],
+            "Category": ["medication", "food", "medication", "food"],
+            "Unit": ["pill", "meal", "pill", "meal"],
+            "Amount": [None, None, None, None],
+            "Divisor": [None, None, None, None],
+            "Frequency": ["1x daily", "1x daily", "2x daily", "1x daily"],
+            "Constraints": [["≥1h before food"], [], ["≥6h apart"], []],
+            "Windows": [[], [], [], []],
+            "Note": [None, None, None, None],
+        },
+    )
+
+
+def test_partitioned_schedule():
+    """Each partition is solved independently and keeps its key."""
+    scheduler = Scheduler(regimen_df())
+    result = scheduler.create(
+        strategy="earliest",
+        day_start="08:00",
+        day_end="22:00",
+        partition_by="patient",
+    )
+    assert result.columns[0] == "patient"
+    assert result.height == 5
+
+    a = result.filter(pl.col("patient") == "a")
+    pill = a.filter(pl.col("entity_name") == "pill").get_column("time_minutes").item()
+    meal = a.filter(pl.col("entity_name") == "meal").get_column("time_minutes").item()
+    assert meal - pill >= 60
+
+    b = result.filter(pl.col("patient") == "b")
+    pills = b.filter(pl.col("entity_name") == "pill").sort("instance")
+    assert pills.get_column("time_minutes").to_list() == [480, 840]
+    # Patient b's meal is unconstrained, so it is not pushed back by patient a's pill
+    meal = b.filter(pl.col("entity_name") == "meal").get_column("time_minutes").item()
+    assert meal == 480
+
+
+def test_partitioned_expression_matches_per_group():
+    """Partitioned expression results equal solving each group on its own."""
+    df = regimen_df()
+    events = pl.struct(df.drop("patient").get_columns())
+    partitioned = pl.select(
+        schedule_events(events, partition_by=df.get_column("patient")).alias("s"),
+    ).unnest("s")
+
+    for key, group in df.group_by("patient", maintain_order=True):
+        alone = pl.select(
+            schedule_events(pl.struct(group.drop("patient").get_columns())).alias("s"),
+        ).unnest("s")
+        expected = alone.sort("entity_name", "instance")
+        got = (
+            partitioned.filter(pl.col("patient") == key[0])
+            .drop("patient")
+            .sort("entity_name", "instance")
+        )
+        assert got.equals(expected)
+
+
+def test_create_many():
+    """Batch scheduling returns one result per input, in input order."""
+    df = regimen_df()
+    frames = [group.drop("patient") for _, group in df.group_by("patient")]
+    empty = Scheduler()
+    results = Scheduler.create_many([*frames, empty], n_threads=2)
+
+    assert len(results) == 3
+    for frame, result in zip(frames, results):
+        expected = Scheduler(frame).create().sort("entity_name", "instance")
+        assert result.sort("entity_name", "instance").equals(expected)
+    assert results[2].height == 0
+    assert "time_minutes" in results[2].columns
+
+
+def test_create_many_all_empty():
+    """Batch scheduling of only empty inputs returns an empty result for each."""
+    results = Scheduler.create_many([Scheduler(), pl.DataFrame()], n_threads=2)
+
+    assert len(results) == 2
+    for result in results:
+        assert result.height == 0
+        assert "time_minutes" in result.columns
+        assert "__schedule_index__" not in result.columns
+
+
+def test_partitions_in_order_of_first_appearance():
+    """Partitions come in input order, each in time order, with their own rows."""
+    result = Scheduler(regimen_df().reverse()).create(partition_by="patient")
+    assert result.get_column("patient").unique(maintain_order=True).to_list() == [
+        "b",
+        "a",
+    ]
+    for _, group in result.group_by("patient"):
+        times = group.select("day", "time_minutes")
+        assert times.equals(times.sort("day", "time_minutes"))
+
+    # Each event carries the columns of its own partition's row
+    pills = result.filter(pl.col("entity_name") == "pill")
+    constraints = dict(zip(pills["patient"], pills["Constraints"].to_list()))
+    assert constraints == {"a": ["≥1h before food"], "b": ["≥6h apart"]}
+
+
+def test_row_index():
+    """The expression can return the input row of each scheduled event."""
+    df = regimen_df()
+    events = pl.struct(df.drop("patient").get_columns())
+    result = pl.select(
+        schedule_events(
+            events,
+            partition_by=df.get_column("patient"),
+            row_index=True,
+            passthrough=["Frequency"],
+        ).alias("s"),
+    ).unnest("s")
+    rows = df.with_row_index("row_index")
+    joined = result.join(rows, on="row_index")
+    assert (joined["entity_name"] == joined["Event"]).all()
+    assert (joined["patient"] == joined["patient_right"]).all()
+    assert (joined["Frequency"] == joined["Frequency_right"]).all()
@@ -0,0 +1,42 @@
+import json
+
+import polars as pl
+import pytest
+from polars_scheduler import Scheduler, set_profiling
+
+
+def test_profiling_writes_chrome_trace(tmp_path):
+    """Test that profiling writes the spans of a solve as a Chrome trace."""
+    df = pl.DataFrame(
+        {
+            "Event": ["pill", "meal"],
+            "Category": ["med", "food"],
+            "Unit": [None, None],
+            "Amount": [None, None],
+            "Divisor": [None, None],
+            "Frequency": ["2x daily", "2x daily"],
+            "Constraints": [["≥8h apart", "≥1h before food"], []],
+            "Windows": [[], []],
+            "Note": [None, None],
+        },
+    )
+    trace = tmp_path / "trace.json"
+    set_profiling(trace)
+    try:
+        Scheduler(df).create(cache=False)
+    finally:
+        set_profiling(None)
+
+    names = {event.get("name") for event in json.loads(trace.read_text())}
+    assert {"schedule_events", "parse", "build_model", "solve_model"} <= names
+
+
+def test_profiling_bad_path_raises(tmp_path):
+    """Test that a trace file that cannot be created raises instead of aborting."""
+    with pytest.raises(OSError, match="Cannot create the trace file"):
+        set_profiling(tmp_path / "no" / "such" / "dir" / "trace.json")
+    # The failed call leaves profiling usable
+    trace = tmp_path / "trace.json"
+    set_profiling(trace)
+    set_profiling(None)
+    assert trace.exists()
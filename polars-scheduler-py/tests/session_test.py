@@ -0,0 +1,46 @@
+from polars_scheduler import Scheduler
+
+
+def build(incremental: bool) -> Scheduler:
+    scheduler = Scheduler(incremental=incremental)
+    scheduler.add(
+        event="breakfast",
+        category="food",
+        unit="meal",
+        frequency="1x daily",
+        windows=["08:00"],
+    )
+    scheduler.add(
+        event="antepsin",
+        category="med",
+        unit="tablet",
+        frequency="2x daily",
+        constraints=["≥6h apart", "≥1h after food"],
+    )
+    return scheduler
+
+
+def test_incremental_matches_cold_solve():
+    """Test that re-solving in a session after an edit matches solving from scratch."""
+    warm = build(incremental=True)
+    cold = build(incremental=False)
+    assert warm.create().equals(cold.create())
+
+    for scheduler in (warm, cold):
+        scheduler.add(
+            event="gabapentin",
+            category="med",
+            unit="tablet",
+            frequency="2x daily",
+            constraints=["≥8h apart"],
+        )
+    assert warm.create().equals(cold.create())
+
+
+def test_incremental_config_change():
+    """Test that changing the strategy re-solves a session's schedule."""
+    scheduler = build(incremental=True)
+    earliest = scheduler.create(strategy="earliest")
+    latest = scheduler.create(strategy="latest")
+    assert latest.equals(build(incremental=False).create(strategy="latest"))
+    assert not latest.equals(earliest)
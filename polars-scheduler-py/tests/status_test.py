@@ -0,0 +1,74 @@
+import polars as pl
+import pytest
+from polars_scheduler import Scheduler
+
+
+def events_df(frequency: str, constraints: list[str]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "Event": ["pill"],
+            "Category": ["med"],
+            "Unit": ["tablet"],
+            "Amount": [None],
+            "Divisor": [None],
+            "Frequency": [frequency],
+            "Constraints": [constraints],
+            "Windows": [[]],
+            "Note": [None],
+        },
+    )
+
+
+def test_optimal_status():
+    """Test that a solved schedule reports an optimal status on every row."""
+    result = Scheduler(events_df("2x daily", ["≥8h apart"])).create()
+    assert result.height == 2
+    assert result.get_column("status").to_list() == ["optimal", "optimal"]
+
+
+def test_infeasible_status():
+    """Test that an infeasible schedule returns a status row instead of raising."""
+    # Three instances 12h apart cannot fit in a 14h day
+    result = Scheduler(events_df("3x daily", ["≥12h apart"])).create()
+    assert result.height == 1
+    assert result.get_column("status").item() == "infeasible"
+    assert result.get_column("time_minutes").item() is None
+
+
+def test_time_limit():
+    """Test that a time limit still returns a schedule with a known status."""
+    result = Scheduler(events_df("2x daily", ["≥8h apart"])).create(
+        time_limit_ms=10_000,
+    )
+    assert set(result.get_column("status")) <= {
+        "optimal",
+        "feasible_within_gap",
+        "timed_out",
+    }
+
+
+def test_solve_stats():
+    """Test that solve statistics are returned as a struct column when requested."""
+    df = pl.concat(
+        [
+            events_df("2x daily", ["≥8h apart", "≥1h before food"]),
+            events_df("2x daily", []).with_columns(
+                Event=pl.lit("meal"),
+                Category=pl.lit("food"),
+            ),
+        ],
+    )
+    result = Scheduler(df).create(stats=True, cache=False)
+    stats = result.get_column("stats").struct.unnest()
+    assert stats.height == 4
+    assert stats.get_column("variables").min() > 0
+    assert (stats.get_column("binaries") <= stats.get_column("variables")).all()
+    assert (stats.get_column("solve_time_ms") >= 0).all()
+    assert stats.get_column("objective").is_not_null().all()
+    assert "stats" not in Scheduler(df).create().columns
+
+
+def test_mip_limits_need_backend():
+    """Test that a MIP gap or node limit is rejected by the microlp backend."""
+    with pytest.raises(pl.exceptions.ComputeError, match="node limit"):
+        Scheduler(events_df("2x daily", ["≥8h apart"])).create(mip_gap=0.01)
@@ -0,0 +1,45 @@
+import polars as pl
+from polars_scheduler import Scheduler
+
+
+def test_windows_used_in_order():
+    """Test that instances take their windows in time order, however they are listed."""
+    windows = ["18:00", "08:00", "15:30", "10:30", "20:30", "13:00"]
+    scheduler = Scheduler()
+    scheduler.add(
+        event="feed",
+        category="food",
+        unit="meal",
+        frequency="6x daily",
+        constraints=["≥2h apart"],
+        windows=windows,
+    )
+    result = scheduler.create()
+    assert result.get_column("time_hhmm").to_list() == sorted(windows)
+    assert result.get_column("instance").to_list() == [1, 2, 3, 4, 5, 6]
+
+
+def test_interchangeable_entities():
+    """Test that identical entities are both scheduled, in the order they are listed."""
+    scheduler = Scheduler()
+    scheduler.add(
+        event="breakfast",
+        category="food",
+        unit="meal",
+        frequency="2x daily",
+        windows=["08:00", "18:00"],
+    )
+    for event in ("gabapentin", "pardale"):
+        scheduler.add(
+            event=event,
+            category="med",
+            unit="tablet",
+            frequency="2x daily",
+            constraints=["≥8h apart", "≥1h after food"],
+        )
+    result = scheduler.create()
+    firsts = result.filter(pl.col("instance") == 1).sort("entity_name")
+    assert firsts.get_column("entity_name").to_list() == ["gabapentin", "pardale"]
+    first_times = firsts.get_column("time_minutes").to_list()
+    assert first_times[0] <= first_times[1]
+    assert result.filter(pl.col("Category") == "med").height == 4
@@ -227,3 +227,28 @@ def test_instance_order():
     assert time_inst1 < time_inst2, (
         f"Saw the 'flipped' scenario: instance #1 => {time_inst1}, instance #2 => {time_inst2}"
     )
+
+
+@pytest.mark.parametrize("strategy", ["earliest", "latest"])
+@pytest.mark.parametrize("n_meals", [2, 4, 6])
+def test_ordered_window_formulation(strategy, n_meals):
+    """Test that the ordered window formulation gives the same schedule as big-M."""
+    windows = [f"{h:02d}:00-{h:02d}:30" for h in range(8, 20)]  # 12 windows
+    df = pl.DataFrame(
+        {
+            "Event": ["Chicken and rice", "Antepsin"],
+            "Category": ["food", "med"],
+            "Unit": ["meal", "tablet"],
+            "Amount": [None, None],
+            "Divisor": [None, None],
+            "Frequency": [f"{n_meals}x daily", "2x daily"],
+            "Constraints": [["≥1h apart"], ["≥6h apart", "≥1h after food"]],
+            "Windows": [windows, []],
+            "Note": [None, None],
+        },
+    )
+    results = [
+        Scheduler(df).create(strategy=strategy, window_formulation=formulation)
+        for formulation in ("big_m", "ordered")
+    ]
+    assert results[0].equals(results[1])
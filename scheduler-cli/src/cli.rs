@@ -1,4 +1,7 @@
-use scheduler_core::{parse_hhmm_to_minutes, ScheduleStrategy, SchedulerConfig, WindowSpec};
+use scheduler_core::{
+    parse_hhmm_to_minutes, ScheduleStrategy, SchedulerConfig, SolverBackend, WindowFormulation,
+    WindowSpec,
+};
 use std::env;
 
 pub fn parse_config_from_args() -> SchedulerConfig {
@@ -49,6 +52,30 @@ pub fn parse_config_from_args() -> SchedulerConfig {
         }
     }
 
+    // 6) Solver backend: e.g. --solver=highs
+    if let Some(solver_arg) = args.iter().find(|a| a.starts_with("--solver=")) {
+        match solver_arg["--solver=".len()..].parse::<SolverBackend>() {
+            Ok(backend) => config.solver_backend = backend,
+            Err(e) => eprintln!("Warning: {}", e),
+        }
+    }
+
+    // 7) Horizon: e.g. --days=7
+    if let Some(days_arg) = args.iter().find(|a| a.starts_with("--days=")) {
+        match days_arg["--days=".len()..].parse::<u32>() {
+            Ok(days) if days > 0 => config.horizon_days = days,
+            _ => eprintln!("Warning: invalid number of days in '{}'", days_arg),
+        }
+    }
+
+    // 8) Window formulation: e.g. --window-formulation=ordered
+    if let Some(arg) = args.iter().find(|a| a.starts_with("--window-formulation=")) {
+        match arg["--window-formulation=".len()..].parse::<WindowFormulation>() {
+            Ok(formulation) => config.window_formulation = formulation,
+            Err(e) => eprintln!("Warning: {}", e),
+        }
+    }
+
     config
 }
 
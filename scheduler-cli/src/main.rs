@@ -24,14 +24,16 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
 
     // Parse sample table data
     let table_data = create_sample_table();
+    let parse_start = Instant::now();
     let entities = parse_from_table(table_data)?;
+    let parse_time_ms = parse_start.elapsed().as_secs_f64() * 1000.0;
 
     println!("{}", "Entities loaded:".green());
     for e in &entities {
         println!(
-            "  - {} ({}x daily) with {} constraints and {} windows",
+            "  - {} ({}) with {} constraints and {} windows",
             e.name,
-            e.frequency.instances_per_day(),
+            e.frequency,
             e.constraints.len(),
             e.windows.len()
         );
@@ -41,8 +43,9 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
     println!("{}", "\nSolving schedule...".green());
     let debug_enabled = std::env::args().any(|a| a == "--debug");
 
-    let result = solve_schedule(entities, config, debug_enabled)
+    let mut result = solve_schedule(entities, config, debug_enabled)
         .map_err(|e| format!("Solver error: {}", e))?;
+    result.stats.parse_time_ms = parse_time_ms;
 
     // Print results
     println!("\n{}", "Schedule result:".green());
@@ -51,5 +54,16 @@ fn main() -> Result<(), Box<dyn std::error::Error>> {
     let elapsed = start_time.elapsed();
     println!("{}", format!("Total runtime: {:.2?}", elapsed).yellow());
 
+    // Solve statistics as one line of JSON, for collecting as metrics
+    if std::env::args().any(|a| a == "--stats") {
+        let stats = serde_json::json!({
+            "status": result.status.as_str(),
+            "engine": result.engine,
+            "events": result.scheduled_events.len(),
+            "stats": result.stats,
+        });
+        println!("{}", stats);
+    }
+
     Ok(())
 }
@@ -0,0 +1,114 @@
+//! Compare per-constraint big-M values against the uniform 1440 used previously.
+//!
+//! microlp does not report branch-and-bound node counts, so wall time is the
+//! measure here.
+
+mod common;
+
+use common::table;
+use criterion::{criterion_group, criterion_main, BenchmarkId, Criterion};
+use scheduler_core::{solve_schedule, Entity, SchedulerConfig};
+
+/// The sample regimen from the CLI
+fn sample() -> Vec<Entity> {
+    table(&[
+        [
+            "Antepsin",
+            "med",
+            "3x daily",
+            r#"["≥6h apart", "≥1h before food", "≥2h after food"]"#,
+            "[]",
+        ],
+        ["Gabapentin", "med", "2x daily", r#"["≥8h apart"]"#, "[]"],
+        ["Pardale", "med", "2x daily", r#"["≥8h apart"]"#, "[]"],
+        ["Pro-Kolin", "med", "2x daily", "[]", "[]"],
+        [
+            "Chicken and rice",
+            "food",
+            "2x daily",
+            "[]",
+            r#"["08:00", "18:00-20:00"]"#,
+        ],
+    ])
+}
+
+/// Several meds linked before/after a many-instance food category
+fn after_food() -> Vec<Entity> {
+    table(&[
+        ["porridge", "food", "2x daily", r#"["≥4h apart"]"#, "[]"],
+        ["chicken", "food", "3x daily", r#"["≥3h apart"]"#, "[]"],
+        [
+            "creatine",
+            "supplement",
+            "1x daily",
+            r#"["≥1h after food"]"#,
+            "[]",
+        ],
+        [
+            "antepsin",
+            "med",
+            "3x daily",
+            r#"["≥5h apart", "≥1h before food", "≥2h after food"]"#,
+            "[]",
+        ],
+        [
+            "omeprazole",
+            "med",
+            "2x daily",
+            r#"["≥1h before food"]"#,
+            "[]",
+        ],
+    ])
+}
+
+/// Instances spread over several windows, plus meds linked to the meals
+fn windows() -> Vec<Entity> {
+    table(&[
+        [
+            "feed",
+            "food",
+            "6x daily",
+            r#"["≥2h apart"]"#,
+            r#"["08:00", "10:30", "13:00", "15:30", "18:00", "20:30"]"#,
+        ],
+        [
+            "gabapentin",
+            "med",
+            "2x daily",
+            r#"["≥8h apart", "≥1h after food"]"#,
+            r#"["09:00", "21:00"]"#,
+        ],
+        [
+            "probiotic",
+            "supplement",
+            "1x daily",
+            r#"["≥1h before food"]"#,
+            "[]",
+        ],
+    ])
+}
+
+fn bench_big_m(c: &mut Criterion) {
+    let mut group = c.benchmark_group("big_m");
+    let fixtures: [(&str, fn() -> Vec<Entity>); 3] = [
+        ("sample", sample),
+        ("after_food", after_food),
+        ("windows", windows),
+    ];
+    for (name, fixture) in fixtures {
+        let entities = fixture();
+        for (label, big_m) in [("fixed_1440", Some(1440.0)), ("tight", None)] {
+            let config = SchedulerConfig {
+                big_m,
+                ..SchedulerConfig::default()
+            };
+            group.bench_with_input(BenchmarkId::new(label, name), &entities, |b, entities| {
+                b.iter(|| solve_schedule(entities.clone(), config.clone(), false))
+            });
+        }
+    }
+    group.finish();
+}
+
+criterion_group!(benches, bench_big_m);
+criterion_main!(benches);
@@ -0,0 +1,131 @@
+//! Fixtures shared by the benchmarks
+
+// Each bench target compiles this module and uses only part of it
+#![allow(dead_code)]
+
+use scheduler_core::{parse_from_table, Entity};
+
+/// Build entities from (event, category, frequency, constraints, windows) rows
+pub fn table(rows: &[[&str; 5]]) -> Vec<Entity> {
+    let header = [
+        "Event",
+        "Category",
+        "Unit",
+        "Amount",
+        "Divisor",
+        "Frequency",
+        "Constraints",
+        "Windows",
+        "Note",
+    ];
+    let mut table = vec![header.iter().map(|s| s.to_string()).collect()];
+    for &[event, category, frequency, constraints, windows] in rows {
+        let row = [
+            event,
+            category,
+            "",
+            "null",
+            "null",
+            frequency,
+            constraints,
+            windows,
+            "null",
+        ];
+        table.push(row.iter().map(|s| s.to_string()).collect());
+    }
+    parse_from_table(table).expect("fixture should parse")
+}
+
+/// Shape of a synthetic scheduling problem
+#[derive(Debug, Clone, Copy)]
+pub struct Problem {
+    /// Number of entities
+    pub entities: usize,
+    /// Instances per day of every entity
+    pub instances: usize,
+    /// Chance (0 to 1) that an entity is linked "after" each earlier category
+    pub density: f64,
+    /// Anchor windows per entity (spread over the day)
+    pub windows: usize,
+    /// Number of categories the entities are dealt into
+    pub categories: usize,
+}
+
+impl Problem {
+    /// Short label for benchmark ids, e.g. "e10_i3_d0.5_w2_c3"
+    pub fn label(&self) -> String {
+        format!(
+            "e{}_i{}_d{}_w{}_c{}",
+            self.entities, self.instances, self.density, self.windows, self.categories
+        )
+    }
+
+    /// The problem as a table of rows, as read from a DataFrame, generated from a
+    /// fixed seed so that every run benchmarks the same problem.
+    ///
+    /// Links only point from a category to earlier ones, so the problem is acyclic
+    /// (and feasible, for a reasonable number of categories).
+    pub fn table(&self) -> Vec<Vec<String>> {
+        let mut rng = XorShift(0x9e37_79b9_7f4a_7c15);
+        let gap_hours = (12 / self.instances.max(1)).max(1);
+        let windows: Vec<String> = (0..self.windows)
+            .map(|w| {
+                let minutes = 8 * 60 + (w * 14 * 60 / self.windows.max(1)) as i32;
+                format!(r#""{}""#, scheduler_core::format_minutes_to_hhmm(minutes))
+            })
+            .collect();
+        let windows = format!("[{}]", windows.join(", "));
+
+        let mut table = vec![vec![
+            "Event".to_string(),
+            "Category".to_string(),
+            "Unit".to_string(),
+            "Amount".to_string(),
+            "Divisor".to_string(),
+            "Frequency".to_string(),
+            "Constraints".to_string(),
+            "Windows".to_string(),
+            "Note".to_string(),
+        ]];
+        for e in 0..self.entities {
+            let category = e % self.categories.max(1);
+            let mut constraints = Vec::new();
+            if self.instances > 1 {
+                constraints.push(format!(r#""≥{}h apart""#, gap_hours));
+            }
+            for earlier in 0..category {
+                if rng.next_f64() < self.density {
+                    constraints.push(format!(r#""≥1h after c{}""#, earlier));
+                }
+            }
+            table.push(vec![
+                format!("e{}", e),
+                format!("c{}", category),
+                String::new(),
+                "null".to_string(),
+                "null".to_string(),
+                format!("{}x daily", self.instances),
+                format!("[{}]", constraints.join(", ")),
+                windows.clone(),
+                "null".to_string(),
+            ]);
+        }
+        table
+    }
+
+    pub fn entities(&self) -> Vec<Entity> {
+        parse_from_table(self.table()).expect("generated problem should parse")
+    }
+}
+
+/// Minimal deterministic xorshift generator, so the benchmarks need no RNG crate
+struct XorShift(u64);
+
+impl XorShift {
+    fn next_f64(&mut self) -> f64 {
+        self.0 ^= self.0 << 13;
+        self.0 ^= self.0 >> 7;
+        self.0 ^= self.0 << 17;
+        (self.0 >> 11) as f64 / (1u64 << 53) as f64
+    }
+}
@@ -0,0 +1,148 @@
+//! Parse, model build and solve times on synthetic problems, for both strategies.
+//!
+//! Save a baseline with `cargo bench -p scheduler-core --bench scheduler -- --save-baseline main`
+//! and compare a change against it with `-- --baseline main`.
+
+mod common;
+
+use common::Problem;
+use criterion::{criterion_group, criterion_main, BatchSize, BenchmarkId, Criterion};
+use scheduler_core::{
+    build_model, parse_from_table, solve_schedule, ScheduleStrategy, SchedulerConfig,
+};
+
+const PROBLEMS: [Problem; 4] = [
+    Problem {
+        entities: 5,
+        instances: 2,
+        density: 0.5,
+        windows: 0,
+        categories: 2,
+    },
+    Problem {
+        entities: 10,
+        instances: 3,
+        density: 0.5,
+        windows: 3,
+        categories: 3,
+    },
+    Problem {
+        entities: 20,
+        instances: 2,
+        density: 0.3,
+        windows: 2,
+        categories: 4,
+    },
+    Problem {
+        entities: 20,
+        instances: 4,
+        density: 0.2,
+        windows: 4,
+        categories: 2,
+    },
+];
+
+const STRATEGIES: [(&str, ScheduleStrategy); 2] = [
+    ("earliest", ScheduleStrategy::Earliest),
+    ("latest", ScheduleStrategy::Latest),
+];
+
+fn config(strategy: ScheduleStrategy) -> SchedulerConfig {
+    SchedulerConfig {
+        strategy,
+        ..SchedulerConfig::default()
+    }
+}
+
+/// Table parsing keeps no memo across calls, so every iteration parses each row's
+/// strings from scratch rather than measuring cache hits
+fn bench_parse(c: &mut Criterion) {
+    let mut group = c.benchmark_group("parse");
+    for problem in PROBLEMS {
+        let table = problem.table();
+        group.bench_with_input(
+            BenchmarkId::from_parameter(problem.label()),
+            &table,
+            |b, table| b.iter_batched(|| table.clone(), parse_from_table, BatchSize::SmallInput),
+        );
+    }
+    group.finish();
+}
+
+fn bench_build(c: &mut Criterion) {
+    let mut group = c.benchmark_group("build");
+    for problem in PROBLEMS {
+        let entities = problem.entities();
+        for (name, strategy) in STRATEGIES {
+            let config = config(strategy);
+            group.bench_with_input(
+                BenchmarkId::new(name, problem.label()),
+                &entities,
+                |b, entities| {
+                    b.iter_batched(
+                        || entities.clone(),
+                        |entities| build_model(entities, &config, false),
+                        BatchSize::SmallInput,
+                    )
+                },
+            );
+        }
+    }
+    group.finish();
+}
+
+fn bench_solve(c: &mut Criterion) {
+    let mut group = c.benchmark_group("solve");
+    group.sample_size(10);
+    for problem in PROBLEMS {
+        let entities = problem.entities();
+        for (name, strategy) in STRATEGIES {
+            let config = config(strategy);
+            group.bench_with_input(
+                BenchmarkId::new(name, problem.label()),
+                &entities,
+                |b, entities| {
+                    b.iter_batched(
+                        || build_model(entities.clone(), &config, false),
+                        |model| model.solve(&config, false),
+                        BatchSize::SmallInput,
+                    )
+                },
+            );
+        }
+    }
+    group.finish();
+}
+
+/// End to end, as the plugin calls it: propagation fast path, components and all
+fn bench_schedule(c: &mut Criterion) {
+    let mut group = c.benchmark_group("solve_schedule");
+    group.sample_size(10);
+    for problem in PROBLEMS {
+        let entities = problem.entities();
+        for (name, strategy) in STRATEGIES {
+            let config = config(strategy);
+            group.bench_with_input(
+                BenchmarkId::new(name, problem.label()),
+                &entities,
+                |b, entities| {
+                    b.iter_batched(
+                        || entities.clone(),
+                        |entities| solve_schedule(entities, config.clone(), false),
+                        BatchSize::SmallInput,
+                    )
+                },
+            );
+        }
+    }
+    group.finish();
+}
+
+criterion_group!(
+    benches,
+    bench_parse,
+    bench_build,
+    bench_solve,
+    bench_schedule
+);
+criterion_main!(benches);
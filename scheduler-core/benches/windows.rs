@@ -0,0 +1,74 @@
+//! Compare the big-M and ordered window formulations, on the meal-window scenarios of
+//! the Python window tests scaled up to many windows.
+
+mod common;
+
+use common::table;
+use criterion::{criterion_group, criterion_main, BenchmarkId, Criterion};
+use scheduler_core::{
+    format_minutes_to_hhmm, solve_schedule, Entity, SchedulerConfig, WindowFormulation,
+};
+
+/// `k` half-hour meal windows, 70 minutes apart from 08:00
+fn meal_windows(k: usize) -> String {
+    let ranges: Vec<String> = (0..k as i32)
+        .map(|w| {
+            let start = 8 * 60 + w * 70;
+            format!(
+                r#""{}-{}""#,
+                format_minutes_to_hhmm(start),
+                format_minutes_to_hhmm(start + 30)
+            )
+        })
+        .collect();
+    format!("[{}]", ranges.join(", "))
+}
+
+/// `n` meals over `k` windows, with a med taken after food
+fn meals(n: usize, k: usize) -> Vec<Entity> {
+    let frequency = format!("{}x daily", n);
+    let windows = meal_windows(k);
+    table(&[
+        [
+            "meal",
+            "food",
+            frequency.as_str(),
+            r#"["≥1h apart"]"#,
+            windows.as_str(),
+        ],
+        [
+            "antepsin",
+            "med",
+            "2x daily",
+            r#"["≥6h apart", "≥1h after food"]"#,
+            "[]",
+        ],
+    ])
+}
+
+fn bench_windows(c: &mut Criterion) {
+    let mut group = c.benchmark_group("windows");
+    group.sample_size(10);
+    for (n, k) in [(2, 4), (4, 8), (6, 12), (10, 12)] {
+        let entities = meals(n, k);
+        let scenario = format!("{}_meals_{}_windows", n, k);
+        for (label, window_formulation) in [
+            ("big_m", WindowFormulation::BigM),
+            ("ordered", WindowFormulation::Ordered),
+        ] {
+            let config = SchedulerConfig {
+                window_formulation,
+                ..SchedulerConfig::default()
+            };
+            group.bench_with_input(
+                BenchmarkId::new(label, &scenario),
+                &entities,
+                |b, entities| b.iter(|| solve_schedule(entities.clone(), config.clone(), false)),
+            );
+        }
+    }
+    group.finish();
+}
+
+criterion_group!(benches, bench_windows);
+criterion_main!(benches);
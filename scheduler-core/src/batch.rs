@@ -0,0 +1,71 @@
+use rayon::prelude::*;
+use rayon::ThreadPoolBuilder;
+
+use crate::cache::ResultCache;
+use crate::domain::{Entity, ScheduleResult, SchedulerConfig};
+use crate::solver::solve_schedule;
+
+/// Solve many independent schedules in parallel on a Rayon thread pool.
+///
+/// Each `(entities, config)` pair is solved exactly as `solve_schedule` would,
+/// and the results are returned in the same order as the input problems, so a
+/// failure in one problem does not affect the others.
+///
+/// `num_threads` sets the size of the pool; 0 uses Rayon's global pool
+/// (one thread per logical core by default).
+pub fn solve_schedules_batch(
+    problems: Vec<(Vec<Entity>, SchedulerConfig)>,
+    num_threads: usize,
+    debug_enabled: bool,
+) -> Vec<Result<ScheduleResult, String>> {
+    solve_batch_with(problems, num_threads, debug_enabled, solve_schedule)
+}
+
+/// Solve many independent schedules in parallel, as `solve_schedules_batch` does,
+/// reusing the cached result of any problem solved before.
+pub fn solve_schedules_batch_cached(
+    problems: Vec<(Vec<Entity>, SchedulerConfig)>,
+    cache: &ResultCache,
+    num_threads: usize,
+    debug_enabled: bool,
+) -> Vec<Result<ScheduleResult, String>> {
+    solve_batch_with(
+        problems,
+        num_threads,
+        debug_enabled,
+        |entities, config, debug| cache.solve(entities, config, debug),
+    )
+}
+
+fn solve_batch_with<F>(
+    problems: Vec<(Vec<Entity>, SchedulerConfig)>,
+    num_threads: usize,
+    debug_enabled: bool,
+    solve: F,
+) -> Vec<Result<ScheduleResult, String>>
+where
+    F: Fn(Vec<Entity>, SchedulerConfig, bool) -> Result<ScheduleResult, String> + Sync + Send,
+{
+    let solve_all = move || -> Vec<Result<ScheduleResult, String>> {
+        problems
+            .into_par_iter()
+            .map(|(entities, config)| solve(entities, config, debug_enabled))
+            .collect()
+    };
+
+    if num_threads == 0 {
+        return solve_all();
+    }
+
+    match ThreadPoolBuilder::new().num_threads(num_threads).build() {
+        Ok(pool) => pool.install(solve_all),
+        Err(e) => {
+            if debug_enabled {
+                eprintln!(
+                    "Could not build a {num_threads}-thread pool ({e}), using the global pool"
+                );
+            }
+            solve_all()
+        }
+    }
+}
@@ -0,0 +1,397 @@
+use std::collections::HashMap;
+use std::fs;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, AtomicUsize, Ordering};
+use std::sync::{Arc, Mutex};
+use std::time::SystemTime;
+
+use serde::{Deserialize, Serialize};
+
+use crate::domain::{Entity, ScheduleResult, ScheduleStatus, SchedulerConfig};
+use crate::solver::solve_schedule;
+
+/// The normalized definition of a scheduling problem, and its stable fingerprint.
+///
+/// The entities are put in a canonical order (the order of rows does not change
+/// which schedules are optimal), so that the same regimen listed differently
+/// shares a cache entry.
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub struct ProblemKey {
+    pub fingerprint: u64,
+    canonical: String,
+}
+
+impl ProblemKey {
+    pub fn new(entities: &[Entity], config: &SchedulerConfig) -> Result<Self, String> {
+        let mut rows = entities
+            .iter()
+            .map(to_json)
+            .collect::<Result<Vec<_>, String>>()?;
+        rows.sort_unstable();
+        let canonical = format!("{}\n{}", to_json(config)?, rows.join("\n"));
+        Ok(Self {
+            fingerprint: fnv1a(canonical.as_bytes()),
+            canonical,
+        })
+    }
+}
+
+/// Results kept on disk by default, when the cache has a directory
+pub const DEFAULT_DISK_CAPACITY: usize = 65_536;
+
+/// The result files in a cache directory
+fn stored_files(dir: &Path) -> Vec<PathBuf> {
+    fs::read_dir(dir)
+        .map(|entries| {
+            entries
+                .filter_map(|entry| Some(entry.ok()?.path()))
+                .filter(|path| path.extension().is_some_and(|ext| ext == "json"))
+                .collect()
+        })
+        .unwrap_or_default()
+}
+
+fn to_json<T: Serialize>(value: &T) -> Result<String, String> {
+    serde_json::to_string(value).map_err(|e| format!("Cannot fingerprint problem: {}", e))
+}
+
+/// 64-bit FNV-1a, a hash that is stable across builds and platforms (unlike the
+/// std hasher), so fingerprints can name entries on disk
+fn fnv1a(bytes: &[u8]) -> u64 {
+    bytes.iter().fold(0xcbf2_9ce4_8422_2325, |h, &b| {
+        (h ^ b as u64).wrapping_mul(0x0100_0000_01b3)
+    })
+}
+
+/// Hit and miss counts of a `ResultCache`
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Serialize, Deserialize)]
+pub struct CacheStats {
+    pub hits: u64,
+    pub misses: u64,
+    /// Results held in memory
+    pub entries: usize,
+}
+
+/// An entry as written to disk, with its key to detect fingerprint collisions
+#[derive(Serialize, Deserialize)]
+struct StoredResult {
+    key: String,
+    result: ScheduleResult,
+}
+
+/// Slab index marking the end of the recency list
+const NIL: usize = usize::MAX;
+
+struct Entry {
+    fingerprint: u64,
+    key: String,
+    result: Arc<ScheduleResult>,
+    /// Neighbours in the recency list (towards the most and least recently used)
+    newer: usize,
+    older: usize,
+}
+
+/// Least recently used map of results: a hash map into a slab of entries, linked
+/// from the most to the least recently used, so that a lookup, an insert and an
+/// eviction each take constant time
+struct Lru {
+    index: HashMap<u64, usize>,
+    slab: Vec<Entry>,
+    newest: usize,
+    oldest: usize,
+}
+
+impl Default for Lru {
+    fn default() -> Self {
+        Self {
+            index: HashMap::new(),
+            slab: Vec::new(),
+            newest: NIL,
+            oldest: NIL,
+        }
+    }
+}
+
+impl Lru {
+    fn len(&self) -> usize {
+        self.index.len()
+    }
+
+    fn clear(&mut self) {
+        *self = Self::default();
+    }
+
+    fn unlink(&mut self, i: usize) {
+        let (newer, older) = (self.slab[i].newer, self.slab[i].older);
+        match newer {
+            NIL => self.newest = older,
+            n => self.slab[n].older = older,
+        }
+        match older {
+            NIL => self.oldest = newer,
+            o => self.slab[o].newer = newer,
+        }
+    }
+
+    fn push_newest(&mut self, i: usize) {
+        self.slab[i].newer = NIL;
+        self.slab[i].older = self.newest;
+        match self.newest {
+            NIL => self.oldest = i,
+            n => self.slab[n].newer = i,
+        }
+        self.newest = i;
+    }
+
+    /// The result stored under this key, marked as the most recently used
+    fn get(&mut self, fingerprint: u64, key: &str) -> Option<Arc<ScheduleResult>> {
+        let i = *self.index.get(&fingerprint)?;
+        if self.slab[i].key != key {
+            return None;
+        }
+        self.unlink(i);
+        self.push_newest(i);
+        Some(self.slab[i].result.clone())
+    }
+
+    /// Store a result, evicting the least recently used one when at capacity
+    fn insert(
+        &mut self,
+        fingerprint: u64,
+        key: &str,
+        result: Arc<ScheduleResult>,
+        capacity: usize,
+    ) {
+        let existing = self.index.get(&fingerprint).copied();
+        let i = match existing {
+            Some(i) => {
+                self.unlink(i);
+                i
+            }
+            None if self.len() >= capacity => {
+                // Reuse the slot of the least recently used entry
+                let i = self.oldest;
+                self.unlink(i);
+                self.index.remove(&self.slab[i].fingerprint);
+                self.index.insert(fingerprint, i);
+                i
+            }
+            None => {
+                self.slab.push(Entry {
+                    fingerprint,
+                    key: String::new(),
+                    result: result.clone(),
+                    newer: NIL,
+                    older: NIL,
+                });
+                self.index.insert(fingerprint, self.slab.len() - 1);
+                self.slab.len() - 1
+            }
+        };
+        let entry = &mut self.slab[i];
+        entry.fingerprint = fingerprint;
+        entry.key = key.to_string();
+        entry.result = result;
+        self.push_newest(i);
+    }
+}
+
+/// Bounded LRU cache of schedule results, keyed on the normalized problem.
+///
+/// Results that stopped at a time limit are not cached, since another solve may
+/// do better. With a directory set, every result is also written there as JSON,
+/// and results missing from memory are looked up on disk before solving. The
+/// directory holds at most `disk_capacity` results: past that, the least recently
+/// written files are removed. A result served from the cache has `stats.cached` set.
+pub struct ResultCache {
+    capacity: usize,
+    dir: Option<PathBuf>,
+    disk_capacity: usize,
+    /// Files in the directory, as last counted (plus those written since)
+    disk_entries: AtomicUsize,
+    lru: Mutex<Lru>,
+    hits: AtomicU64,
+    misses: AtomicU64,
+}
+
+impl ResultCache {
+    /// A cache holding up to `capacity` results in memory
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            capacity,
+            dir: None,
+            disk_capacity: DEFAULT_DISK_CAPACITY,
+            disk_entries: AtomicUsize::new(0),
+            lru: Mutex::new(Lru::default()),
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+        }
+    }
+
+    /// Also store results in this directory (created if missing)
+    pub fn with_dir(mut self, dir: impl Into<PathBuf>) -> Result<Self, String> {
+        let dir = dir.into();
+        fs::create_dir_all(&dir)
+            .map_err(|e| format!("Cannot create cache directory {}: {}", dir.display(), e))?;
+        self.disk_entries = AtomicUsize::new(stored_files(&dir).len());
+        self.dir = Some(dir);
+        Ok(self)
+    }
+
+    /// Keep at most this many results in the directory
+    pub fn with_disk_capacity(mut self, disk_capacity: usize) -> Self {
+        self.disk_capacity = disk_capacity;
+        self
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.capacity
+    }
+
+    pub fn disk_capacity(&self) -> usize {
+        self.disk_capacity
+    }
+
+    pub fn stats(&self) -> CacheStats {
+        CacheStats {
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            entries: self.lru.lock().map(|l| l.len()).unwrap_or(0),
+        }
+    }
+
+    /// Drop every result held in memory and reset the counters (the disk store is kept)
+    pub fn clear(&self) {
+        if let Ok(mut lru) = self.lru.lock() {
+            lru.clear();
+        }
+        self.hits.store(0, Ordering::Relaxed);
+        self.misses.store(0, Ordering::Relaxed);
+    }
+
+    /// Look up the result of a problem, in memory and then on disk
+    pub fn get(&self, key: &ProblemKey) -> Option<ScheduleResult> {
+        let found = self.get_in_memory(key).or_else(|| {
+            let result = Arc::new(self.load(key)?);
+            self.insert_in_memory(key, result.clone());
+            Some(result)
+        });
+        let counter = if found.is_some() {
+            &self.hits
+        } else {
+            &self.misses
+        };
+        counter.fetch_add(1, Ordering::Relaxed);
+        found.map(|result| {
+            let mut result = ScheduleResult::clone(&result);
+            result.stats.cached = true;
+            result
+        })
+    }
+
+    /// Store the result of a problem (unless it timed out)
+    pub fn insert(&self, key: &ProblemKey, result: &ScheduleResult) {
+        if result.status == ScheduleStatus::TimedOut {
+            return;
+        }
+        self.insert_in_memory(key, Arc::new(result.clone()));
+        self.store(key, result);
+    }
+
+    /// Solve a problem as `solve_schedule` would, unless its result is cached.
+    /// Debug solves bypass the cache, so that their constraint trace is recorded.
+    pub fn solve(
+        &self,
+        entities: Vec<Entity>,
+        config: SchedulerConfig,
+        debug_enabled: bool,
+    ) -> Result<ScheduleResult, String> {
+        if debug_enabled {
+            return solve_schedule(entities, config, debug_enabled);
+        }
+        let key = ProblemKey::new(&entities, &config)?;
+        if let Some(result) = self.get(&key) {
+            return Ok(result);
+        }
+        let result = solve_schedule(entities, config, debug_enabled)?;
+        self.insert(&key, &result);
+        Ok(result)
+    }
+
+    /// The result in memory, shared so that it is copied outside the lock
+    fn get_in_memory(&self, key: &ProblemKey) -> Option<Arc<ScheduleResult>> {
+        let mut lru = self.lru.lock().ok()?;
+        lru.get(key.fingerprint, &key.canonical)
+    }
+
+    fn insert_in_memory(&self, key: &ProblemKey, result: Arc<ScheduleResult>) {
+        if self.capacity == 0 {
+            return;
+        }
+        if let Ok(mut lru) = self.lru.lock() {
+            lru.insert(key.fingerprint, &key.canonical, result, self.capacity);
+        }
+    }
+
+    fn path(&self, key: &ProblemKey) -> Option<PathBuf> {
+        let dir = self.dir.as_ref()?;
+        Some(dir.join(format!("{:016x}.json", key.fingerprint)))
+    }
+
+    /// Read a result from disk (a missing, unreadable or colliding file is a miss)
+    fn load(&self, key: &ProblemKey) -> Option<ScheduleResult> {
+        let text = fs::read_to_string(self.path(key)?).ok()?;
+        let stored: StoredResult = serde_json::from_str(&text).ok()?;
+        (stored.key == key.canonical).then_some(stored.result)
+    }
+
+    /// Write a result to disk, best-effort: the cache never fails a solve
+    fn store(&self, key: &ProblemKey, result: &ScheduleResult) {
+        let Some(path) = self.path(key) else {
+            return;
+        };
+        let stored = StoredResult {
+            key: key.canonical.clone(),
+            result: result.clone(),
+        };
+        let existed = path.exists();
+        if let Ok(text) = serde_json::to_string(&stored) {
+            // Write then rename, so a concurrent reader never sees a partial file
+            let tmp = path.with_extension(format!("{}.tmp", std::process::id()));
+            if fs::write(&tmp, text).is_ok() && fs::rename(&tmp, &path).is_err() {
+                let _ = fs::remove_file(&tmp);
+            }
+        }
+        if !existed && self.disk_entries.fetch_add(1, Ordering::Relaxed) >= self.disk_capacity {
+            self.evict_from_disk();
+        }
+    }
+
+    /// Remove the least recently written files, down to 90% of the disk capacity (so
+    /// that the directory is not listed again on every following write)
+    fn evict_from_disk(&self) {
+        let Some(dir) = &self.dir else {
+            return;
+        };
+        let mut files: Vec<(SystemTime, PathBuf)> = stored_files(dir)
+            .into_iter()
+            .map(|path| {
+                let modified = fs::metadata(&path)
+                    .and_then(|m| m.modified())
+                    .unwrap_or(SystemTime::UNIX_EPOCH);
+                (modified, path)
+            })
+            .collect();
+        let keep = self.disk_capacity - self.disk_capacity / 10;
+        let excess = files.len().saturating_sub(keep);
+        if excess > 0 {
+            files.select_nth_unstable_by_key(excess - 1, |(modified, _)| *modified);
+        }
+        let removed = files[..excess]
+            .iter()
+            .filter(|(_, path)| fs::remove_file(path).is_ok())
+            .count();
+        self.disk_entries
+            .store(files.len() - removed, Ordering::Relaxed);
+    }
+}
@@ -0,0 +1,196 @@
+use std::collections::HashMap;
+
+use crate::domain::{ConstraintRef, Entity, Interner};
+
+/// Minimal union-find over entity indices
+struct DisjointSet {
+    parent: Vec<usize>,
+}
+
+impl DisjointSet {
+    fn new(n: usize) -> Self {
+        Self {
+            parent: (0..n).collect(),
+        }
+    }
+
+    fn find(&mut self, mut i: usize) -> usize {
+        while self.parent[i] != i {
+            // Path halving
+            self.parent[i] = self.parent[self.parent[i]];
+            i = self.parent[i];
+        }
+        i
+    }
+
+    fn union(&mut self, a: usize, b: usize) {
+        let (ra, rb) = (self.find(a), self.find(b));
+        if ra != rb {
+            self.parent[rb] = ra;
+        }
+    }
+}
+
+/// Resolves constraint references to entity indices, with the same rules as the solver:
+/// a reference names an entity (case-insensitively), or failing that, a category.
+pub struct RefIndex {
+    names: Interner,
+    categories: Interner,
+    by_name: Vec<Vec<usize>>,
+    by_category: Vec<Vec<usize>>,
+}
+
+impl RefIndex {
+    pub fn new(entities: &[Entity]) -> Self {
+        let mut names = Interner::new();
+        let mut categories = Interner::new();
+        let mut by_name: Vec<Vec<usize>> = Vec::new();
+        let mut by_category: Vec<Vec<usize>> = Vec::new();
+        for (i, e) in entities.iter().enumerate() {
+            let name_id = names.intern(&e.name.to_ascii_lowercase()) as usize;
+            if name_id == by_name.len() {
+                by_name.push(Vec::new());
+            }
+            by_name[name_id].push(i);
+
+            let category_id = categories.intern(&e.category) as usize;
+            if category_id == by_category.len() {
+                by_category.push(Vec::new());
+            }
+            by_category[category_id].push(i);
+        }
+        Self {
+            names,
+            categories,
+            by_name,
+            by_category,
+        }
+    }
+
+    /// Indices of the entities a reference string points at
+    pub fn resolve(&self, rstr: &str) -> &[usize] {
+        if let Some(id) = self.names.get(&rstr.to_ascii_lowercase()) {
+            return &self.by_name[id as usize];
+        }
+        match self.categories.get(rstr) {
+            Some(id) => &self.by_category[id as usize],
+            None => &[],
+        }
+    }
+
+    /// Indices of all entities sharing a (case-insensitive) name
+    fn same_name_groups(&self) -> impl Iterator<Item = &Vec<usize>> {
+        self.by_name.iter()
+    }
+}
+
+/// Split entities into groups that never interact through constraints.
+///
+/// Two entities are connected when one has a before/after/apart-from constraint
+/// referencing the other (directly or through its category), or when they share a
+/// name (the solver keys clocks by name). Each group is returned as a list of entity
+/// indices in their original order, and groups are ordered by their first entity.
+pub fn constraint_components(entities: &[Entity]) -> Vec<Vec<usize>> {
+    let refs = RefIndex::new(entities);
+    let mut dsu = DisjointSet::new(entities.len());
+
+    for group in refs.same_name_groups() {
+        for &j in &group[1..] {
+            dsu.union(group[0], j);
+        }
+    }
+
+    for (i, e) in entities.iter().enumerate() {
+        for cexpr in &e.constraints {
+            if let ConstraintRef::Unresolved(r) = &cexpr.cref {
+                for &j in refs.resolve(r) {
+                    dsu.union(i, j);
+                }
+            }
+        }
+    }
+
+    let mut component_of_root: HashMap<usize, usize> = HashMap::new();
+    let mut components: Vec<Vec<usize>> = Vec::new();
+    for i in 0..entities.len() {
+        let root = dsu.find(i);
+        let c = *component_of_root.entry(root).or_insert_with(|| {
+            components.push(Vec::new());
+            components.len() - 1
+        });
+        components[c].push(i);
+    }
+
+    components
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::domain::{ConstraintExpr, ConstraintType, Frequency};
+
+    fn entity(name: &str, category: &str, refs: &[&str]) -> Entity {
+        Entity {
+            name: name.into(),
+            category: category.into(),
+            frequency: Frequency::TimesPerDay(1),
+            constraints: refs
+                .iter()
+                .map(|&r| ConstraintExpr {
+                    time_hours: 1,
+                    ctype: ConstraintType::After,
+                    cref: ConstraintRef::Unresolved(r.into()),
+                })
+                .collect(),
+            windows: Vec::new(),
+            wrap_minutes: None,
+        }
+    }
+
+    #[test]
+    fn names_match_case_insensitively_before_categories() {
+        let entities = [entity("Food", "meal", &[]), entity("snack", "food", &[])];
+        let refs = RefIndex::new(&entities);
+        assert_eq!(refs.resolve("food"), &[0]);
+        assert_eq!(refs.resolve("FOOD"), &[0]);
+        assert_eq!(refs.resolve("Snack"), &[1]);
+    }
+
+    #[test]
+    fn categories_match_every_member() {
+        let entities = [
+            entity("lunch", "meal", &[]),
+            entity("pill", "med", &[]),
+            entity("dinner", "meal", &[]),
+        ];
+        let refs = RefIndex::new(&entities);
+        assert_eq!(refs.resolve("meal"), &[0, 2]);
+        assert_eq!(refs.resolve("med"), &[1]);
+        assert!(refs.resolve("snack").is_empty());
+    }
+
+    #[test]
+    fn references_and_shared_names_connect_entities() {
+        let entities = [
+            entity("pill", "med", &["meal"]),
+            entity("lunch", "meal", &[]),
+            entity("drops", "med", &[]),
+            entity("dinner", "meal", &[]),
+            entity("vitamin", "supplement", &[]),
+            entity("Vitamin", "supplement", &[]),
+        ];
+        assert_eq!(
+            constraint_components(&entities),
+            vec![vec![0, 1, 3], vec![2], vec![4, 5]]
+        );
+    }
+
+    #[test]
+    fn unresolved_references_connect_nothing() {
+        let entities = [
+            entity("pill", "med", &["ghost"]),
+            entity("lunch", "meal", &[]),
+        ];
+        assert_eq!(constraint_components(&entities), vec![vec![0], vec![1]]);
+    }
+}
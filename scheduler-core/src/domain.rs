@@ -1,8 +1,14 @@
 use good_lp::variable::Variable;
 use regex::Regex;
 use serde::{Deserialize, Serialize};
+use std::collections::HashMap;
+use std::fmt;
+use std::str::FromStr;
+use std::sync::{Arc, OnceLock};
 
-#[derive(Debug, Clone, Serialize, Deserialize)]
+use crate::trace::ConstraintTrace;
+
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub enum ConstraintType {
     Before,
     After,
@@ -10,46 +16,109 @@ pub enum ConstraintType {
     ApartFrom,
 }
 
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub enum ConstraintRef {
     WithinGroup,
-    Unresolved(String),
+    Unresolved(Arc<str>),
 }
 
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub struct ConstraintExpr {
     pub time_hours: u32,
     pub ctype: ConstraintType,
     pub cref: ConstraintRef,
 }
 
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub enum Frequency {
     /// “N× daily” (e.g. "9x daily" => TimesPerDay(9)).
     TimesPerDay(u32),
+    /// “every Nh” (e.g. "every 8h" => EveryHours(8)): as many instances as fit in
+    /// the day, at least N hours apart (including across midnight).
+    EveryHours(u32),
+    /// “every N days” (e.g. "every other day" => EveryDays(2)): once a day, on
+    /// days 0, N, 2N, ... of the horizon.
+    EveryDays(u32),
+    /// “N× weekly” (e.g. "3x weekly" => TimesPerWeek(3)): spread evenly over the
+    /// days of each week of the horizon.
+    TimesPerWeek(u32),
 }
 
 impl Frequency {
-    /// Parse strings like "3x daily" into an enum.
+    /// Parse strings like "3x daily", "every 8h", "every other day", "every 3 days"
+    /// or "2x weekly" into an enum.
     /// Anything else returns an error.
     pub fn from_frequency_str(s: &str) -> Result<Self, String> {
+        static RX_FREQUENCY: OnceLock<Regex> = OnceLock::new();
         let input = s.trim().to_lowercase();
-        let rx_times_daily = Regex::new(r"^(\d+)\s*x\s*daily$").unwrap();
-        // "(\d+)x daily" => TimesPerDay(N)
-        if let Some(caps) = rx_times_daily.captures(&input) {
-            let n: u32 = caps[1]
+        let rx_frequency = RX_FREQUENCY.get_or_init(|| {
+            Regex::new(
+                r"^(?:(?P<daily>\d+)\s*x\s*daily|(?P<weekly>\d+)\s*x\s*weekly|every\s*(?P<hours>\d+)\s*h(?:ours?)?|every\s+(?P<days>\d+)\s+days|every\s+(?P<other>other)\s+day)$",
+            )
+            .unwrap()
+        });
+        let Some(caps) = rx_frequency.captures(&input) else {
+            return Err(format!("Unrecognized frequency string: '{}'", s));
+        };
+        let number = |name: &str| -> Result<u32, String> {
+            caps[name]
                 .parse()
-                .map_err(|_| format!("Invalid integer in '{}'", s))?;
-            return Ok(Frequency::TimesPerDay(n));
+                .map_err(|_| format!("Invalid integer in '{}'", s))
+        };
+        let positive = |n: u32| -> Result<u32, String> {
+            match n {
+                0 => Err(format!("Frequency interval must be positive in '{}'", s)),
+                n => Ok(n),
+            }
+        };
+        if caps.name("daily").is_some() {
+            Ok(Frequency::TimesPerDay(number("daily")?))
+        } else if caps.name("weekly").is_some() {
+            Ok(Frequency::TimesPerWeek(number("weekly")?))
+        } else if caps.name("hours").is_some() {
+            Ok(Frequency::EveryHours(positive(number("hours")?)?))
+        } else if caps.name("days").is_some() {
+            Ok(Frequency::EveryDays(positive(number("days")?)?))
+        } else {
+            Ok(Frequency::EveryDays(2))
         }
-        // If none matched, return an error
-        Err(format!("Unrecognized frequency string: '{}'", s))
     }
 
-    /// Returns the integer value stored in `TimesPerDay(n)`.
+    /// Number of instances on a day of the horizon (0-based), when the day is
+    /// `day_minutes` long.
+    pub fn instances_on_day(&self, day: u32, day_minutes: i32) -> usize {
+        match *self {
+            Frequency::TimesPerDay(n) => n as usize,
+            Frequency::EveryHours(h) => (day_minutes.max(0) / (h as i32 * 60)) as usize + 1,
+            Frequency::EveryDays(k) => usize::from(day % k == 0),
+            Frequency::TimesPerWeek(n) => (0..n).filter(|i| i * 7 / n == day % 7).count(),
+        }
+    }
+
+    /// Most instances on any one day (for a 24 hour day, for "every Nh").
     pub fn instances_per_day(&self) -> usize {
+        match *self {
+            Frequency::TimesPerDay(n) => n as usize,
+            Frequency::EveryHours(h) => (24 / h as usize).max(1),
+            Frequency::EveryDays(_) => 1,
+            Frequency::TimesPerWeek(n) => (n as usize).div_ceil(7),
+        }
+    }
+
+    /// Whether every day has the same instances
+    pub fn is_daily(&self) -> bool {
+        matches!(self, Frequency::TimesPerDay(_) | Frequency::EveryHours(_))
+    }
+}
+
+impl fmt::Display for Frequency {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
         match self {
-            Frequency::TimesPerDay(n) => *n as usize,
+            Frequency::TimesPerDay(n) => write!(f, "{}x daily", n),
+            Frequency::EveryHours(h) => write!(f, "every {}h", h),
+            Frequency::EveryDays(2) => write!(f, "every other day"),
+            Frequency::EveryDays(k) => write!(f, "every {} days", k),
+            Frequency::TimesPerWeek(n) => write!(f, "{}x weekly", n),
         }
     }
 }
@@ -57,7 +126,7 @@ impl Frequency {
 /// Represents a desired scheduling "window," which can be:
 ///   - A single anchor time (in minutes from midnight), e.g. 480 for 08:00
 ///   - A start–end range in minutes (e.g. 720..780 for 12:00–13:00)
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub enum WindowSpec {
     Anchor(i32),
     Range(i32, i32),
@@ -67,27 +136,88 @@ pub enum WindowSpec {
 /// - `constraints` are the typical "Apart", "Before", etc. constraints
 /// - `windows` is optional extra data: if nonempty, the solver may need
 ///   to place this entity in one of these windows, or near these anchors.
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub struct Entity {
-    pub name: String,
-    pub category: String,
+    pub name: Arc<str>,
+    pub category: Arc<str>,
     pub frequency: Frequency,
     pub constraints: Vec<ConstraintExpr>,
 
     /// A list of windows (anchors or ranges) associated with this entity.
     /// If empty, the entity has no special windows and may be placed by global logic.
     pub windows: Vec<WindowSpec>,
+
+    /// Length of the period after which the entity's instances repeat (1440 on a day
+    /// of a horizon followed by another day with this entity): its "apart" gap then
+    /// also holds from its last instance to its first instance of the next period,
+    /// and so do its "apart from" gaps to other repeating entities
+    #[serde(default)]
+    pub wrap_minutes: Option<i32>,
 }
 
-#[derive(Clone)]
+/// Dense integer id of an interned string (entity name or category)
+pub type SymbolId = u32;
+
+/// Interns strings to dense `SymbolId`s, so the solver can key its lookup
+/// tables by `Vec` index instead of hashing and cloning owned strings.
+#[derive(Debug, Clone, Default)]
+pub struct Interner {
+    ids: HashMap<Arc<str>, SymbolId>,
+    symbols: Vec<Arc<str>>,
+}
+
+impl Interner {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Returns the id of `s`, assigning the next free id the first time it is seen
+    pub fn intern(&mut self, s: &str) -> SymbolId {
+        if let Some(&id) = self.ids.get(s) {
+            return id;
+        }
+        let id = self.symbols.len() as SymbolId;
+        let symbol: Arc<str> = Arc::from(s);
+        self.ids.insert(symbol.clone(), id);
+        self.symbols.push(symbol);
+        id
+    }
+
+    /// Returns the shared string for `s`, allocating it only the first time it is seen
+    pub fn share(&mut self, s: &str) -> Arc<str> {
+        let id = self.intern(s);
+        self.symbols[id as usize].clone()
+    }
+
+    /// Returns the id of `s` if it has been interned
+    pub fn get(&self, s: &str) -> Option<SymbolId> {
+        self.ids.get(s).copied()
+    }
+
+    /// Returns the string for an id handed out by this interner
+    pub fn resolve(&self, id: SymbolId) -> &str {
+        &self.symbols[id as usize]
+    }
+
+    pub fn len(&self) -> usize {
+        self.symbols.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.symbols.is_empty()
+    }
+}
+
+/// The solver variable for one instance of an entity, keyed by interned entity name
+#[derive(Debug, Clone, Copy)]
 pub struct ClockVar {
-    pub entity_name: String,
+    pub entity: SymbolId,
     pub instance: usize,
     pub var: Variable,
 }
 
-pub fn c2str(c: &ClockVar) -> String {
-    format!("({}_var{})", c.entity_name, c.instance)
+pub fn c2str(c: &ClockVar, names: &Interner) -> String {
+    format!("({}_var{})", names.resolve(c.entity), c.instance)
 }
 
 // Results returned by the scheduler
@@ -96,6 +226,146 @@ pub struct ScheduledEvent {
     pub entity_name: String,
     pub instance: usize,
     pub time_minutes: i32,
+    /// Day of the horizon (0-based), the instance number restarting each day
+    #[serde(default)]
+    pub day: u32,
+}
+
+/// Which engine produced a schedule
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize, Deserialize)]
+pub enum SolverEngine {
+    /// Mixed integer linear program, solved with good_lp
+    Milp,
+    /// Difference-constraint propagation, without calling an LP solver
+    Propagation,
+}
+
+/// How the solve that produced a schedule ended, from best to worst
+#[derive(Debug, Clone, Copy, PartialEq, Eq, PartialOrd, Ord, Serialize, Deserialize)]
+pub enum ScheduleStatus {
+    /// Proven optimal
+    Optimal,
+    /// Feasible, and within the requested MIP gap of optimal
+    FeasibleWithinGap,
+    /// Best schedule of a search with a node limit, which may have stopped it short
+    /// of proving optimality. Unlike a time limit, the same every run.
+    NodeLimited,
+    /// Stopped at the time limit: the best schedule found so far, if any
+    TimedOut,
+    /// No schedule satisfies the constraints
+    Infeasible,
+}
+
+impl ScheduleStatus {
+    pub fn as_str(self) -> &'static str {
+        match self {
+            ScheduleStatus::Optimal => "optimal",
+            ScheduleStatus::FeasibleWithinGap => "feasible_within_gap",
+            ScheduleStatus::NodeLimited => "node_limited",
+            ScheduleStatus::TimedOut => "timed_out",
+            ScheduleStatus::Infeasible => "infeasible",
+        }
+    }
+}
+
+/// MILP solver backend. HiGHS and CBC are only available when scheduler-core is
+/// built with its `highs` or `coin_cbc` feature.
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Serialize, Deserialize)]
+pub enum SolverBackend {
+    /// Pure-Rust solver, always available
+    #[default]
+    Microlp,
+    Highs,
+    Cbc,
+}
+
+impl SolverBackend {
+    /// Whether this backend was compiled in
+    pub fn is_available(self) -> bool {
+        match self {
+            SolverBackend::Microlp => true,
+            SolverBackend::Highs => cfg!(feature = "highs"),
+            SolverBackend::Cbc => cfg!(feature = "coin_cbc"),
+        }
+    }
+
+    /// Whether this backend can stop at a MIP gap or node limit
+    pub fn has_mip_limits(self) -> bool {
+        !matches!(self, SolverBackend::Microlp)
+    }
+}
+
+impl FromStr for SolverBackend {
+    type Err = String;
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s.to_lowercase().as_str() {
+            "microlp" | "" => Ok(SolverBackend::Microlp),
+            "highs" => Ok(SolverBackend::Highs),
+            "cbc" | "coin_cbc" => Ok(SolverBackend::Cbc),
+            _ => Err(format!(
+                "Invalid solver backend: '{}'. Must be 'microlp', 'highs' or 'cbc'",
+                s
+            )),
+        }
+    }
+}
+
+/// How the MILP models which window each instance of an entity uses
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq, Serialize, Deserialize)]
+pub enum WindowFormulation {
+    /// A usage binary and a distance variable per instance and window, linked by
+    /// big-M indicator constraints
+    #[default]
+    BigM,
+    /// When the windows are far enough apart to be used in time order: a binary per
+    /// instance and reachable window, with the clock and penalty bounded by the
+    /// chosen window's edges directly (no big-M, no distance variables). Entities
+    /// whose windows are too close fall back to `BigM`.
+    Ordered,
+}
+
+impl FromStr for WindowFormulation {
+    type Err = String;
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s.to_lowercase().as_str() {
+            "big_m" | "bigm" | "" => Ok(WindowFormulation::BigM),
+            "ordered" => Ok(WindowFormulation::Ordered),
+            _ => Err(format!(
+                "Invalid window formulation: '{}'. Must be 'big_m' or 'ordered'",
+                s
+            )),
+        }
+    }
+}
+
+/// Size of the model, the time spent in each stage of solving it, and the outcome.
+///
+/// The sizes and times of a schedule solved in independent parts are summed over
+/// the parts that needed a MILP.
+#[derive(Debug, Clone, Default, Serialize, Deserialize)]
+#[serde(default)]
+pub struct SolveStats {
+    /// Backend that solved the MILP (None when no MILP was needed)
+    pub backend: Option<SolverBackend>,
+    pub variables: usize,
+    /// Binary variables, among `variables`
+    pub binaries: usize,
+    pub constraints: usize,
+    /// Time spent reading the entities, when the caller parsed them
+    pub parse_time_ms: f64,
+    pub build_time_ms: f64,
+    pub solve_time_ms: f64,
+    pub extract_time_ms: f64,
+    /// Objective value of the schedule found (None without a schedule)
+    pub objective: Option<f64>,
+    /// Branch-and-bound nodes explored, when the backend reports them (none of
+    /// the current backends does through good_lp)
+    pub nodes: Option<u64>,
+    /// Whether the schedule was served from the result cache, in which case the
+    /// other statistics are those of the solve that was cached
+    pub cached: bool,
 }
 
 #[derive(Debug, Clone, Serialize, Deserialize)]
@@ -103,16 +373,23 @@ pub struct ScheduleResult {
     pub scheduled_events: Vec<ScheduledEvent>,
     pub total_penalty: f64,
     pub window_usage: Vec<(String, String, Vec<usize>)>, // (entity, window, instances)
+    pub engine: SolverEngine,
+    pub status: ScheduleStatus,
+    /// Record of each model constraint, only populated when solving with debug enabled
+    #[serde(default)]
+    pub constraint_trace: Vec<ConstraintTrace>,
+    #[serde(default)]
+    pub stats: SolveStats,
 }
 
 // Configuration for the scheduling algorithm
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub enum ScheduleStrategy {
     Earliest,
     Latest,
 }
 
-#[derive(Debug, Clone, Serialize, Deserialize)]
+#[derive(Debug, Clone, PartialEq, Serialize, Deserialize)]
 pub struct SchedulerConfig {
     pub day_start_minutes: i32,
     pub day_end_minutes: i32,
@@ -120,6 +397,30 @@ pub struct SchedulerConfig {
     pub global_windows: Vec<WindowSpec>,
     pub penalty_weight: f64,
     pub window_tolerance: f64,
+    /// Use this big-M for every disjunction, instead of the smallest valid value
+    /// per constraint (derived from the clock bounds)
+    #[serde(default)]
+    pub big_m: Option<f64>,
+    #[serde(default)]
+    pub solver_backend: SolverBackend,
+    /// Stop the solver after this many milliseconds, keeping the best schedule found
+    #[serde(default)]
+    pub time_limit_ms: Option<u64>,
+    /// Stop the solver once the relative gap to the best bound is at most this
+    #[serde(default)]
+    pub mip_gap: Option<f64>,
+    /// Stop the solver after exploring this many branch-and-bound nodes
+    #[serde(default)]
+    pub node_limit: Option<u64>,
+    /// Number of days to schedule, each within `day_start_minutes..day_end_minutes`
+    #[serde(default = "default_horizon_days")]
+    pub horizon_days: u32,
+    #[serde(default)]
+    pub window_formulation: WindowFormulation,
+}
+
+fn default_horizon_days() -> u32 {
+    1
 }
 
 impl Default for SchedulerConfig {
@@ -131,6 +432,13 @@ impl Default for SchedulerConfig {
             global_windows: Vec::new(),
             penalty_weight: 0.3,
             window_tolerance: 0.0,
+            big_m: None,
+            solver_backend: SolverBackend::default(),
+            time_limit_ms: None,
+            mip_gap: None,
+            node_limit: None,
+            horizon_days: 1,
+            window_formulation: WindowFormulation::default(),
         }
     }
 }
@@ -0,0 +1,239 @@
+use rayon::prelude::*;
+use tracing::instrument;
+
+use crate::components::RefIndex;
+use crate::domain::{
+    ConstraintExpr, ConstraintRef, ConstraintType, Entity, Frequency, ScheduleResult,
+    ScheduleStatus, SchedulerConfig, SolveStats,
+};
+use crate::solver::{merge_results, solve_component, split_components};
+
+/// Minutes in a day, the period of a multi-day schedule
+const DAY_MINUTES: i32 = 24 * 60;
+
+/// Whether a problem needs the horizon expansion, rather than being solved as a
+/// single day of "N× daily" entities
+pub fn needed(entities: &[Entity], config: &SchedulerConfig) -> bool {
+    config.horizon_days > 1
+        || entities
+            .iter()
+            .any(|e| !matches!(e.frequency, Frequency::TimesPerDay(_)))
+}
+
+/// The entities due on one day of the horizon, each as "N× daily" with its count
+/// for that day ("every Nh" also gets its implicit "≥Nh apart" constraint). With
+/// `wrap`, an entity also due the next day repeats after a day, so that its gaps
+/// hold overnight when the next day is solved alike.
+fn day_view(entities: &[Entity], day: u32, day_minutes: i32, wrap: bool) -> Vec<Entity> {
+    entities
+        .iter()
+        .filter_map(|e| {
+            let n = e.frequency.instances_on_day(day, day_minutes);
+            if n == 0 {
+                return None;
+            }
+            let mut entity = e.clone();
+            entity.frequency = Frequency::TimesPerDay(n as u32);
+            if let Frequency::EveryHours(h) = e.frequency {
+                entity.constraints.push(ConstraintExpr {
+                    time_hours: h,
+                    ctype: ConstraintType::Apart,
+                    cref: ConstraintRef::WithinGroup,
+                });
+            }
+            if wrap && e.frequency.instances_on_day(day + 1, day_minutes) > 0 {
+                entity.wrap_minutes = Some(DAY_MINUTES);
+            }
+            Some(entity)
+        })
+        .collect()
+}
+
+/// Largest "apart" gap of an entity, in minutes
+fn apart_gap(e: &Entity) -> i32 {
+    e.constraints
+        .iter()
+        .filter(|c| matches!(c.ctype, ConstraintType::Apart))
+        .map(|c| c.time_hours as i32 * 60)
+        .max()
+        .unwrap_or(0)
+}
+
+/// Times of an entity's events in a day's schedule
+fn event_times<'a>(r: &'a ScheduleResult, name: &'a str) -> impl Iterator<Item = i32> + 'a {
+    r.scheduled_events
+        .iter()
+        .filter(move |ev| ev.entity_name == name)
+        .map(|ev| ev.time_minutes)
+}
+
+/// Find a gap broken across midnight between consecutive days, which are solved
+/// separately: an entity's "apart" gap from its last instance of one day to its first
+/// of the next, or an "apart from" gap between an instance of one day and an instance
+/// of the referenced entities the next day (before/after links are satisfied within
+/// each day, so they cannot break overnight).
+fn overnight_violation(days: &[Vec<Entity>], results: &[&ScheduleResult]) -> Option<String> {
+    for d in 1..days.len() {
+        for e in &days[d] {
+            let gap = apart_gap(e);
+            let first = event_times(results[d], &e.name).min();
+            let last = event_times(results[d - 1], &e.name).max();
+            if let (Some(first), Some(last)) = (first, last) {
+                if first + DAY_MINUTES - last < gap {
+                    return Some(format!(
+                        "'{}' is not kept {}h apart overnight from day {} to day {}",
+                        e.name,
+                        gap / 60,
+                        d - 1,
+                        d
+                    ));
+                }
+            }
+        }
+        // "Apart from" gaps of either day's entities to the other day's
+        for (e_day, r_day) in [(d - 1, d), (d, d - 1)] {
+            let refs = RefIndex::new(&days[r_day]);
+            for e in &days[e_day] {
+                for c in &e.constraints {
+                    let (ConstraintType::ApartFrom, ConstraintRef::Unresolved(r)) =
+                        (&c.ctype, &c.cref)
+                    else {
+                        continue;
+                    };
+                    let gap = c.time_hours as i32 * 60;
+                    for &j in refs.resolve(r) {
+                        let other = &days[r_day][j].name;
+                        for t_e in event_times(results[e_day], &e.name) {
+                            for t_r in event_times(results[r_day], other) {
+                                let apart = if e_day < r_day {
+                                    t_r + DAY_MINUTES - t_e
+                                } else {
+                                    t_e + DAY_MINUTES - t_r
+                                };
+                                if apart < gap {
+                                    return Some(format!(
+                                        "'{}' is not kept {}h apart from '{}' overnight \
+                                         from day {} to day {}",
+                                        e.name,
+                                        gap / 60,
+                                        other,
+                                        d - 1,
+                                        d
+                                    ));
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+    None
+}
+
+/// Schedule the entities over `config.horizon_days` days.
+///
+/// Days with the same entities due (every day, for a purely daily regimen) share a
+/// single solve, and so does every independent component shared between days, so
+/// the model does not grow with the number of days. When the horizon spans several
+/// days, each entity also due the next day is solved as one that repeats, so its
+/// gaps hold overnight whenever the next day is solved alike. Consecutive days solved
+/// differently are checked overnight afterwards: a gap they break makes the schedule
+/// infeasible (a status, like any other infeasible schedule, not an error).
+/// Events are returned in order of day and time, with their `day` set.
+#[instrument(skip_all, fields(days = config.horizon_days))]
+pub fn solve_horizon(
+    entities: Vec<Entity>,
+    config: &SchedulerConfig,
+    debug_enabled: bool,
+) -> Result<ScheduleResult, String> {
+    let horizon_days = config.horizon_days.max(1);
+    let day_minutes = config.day_end_minutes - config.day_start_minutes;
+    let mut day_config = config.clone();
+    day_config.horizon_days = 1;
+
+    // Group the days by the entities due, then those by independent component
+    let days: Vec<Vec<Entity>> = (0..horizon_days)
+        .map(|d| day_view(&entities, d, day_minutes, horizon_days > 1))
+        .collect();
+    let mut day_types: Vec<&Vec<Entity>> = Vec::new();
+    let day_type_of: Vec<usize> = days
+        .iter()
+        .map(|day| match day_types.iter().position(|t| *t == day) {
+            Some(t) => t,
+            None => {
+                day_types.push(day);
+                day_types.len() - 1
+            }
+        })
+        .collect();
+    let mut components: Vec<Vec<Entity>> = Vec::new();
+    let type_components: Vec<Vec<usize>> = day_types
+        .iter()
+        .map(|day| {
+            split_components((*day).clone(), debug_enabled)
+                .into_iter()
+                .map(|part| match components.iter().position(|c| *c == part) {
+                    Some(c) => c,
+                    None => {
+                        components.push(part);
+                        components.len() - 1
+                    }
+                })
+                .collect()
+        })
+        .collect();
+    if debug_enabled {
+        eprintln!(
+            "--- Horizon of {} days: {} distinct days, {} distinct components ---",
+            horizon_days,
+            day_types.len(),
+            components.len()
+        );
+    }
+
+    let solved = components
+        .into_par_iter()
+        .map(|part| solve_component(part, &day_config, debug_enabled))
+        .collect::<Result<Vec<_>, String>>()?;
+    let type_results: Vec<ScheduleResult> = type_components
+        .iter()
+        .map(|parts| merge_results(parts.iter().map(|&c| solved[c].clone()).collect()))
+        .collect();
+
+    let day_results: Vec<&ScheduleResult> = day_type_of.iter().map(|&t| &type_results[t]).collect();
+    let violation = overnight_violation(&days, &day_results);
+
+    // Stamp each day's events with the day, keeping the per-day solve stats once
+    let mut per_day = Vec::with_capacity(day_results.len());
+    let mut counted = vec![false; type_results.len()];
+    for (d, &t) in day_type_of.iter().enumerate() {
+        let mut result = type_results[t].clone();
+        for ev in &mut result.scheduled_events {
+            ev.day = d as u32;
+        }
+        if std::mem::replace(&mut counted[t], true) {
+            result.stats = SolveStats {
+                backend: result.stats.backend,
+                objective: result.stats.objective,
+                ..SolveStats::default()
+            };
+            result.constraint_trace.clear();
+        }
+        per_day.push(result);
+    }
+    let mut result = merge_results(per_day);
+    if let Some(message) = violation {
+        if debug_enabled {
+            eprintln!("--- Horizon infeasible: {} ---", message);
+        }
+        result.status = ScheduleStatus::Infeasible;
+        result.scheduled_events.clear();
+        result.window_usage.clear();
+        result.total_penalty = 0.0;
+    }
+    result
+        .scheduled_events
+        .sort_by_key(|ev| (ev.day, ev.time_minutes));
+    Ok(result)
+}
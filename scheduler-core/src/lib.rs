@@ -1,17 +1,30 @@
+pub mod batch;
+pub mod cache;
+pub mod components;
 pub mod domain;
+pub mod horizon;
 pub mod parse;
+pub mod presolve;
+pub mod propagation;
+pub mod session;
 pub mod solver;
+pub mod trace;
 
 // Re-export commonly used items for easier access
+pub use batch::{solve_schedules_batch, solve_schedules_batch_cached};
+pub use cache::{CacheStats, ProblemKey, ResultCache, DEFAULT_DISK_CAPACITY};
 pub use domain::{
-    ConstraintExpr, ConstraintRef, ConstraintType, Entity, Frequency, ScheduleResult,
-    ScheduleStrategy, ScheduledEvent, SchedulerConfig, WindowSpec,
+    ConstraintExpr, ConstraintRef, ConstraintType, Entity, Frequency, Interner, ScheduleResult,
+    ScheduleStatus, ScheduleStrategy, ScheduledEvent, SchedulerConfig, SolveStats, SolverBackend,
+    SolverEngine, SymbolId, WindowFormulation, WindowSpec,
 };
 pub use parse::{
     format_minutes_to_hhmm, parse_from_table, parse_hhmm_to_minutes, parse_one_constraint,
     parse_one_window,
 };
-pub use solver::solve_schedule;
+pub use session::SchedulerSession;
+pub use solver::{build_model, solve_schedule, ScheduleModel};
+pub use trace::{ConstraintKind, ConstraintTrace};
 
 /// Helper function to print a schedule in a readable format
 pub fn format_schedule(result: &ScheduleResult) -> String {
@@ -19,13 +32,26 @@ pub fn format_schedule(result: &ScheduleResult) -> String {
 
     // Format header
     output.push_str("--- SCHEDULE ---\n");
-    output.push_str(&format!("Total penalty: {:.1}\n\n", result.total_penalty));
+    output.push_str(&format!("Total penalty: {:.1}\n", result.total_penalty));
+    output.push_str(&format!("Engine: {:?}\n", result.engine));
+    output.push_str(&format!("Status: {}\n", result.status.as_str()));
+    if let Some(backend) = result.stats.backend {
+        output.push_str(&format!(
+            "Solver: {:?} ({} variables, {} constraints, {:.2} ms)\n",
+            backend, result.stats.variables, result.stats.constraints, result.stats.solve_time_ms
+        ));
+    }
+    output.push('\n');
 
-    // Format scheduled events
+    // Format scheduled events (by day, if the schedule spans several)
+    let multi_day = result.scheduled_events.iter().any(|e| e.day > 0);
     output.push_str("TIME     | ENTITY              | INSTANCE\n");
     output.push_str("---------+---------------------+---------\n");
 
-    for event in &result.scheduled_events {
+    for (i, event) in result.scheduled_events.iter().enumerate() {
+        if multi_day && (i == 0 || result.scheduled_events[i - 1].day != event.day) {
+            output.push_str(&format!("Day {}\n", event.day + 1));
+        }
         let time_str = format_minutes_to_hhmm(event.time_minutes);
         output.push_str(&format!(
             "{:8} | {:<20} | #{}\n",
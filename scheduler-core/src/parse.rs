@@ -1,7 +1,46 @@
 use crate::domain::{
     ConstraintExpr, ConstraintRef, ConstraintType, Entity, Frequency, WindowInfo, WindowSpec,
 };
-use regex::Regex;
+use regex::{Regex, RegexSet};
+use std::sync::OnceLock;
+use tracing::instrument;
+
+/// Constraint patterns, tried in order, with the constraint type they produce and
+/// whether they refer to the entity itself (no reference capture).
+static CONSTRAINT_PATTERNS: [(&str, ConstraintType, bool); 4] = [
+    (r"^≥(\d+)h\s+apart$", ConstraintType::Apart, true),
+    (r"^≥(\d+)h\s+before\s+(.+)$", ConstraintType::Before, false),
+    (r"^≥(\d+)h\s+after\s+(.+)$", ConstraintType::After, false),
+    (
+        r"^≥(\d+)h\s+apart\s+from\s+(.+)$",
+        ConstraintType::ApartFrom,
+        false,
+    ),
+];
+
+/// The constraint patterns, compiled once per process: a `RegexSet` to find which
+/// pattern matches in one pass, and the individual regexes to extract its captures.
+struct ConstraintPatterns {
+    set: RegexSet,
+    regexes: Vec<Regex>,
+}
+
+fn constraint_patterns() -> &'static ConstraintPatterns {
+    static PATTERNS: OnceLock<ConstraintPatterns> = OnceLock::new();
+    PATTERNS.get_or_init(|| {
+        let patterns = CONSTRAINT_PATTERNS.iter().map(|(pattern, _, _)| *pattern);
+        ConstraintPatterns {
+            set: RegexSet::new(patterns.clone()).unwrap(),
+            regexes: patterns.map(|p| Regex::new(p).unwrap()).collect(),
+        }
+    })
+}
+
+/// Regex capturing anything in quotes, for the JSON-like list columns of a table
+fn quoted_regex() -> &'static Regex {
+    static QUOTED: OnceLock<Regex> = OnceLock::new();
+    QUOTED.get_or_init(|| Regex::new(r#""([^"]+)""#).unwrap())
+}
 
 /// Parse the table data into a list of `Entity` objects.
 /// Expects a table with at least 9 columns:
@@ -16,10 +55,11 @@ use regex::Regex;
 ///   [8]: Note
 ///
 /// Returns an error if rows have fewer than 9 columns.
+#[instrument(skip_all, fields(rows = rows.len()))]
 pub fn parse_from_table(rows: Vec<Vec<String>>) -> Result<Vec<Entity>, String> {
     // For parsing the constraints text (JSON-like array of strings),
     // we use a regex capturing anything in quotes.
-    let re = Regex::new(r#""([^"]+)""#).unwrap();
+    let re = quoted_regex();
 
     rows.into_iter()
         .skip(1) // skip header row
@@ -56,11 +96,12 @@ pub fn parse_from_table(rows: Vec<Vec<String>>) -> Result<Vec<Entity>, String> {
 
             // (3) build the entity
             Ok(Entity {
-                name: row[0].trim_matches('"').to_string(),
-                category: row[1].to_string(),
+                name: row[0].trim_matches('"').into(),
+                category: row[1].as_str().into(),
                 frequency: frequency,
                 constraints: cexprs,
                 windows: wspecs,
+                wrap_minutes: None,
             })
         })
         .collect()
@@ -72,36 +113,32 @@ pub fn parse_from_table(rows: Vec<Vec<String>>) -> Result<Vec<Entity>, String> {
 ///   - time_hours = 6
 ///   - ctype = ConstraintType::Apart
 ///   - cref = ConstraintRef::WithinGroup (since "apart" was recognized)
+///
+/// Nothing is memoised here: callers parsing many rows (like the plugin, per call)
+/// keep their own memo of the distinct strings.
 pub fn parse_one_constraint(s: &str) -> Result<ConstraintExpr, String> {
-    let patterns = &[
-        (r"^≥(\d+)h\s+apart$", ConstraintType::Apart, true),
-        (r"^≥(\d+)h\s+before\s+(.+)$", ConstraintType::Before, false),
-        (r"^≥(\d+)h\s+after\s+(.+)$", ConstraintType::After, false),
-        (
-            r"^≥(\d+)h\s+apart\s+from\s+(.+)$",
-            ConstraintType::ApartFrom,
-            false,
-        ),
-    ];
-
-    patterns
-        .iter()
-        .find_map(|(pattern, ctype, is_within_group)| {
-            Regex::new(pattern).unwrap().captures(s).map(|cap| {
-                let hrs: u32 = cap[1].parse().map_err(|_| "Bad hr".to_string())?;
-                let cref = if *is_within_group {
-                    ConstraintRef::WithinGroup
-                } else {
-                    ConstraintRef::Unresolved(cap[2].trim().to_string())
-                };
-                Ok(ConstraintExpr {
-                    time_hours: hrs,
-                    ctype: ctype.clone(),
-                    cref,
-                })
-            })
-        })
-        .unwrap_or_else(|| Err(format!("Unknown constraint expr: {}", s)))
+    let patterns = constraint_patterns();
+    // The first matching pattern wins, as the patterns are listed by priority
+    let idx = match patterns.set.matches(s).iter().next() {
+        Some(idx) => idx,
+        None => return Err(format!("Unknown constraint expr: {}", s)),
+    };
+
+    let (_, ctype, is_within_group) = &CONSTRAINT_PATTERNS[idx];
+    let cap = patterns.regexes[idx]
+        .captures(s)
+        .ok_or_else(|| format!("Unknown constraint expr: {}", s))?;
+    let hrs: u32 = cap[1].parse().map_err(|_| "Bad hr".to_string())?;
+    let cref = if *is_within_group {
+        ConstraintRef::WithinGroup
+    } else {
+        ConstraintRef::Unresolved(cap[2].trim().into())
+    };
+    Ok(ConstraintExpr {
+        time_hours: hrs,
+        ctype: ctype.clone(),
+        cref,
+    })
 }
 
 /// Parse a single window snippet, e.g. "08:00" or "12:00-13:00".
@@ -212,7 +249,7 @@ pub fn create_window_info_map(entities: &[Entity]) -> Vec<WindowInfo> {
             };
 
             result.push(WindowInfo {
-                entity_name: e.name.clone(),
+                entity_name: e.name.to_string(),
                 window_index: idx,
                 time_desc,
             });
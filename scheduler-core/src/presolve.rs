@@ -0,0 +1,347 @@
+use crate::domain::{ClockVar, SymbolId};
+use crate::solver::Direction;
+
+/// Cap on the rounds of link fixing (each round re-propagates the bounds)
+const MAX_FIXING_ROUNDS: usize = 8;
+
+/// A "subject [before|after] at least one object" requirement, by entity id: every
+/// instance of `subject` must be at least `offset` minutes from some object instance
+#[derive(Debug, Clone)]
+pub struct Link {
+    pub direction: Direction,
+    pub subject: SymbolId,
+    pub objects: Vec<SymbolId>,
+    pub offset: f64,
+}
+
+/// Which object clocks a subject clock can still be linked to
+#[derive(Debug, Clone, PartialEq)]
+pub enum Candidates {
+    /// Some object satisfies the offset in every schedule: nothing to model
+    Satisfied,
+    /// Exactly one object can satisfy the offset, so the link to it is forced
+    Forced(usize),
+    /// At least one of these objects (indices into the objects) must be linked
+    Choice(Vec<usize>),
+    /// No object can ever satisfy the offset
+    Infeasible,
+}
+
+/// Feasible `[lo, hi]` interval of every clock, implied by the day bounds, the
+/// chronological order and "apart" gaps of instances, and any forced links.
+///
+/// Clocks are numbered entity by entity, instances in order.
+#[derive(Debug, Clone)]
+pub struct ClockBounds {
+    offsets: Vec<usize>,
+    lo: Vec<f64>,
+    hi: Vec<f64>,
+}
+
+impl ClockBounds {
+    /// Every clock within the day, for entities with `counts[id]` instances
+    pub fn uniform(counts: &[usize], day_start: f64, day_end: f64) -> Self {
+        let mut offsets = Vec::with_capacity(counts.len() + 1);
+        offsets.push(0);
+        for &n in counts {
+            offsets.push(offsets.last().unwrap() + n);
+        }
+        let n_clocks = *offsets.last().unwrap();
+        Self {
+            offsets,
+            lo: vec![day_start; n_clocks],
+            hi: vec![day_end; n_clocks],
+        }
+    }
+
+    fn index(&self, entity: SymbolId, instance: usize) -> usize {
+        self.offsets[entity as usize] + instance - 1
+    }
+
+    fn clocks(&self, entity: SymbolId) -> std::ops::Range<usize> {
+        self.offsets[entity as usize]..self.offsets[entity as usize + 1]
+    }
+
+    /// Bounds of the clock for one instance (1-based) of an entity
+    pub fn get(&self, entity: SymbolId, instance: usize) -> (f64, f64) {
+        let i = self.index(entity, instance);
+        (self.lo[i], self.hi[i])
+    }
+
+    /// Bounds of a clock variable
+    pub fn of(&self, cv: &ClockVar) -> (f64, f64) {
+        self.get(cv.entity, cv.instance)
+    }
+
+    /// Tighten the bounds along difference edges `t[to] - t[from] >= w` until
+    /// nothing changes; false if they cross (or a positive cycle keeps pushing them)
+    fn propagate(&mut self, edges: &[(usize, usize, f64)]) -> bool {
+        for _ in 0..=self.lo.len() {
+            let mut changed = false;
+            for &(from, to, w) in edges {
+                if self.lo[from] + w > self.lo[to] {
+                    self.lo[to] = self.lo[from] + w;
+                    changed = true;
+                }
+                if self.hi[to] - w < self.hi[from] {
+                    self.hi[from] = self.hi[to] - w;
+                    changed = true;
+                }
+            }
+            if self.lo.iter().zip(&self.hi).any(|(lo, hi)| lo > hi) {
+                return false;
+            }
+            if !changed {
+                return true;
+            }
+        }
+        false
+    }
+
+    fn candidates_at(
+        &self,
+        direction: Direction,
+        s: usize,
+        objects: impl Iterator<Item = usize>,
+        offset: f64,
+    ) -> Candidates {
+        let mut feasible = Vec::new();
+        for (k, o) in objects.enumerate() {
+            // (earliest, latest) value of the margin by which the link holds
+            let (worst, best) = match direction {
+                Direction::After => (self.lo[s] - self.hi[o], self.hi[s] - self.lo[o]),
+                Direction::Before => (self.lo[o] - self.hi[s], self.hi[o] - self.lo[s]),
+            };
+            if worst >= offset {
+                return Candidates::Satisfied;
+            }
+            if best >= offset {
+                feasible.push(k);
+            }
+        }
+        match feasible.len() {
+            0 => Candidates::Infeasible,
+            1 => Candidates::Forced(feasible[0]),
+            _ => Candidates::Choice(feasible),
+        }
+    }
+
+    /// The object clocks that the subject clock can still be linked to
+    pub fn candidates(
+        &self,
+        direction: Direction,
+        subject: &ClockVar,
+        objects: &[ClockVar],
+        offset: f64,
+    ) -> Candidates {
+        let s = self.index(subject.entity, subject.instance);
+        let objects = objects.iter().map(|o| self.index(o.entity, o.instance));
+        self.candidates_at(direction, s, objects, offset)
+    }
+}
+
+/// Compute the clock bounds for entities with `counts[id]` instances, at least
+/// `gaps[id]` minutes apart (also from the last instance to the first one `wraps[id]`
+/// minutes later, for a repeating entity), and fix every link left with a single
+/// candidate (which in turn tightens the bounds).
+///
+/// Returns None when the model is provably infeasible, in which case it should be
+/// built without pruning so that the solver reports it.
+#[tracing::instrument(level = "debug", skip_all)]
+pub fn presolve(
+    counts: &[usize],
+    gaps: &[f64],
+    links: &[Link],
+    day_start: f64,
+    day_end: f64,
+    wraps: &[Option<f64>],
+) -> Option<ClockBounds> {
+    let mut bounds = ClockBounds::uniform(counts, day_start, day_end);
+    let n_clocks = bounds.lo.len();
+
+    // Consecutive instances are ordered, and at least their "apart" gap apart
+    let mut edges = Vec::new();
+    for (id, &gap) in gaps.iter().enumerate() {
+        let clocks = bounds.clocks(id as SymbolId);
+        for i in clocks.start..clocks.end.saturating_sub(1) {
+            edges.push((i, i + 1, gap.max(0.0)));
+        }
+        if let Some(period) = wraps[id] {
+            if clocks.len() > 1 && gap > 0.0 {
+                edges.push((clocks.end - 1, clocks.start, gap - period));
+            }
+        }
+    }
+
+    let mut fixed = vec![false; n_clocks * links.len().max(1)];
+    for _ in 0..MAX_FIXING_ROUNDS {
+        if !bounds.propagate(&edges) {
+            return None;
+        }
+        let mut changed = false;
+        for (l, link) in links.iter().enumerate() {
+            let objects: Vec<usize> = link
+                .objects
+                .iter()
+                .flat_map(|&o| bounds.clocks(o))
+                .collect();
+            if objects.is_empty() {
+                continue;
+            }
+            for s in bounds.clocks(link.subject) {
+                let key = l * n_clocks + s;
+                if fixed[key] {
+                    continue;
+                }
+                match bounds.candidates_at(link.direction, s, objects.iter().copied(), link.offset)
+                {
+                    Candidates::Infeasible => return None,
+                    Candidates::Forced(k) => {
+                        let o = objects[k];
+                        edges.push(match link.direction {
+                            Direction::After => (o, s, link.offset),
+                            Direction::Before => (s, o, link.offset),
+                        });
+                        fixed[key] = true;
+                        changed = true;
+                    }
+                    Candidates::Satisfied | Candidates::Choice(_) => {}
+                }
+            }
+        }
+        if !changed {
+            return Some(bounds);
+        }
+    }
+    // Out of fixing rounds: the links fixed in the last one still tighten the bounds
+    bounds.propagate(&edges).then_some(bounds)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const DAY_START: f64 = 480.0;
+    const DAY_END: f64 = 1320.0;
+
+    fn bounds(counts: &[usize], gaps: &[f64], links: &[Link]) -> Option<ClockBounds> {
+        presolve(
+            counts,
+            gaps,
+            links,
+            DAY_START,
+            DAY_END,
+            &vec![None; counts.len()],
+        )
+    }
+
+    fn link(direction: Direction, subject: SymbolId, objects: &[SymbolId], offset: f64) -> Link {
+        Link {
+            direction,
+            subject,
+            objects: objects.to_vec(),
+            offset,
+        }
+    }
+
+    #[test]
+    fn apart_gaps_tighten_every_instance() {
+        let b = bounds(&[3], &[360.0], &[]).unwrap();
+        assert_eq!(b.get(0, 1), (480.0, 600.0));
+        assert_eq!(b.get(0, 2), (840.0, 960.0));
+        assert_eq!(b.get(0, 3), (1200.0, 1320.0));
+    }
+
+    #[test]
+    fn chain_longer_than_the_day_is_infeasible() {
+        assert!(bounds(&[3], &[600.0], &[]).is_none());
+    }
+
+    #[test]
+    fn chain_longer_than_the_period_is_infeasible() {
+        let wraps = [Some(1440.0)];
+        assert!(presolve(&[3], &[420.0], &[], 0.0, 1439.0, &wraps).is_some());
+        assert!(presolve(&[3], &[540.0], &[], 0.0, 1439.0, &wraps).is_none());
+    }
+
+    #[test]
+    fn positive_cycle_stops_without_crossing() {
+        // A 10-minute gap repeating every 15 minutes is a positive cycle: each pass
+        // raises the bounds by a few minutes, far from crossing in a day this wide,
+        // so propagation must give up after a pass per clock rather than run on
+        let wraps = [Some(15.0)];
+        assert!(presolve(&[2], &[10.0], &[], 0.0, 1e9, &wraps).is_none());
+    }
+
+    #[test]
+    fn propagation_reaches_a_fixed_point() {
+        let mut b = ClockBounds::uniform(&[2], DAY_START, DAY_END);
+        let edges = [(0, 1, 60.0)];
+        assert!(b.propagate(&edges));
+        let settled = (b.lo.clone(), b.hi.clone());
+        assert!(b.propagate(&edges));
+        assert_eq!((b.lo, b.hi), settled);
+    }
+
+    #[test]
+    fn forced_link_is_fixed() {
+        // Entity 1 after entity 0 by 60 minutes, with a single object to link to
+        let links = [link(Direction::After, 1, &[0], 60.0)];
+        let b = bounds(&[1, 1], &[0.0, 0.0], &links).unwrap();
+        assert_eq!(b.get(0, 1), (DAY_START, DAY_END - 60.0));
+        assert_eq!(b.get(1, 1), (DAY_START + 60.0, DAY_END));
+    }
+
+    #[test]
+    fn link_with_a_choice_is_not_fixed() {
+        let links = [link(Direction::Before, 2, &[0, 1], 60.0)];
+        let b = bounds(&[1, 1, 1], &[0.0; 3], &links).unwrap();
+        for id in 0..3 {
+            assert_eq!(b.get(id, 1), (DAY_START, DAY_END));
+        }
+    }
+
+    #[test]
+    fn link_no_object_can_satisfy_is_infeasible() {
+        // Entity 0 is pinned to 08:00, 15:00 and 22:00, so nothing is 15h after one
+        let links = [link(Direction::After, 1, &[0], 900.0)];
+        assert!(bounds(&[3, 1], &[420.0, 0.0], &links).is_none());
+    }
+
+    #[test]
+    fn candidates_classify_objects() {
+        let mut b = ClockBounds::uniform(&[1, 1, 1], DAY_START, DAY_END);
+        b.lo = vec![600.0, 480.0, 900.0];
+        b.hi = vec![660.0, 540.0, 1000.0];
+        // Clock 0 (10:00-11:00) after clock 1 (08:00-09:00) always holds by an hour
+        assert_eq!(
+            b.candidates_at(Direction::After, 0, [1].into_iter(), 60.0),
+            Candidates::Satisfied
+        );
+        // Only clock 2 can be 5h after clock 0, and only clock 1 at least 2h before it
+        assert_eq!(
+            b.candidates_at(Direction::Before, 0, [1, 2].into_iter(), 300.0),
+            Candidates::Forced(1)
+        );
+        assert_eq!(
+            b.candidates_at(Direction::After, 0, [1, 2].into_iter(), 120.0),
+            Candidates::Forced(0)
+        );
+        assert_eq!(
+            b.candidates_at(Direction::After, 2, [0, 1].into_iter(), 60.0),
+            Candidates::Satisfied
+        );
+        assert_eq!(
+            b.candidates_at(Direction::Before, 1, [0, 2].into_iter(), 30.0),
+            Candidates::Satisfied
+        );
+        assert_eq!(
+            b.candidates_at(Direction::After, 2, [0, 1].into_iter(), 400.0),
+            Candidates::Choice(vec![0, 1])
+        );
+        assert_eq!(
+            b.candidates_at(Direction::Before, 2, [0, 1].into_iter(), 0.0),
+            Candidates::Infeasible
+        );
+    }
+}
@@ -0,0 +1,385 @@
+use std::collections::HashSet;
+
+use crate::domain::{
+    ConstraintType, Entity, ScheduleResult, ScheduleStatus, ScheduleStrategy, ScheduledEvent,
+    SchedulerConfig, SolveStats, SolverEngine, WindowSpec,
+};
+
+/// Whether a set of entities can be scheduled without the MILP.
+///
+/// This holds when every constraint is an "apart" constraint (so the only links are
+/// difference constraints between consecutive instances of the same entity) and no
+/// entity needs window-usage indicator binaries (at most one window, or one instance).
+/// Windowed entities also need a positive penalty weight, so the penalty variables
+/// have a unique optimal value, and (in a repeating schedule) a single instance, as
+/// the chain DP does not model the gap from the last instance to the next first.
+pub fn supports(entities: &[Entity], config: &SchedulerConfig) -> bool {
+    let mut names = HashSet::new();
+    entities.iter().all(|e| {
+        let n = e.frequency.instances_per_day();
+        names.insert(&*e.name)
+            && e.constraints
+                .iter()
+                .all(|c| matches!(c.ctype, ConstraintType::Apart))
+            && (e.windows.len() <= 1 || n <= 1)
+            && (e.windows.is_empty() || config.penalty_weight > 0.0)
+            && (e.windows.is_empty() || n <= 1 || e.wrap_minutes.is_none())
+    })
+}
+
+/// Distance from `t` to a window: 0 inside a range, distance to its nearest edge outside.
+fn window_distance(t: i32, w: &WindowSpec) -> i32 {
+    match w {
+        WindowSpec::Anchor(a) => (t - a).abs(),
+        WindowSpec::Range(start, end) => (start - t).max(t - end).max(0),
+    }
+}
+
+/// Solve entities accepted by [`supports`] by propagation over the clock variables.
+///
+/// Entities are independent of one another, and the instances of one entity form a
+/// chain `t_{i+1} - t_i >= gap` within `[day_start, day_end]`. With no windows this is
+/// the longest-path schedule (`day_start + i * gap` for earliest, mirrored for latest);
+/// with a window the per-instance cost `±t + α·dist(t)` is minimised exactly by a DP
+/// over the integer minutes of the day. Ties are broken towards the strategy's
+/// direction (earlier for earliest, later for latest).
+///
+/// Returns `None` if some chain does not fit in the day, leaving the MILP to report it.
+pub fn solve(entities: &[Entity], config: &SchedulerConfig) -> Option<ScheduleResult> {
+    let day_start = config.day_start_minutes;
+    let day_end = config.day_end_minutes;
+    if day_end < day_start {
+        return None;
+    }
+    let earliest = matches!(config.strategy, ScheduleStrategy::Earliest);
+
+    let mut scheduled_events = Vec::new();
+    let mut total_penalty = 0.0;
+    let mut time_cost = 0.0;
+
+    for e in entities {
+        let n = e.frequency.instances_per_day();
+        if n == 0 {
+            continue;
+        }
+
+        let gap = e
+            .constraints
+            .iter()
+            .filter(|c| matches!(c.ctype, ConstraintType::Apart))
+            .map(|c| (c.time_hours * 60) as i32)
+            .max()
+            .unwrap_or(0);
+        if day_start as i64 + (n as i64 - 1) * gap as i64 > day_end as i64 {
+            return None;
+        }
+        // The tightest chain spans (n - 1) gaps, leaving the rest of the period
+        if let Some(period) = e.wrap_minutes {
+            if n > 1 && n as i64 * gap as i64 > period as i64 {
+                return None;
+            }
+        }
+
+        let times = if e.windows.is_empty() {
+            (0..n as i32)
+                .map(|i| {
+                    if earliest {
+                        day_start + i * gap
+                    } else {
+                        day_end - (n as i32 - 1 - i) * gap
+                    }
+                })
+                .collect()
+        } else {
+            chain_dp(n, gap, day_start, day_end, earliest, |t| {
+                let dist = e
+                    .windows
+                    .iter()
+                    .map(|w| window_distance(t, w))
+                    .max()
+                    .unwrap_or(0);
+                let time_cost = if earliest { t as f64 } else { -(t as f64) };
+                time_cost + config.penalty_weight * dist as f64
+            })
+        };
+
+        for (i, t) in times.into_iter().enumerate() {
+            time_cost += if earliest { t as f64 } else { -(t as f64) };
+            total_penalty += e
+                .windows
+                .iter()
+                .map(|w| window_distance(t, w))
+                .max()
+                .unwrap_or(0) as f64;
+            scheduled_events.push(ScheduledEvent {
+                entity_name: e.name.to_string(),
+                instance: i + 1,
+                time_minutes: t,
+                day: 0,
+            });
+        }
+    }
+
+    // Sort events by time for better display
+    scheduled_events.sort_by_key(|e| e.time_minutes);
+
+    Some(ScheduleResult {
+        scheduled_events,
+        total_penalty,
+        window_usage: Vec::new(),
+        engine: SolverEngine::Propagation,
+        status: ScheduleStatus::Optimal,
+        constraint_trace: Vec::new(),
+        // The objective the MILP would have minimised
+        stats: SolveStats {
+            objective: Some(time_cost + config.penalty_weight * total_penalty),
+            ..SolveStats::default()
+        },
+    })
+}
+
+/// Minimise `sum(cost(t_i))` over integer chains `t_{i+1} - t_i >= gap` in `[lo, hi]`.
+///
+/// `best[k][t]` is the cheapest chain of `k + 1` instances ending at `t`; each layer
+/// adds `cost(t)` to the running prefix minimum of the previous layer shifted by `gap`.
+fn chain_dp(
+    n: usize,
+    gap: i32,
+    lo: i32,
+    hi: i32,
+    prefer_earliest: bool,
+    cost: impl Fn(i32) -> f64,
+) -> Vec<i32> {
+    let width = (hi - lo + 1) as usize;
+    let gap = gap as usize;
+    let costs: Vec<f64> = (lo..=hi).map(cost).collect();
+
+    // Strict comparison keeps the first (earliest) optimum, non-strict the last
+    let better = |a: f64, b: f64| if prefer_earliest { a < b } else { a <= b };
+
+    let mut best = costs.clone();
+    let mut choices: Vec<Vec<usize>> = Vec::with_capacity(n.saturating_sub(1));
+    for _ in 1..n {
+        // Prefix minimum (value, argmin) of the previous layer
+        let mut prefix: Vec<(f64, usize)> = Vec::with_capacity(width);
+        for (t, &v) in best.iter().enumerate() {
+            match prefix.last() {
+                Some(&(pv, pt)) if !better(v, pv) => prefix.push((pv, pt)),
+                _ => prefix.push((v, t)),
+            }
+        }
+
+        let mut layer = vec![f64::INFINITY; width];
+        let mut choice = vec![0; width];
+        for t in gap..width {
+            let (pv, pt) = prefix[t - gap];
+            layer[t] = costs[t] + pv;
+            choice[t] = pt;
+        }
+        best = layer;
+        choices.push(choice);
+    }
+
+    // Pick the cheapest end point, then walk the choices back
+    let mut t = 0;
+    for (i, &v) in best.iter().enumerate() {
+        if better(v, best[t]) {
+            t = i;
+        }
+    }
+    let mut times = vec![t];
+    for choice in choices.iter().rev() {
+        t = choice[t];
+        times.push(t);
+    }
+    times.reverse();
+    times.into_iter().map(|t| lo + t as i32).collect()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::domain::{ConstraintExpr, ConstraintRef, Frequency};
+    use crate::solver::build_model;
+
+    fn entity(name: &str, n: u32, apart_hours: u32, windows: Vec<WindowSpec>) -> Entity {
+        let constraints = if apart_hours > 0 {
+            vec![ConstraintExpr {
+                time_hours: apart_hours,
+                ctype: ConstraintType::Apart,
+                cref: ConstraintRef::WithinGroup,
+            }]
+        } else {
+            Vec::new()
+        };
+        Entity {
+            name: name.into(),
+            category: "med".into(),
+            frequency: Frequency::TimesPerDay(n),
+            constraints,
+            windows,
+            wrap_minutes: None,
+        }
+    }
+
+    fn times(result: &ScheduleResult) -> Vec<(String, usize, i32)> {
+        let mut times: Vec<_> = result
+            .scheduled_events
+            .iter()
+            .map(|ev| (ev.entity_name.clone(), ev.instance, ev.time_minutes))
+            .collect();
+        times.sort();
+        times
+    }
+
+    /// Solves `entities` both ways, asserting the same objective (and, when the
+    /// optimum is unique, the same times and penalty), and returns the propagated result
+    fn assert_matches_milp(
+        entities: Vec<Entity>,
+        config: &SchedulerConfig,
+        unique: bool,
+    ) -> ScheduleResult {
+        assert!(supports(&entities, config));
+        let propagated = solve(&entities, config).expect("propagation found no schedule");
+        let milp = build_model(entities, config, false)
+            .solve(config, false)
+            .unwrap();
+        assert_eq!(milp.status, ScheduleStatus::Optimal);
+        let (p, m) = (
+            propagated.stats.objective.unwrap(),
+            milp.stats.objective.unwrap(),
+        );
+        assert!((p - m).abs() < 1e-6, "objective {} != MILP {}", p, m);
+        if unique {
+            assert!((propagated.total_penalty - milp.total_penalty).abs() < 1e-6);
+            assert_eq!(times(&propagated), times(&milp));
+        }
+        propagated
+    }
+
+    fn config(strategy: ScheduleStrategy, penalty_weight: f64) -> SchedulerConfig {
+        SchedulerConfig {
+            strategy,
+            penalty_weight,
+            ..SchedulerConfig::default()
+        }
+    }
+
+    const STRATEGIES: [ScheduleStrategy; 2] =
+        [ScheduleStrategy::Earliest, ScheduleStrategy::Latest];
+
+    #[test]
+    fn apart_chains_match_milp() {
+        for strategy in STRATEGIES {
+            let entities = vec![
+                entity("pill", 3, 6, Vec::new()),
+                entity("drops", 4, 4, Vec::new()),
+                entity("vitamin", 1, 0, Vec::new()),
+            ];
+            assert_matches_milp(entities, &config(strategy, 0.3), true);
+        }
+    }
+
+    #[test]
+    fn chain_is_packed_against_the_strategy_edge() {
+        let entities = vec![entity("pill", 3, 6, Vec::new())];
+        let earliest = assert_matches_milp(
+            entities.clone(),
+            &config(ScheduleStrategy::Earliest, 0.3),
+            true,
+        );
+        let latest = assert_matches_milp(entities, &config(ScheduleStrategy::Latest, 0.3), true);
+        let at = |r: &ScheduleResult| times(r).into_iter().map(|(_, _, t)| t).collect::<Vec<_>>();
+        assert_eq!(at(&earliest), vec![8 * 60, 14 * 60, 20 * 60]);
+        assert_eq!(at(&latest), vec![10 * 60, 16 * 60, 22 * 60]);
+    }
+
+    #[test]
+    fn single_window_with_several_instances_matches_milp() {
+        let windows = [
+            WindowSpec::Anchor(12 * 60),
+            WindowSpec::Range(9 * 60, 11 * 60),
+            WindowSpec::Range(20 * 60, 21 * 60 + 30),
+        ];
+        for strategy in STRATEGIES {
+            for window in &windows {
+                for penalty_weight in [0.5, 2.0] {
+                    let entities = vec![entity("pill", 3, 2, vec![window.clone()])];
+                    // Instances either side of a window can trade minutes at equal cost
+                    assert_matches_milp(entities, &config(strategy, penalty_weight), false);
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn single_instance_with_several_windows_matches_milp() {
+        for strategy in STRATEGIES {
+            let entities = vec![entity(
+                "pill",
+                1,
+                0,
+                vec![
+                    WindowSpec::Anchor(9 * 60),
+                    WindowSpec::Range(12 * 60, 13 * 60),
+                    WindowSpec::Anchor(19 * 60),
+                ],
+            )];
+            assert_matches_milp(entities, &config(strategy, 2.0), true);
+        }
+    }
+
+    #[test]
+    fn wrapped_chain_matches_milp() {
+        for strategy in STRATEGIES {
+            let mut pill = entity("pill", 3, 6, Vec::new());
+            pill.wrap_minutes = Some(24 * 60);
+            assert_matches_milp(vec![pill], &config(strategy, 0.3), true);
+        }
+    }
+
+    #[test]
+    fn chains_that_do_not_fit_are_left_to_the_milp() {
+        let config = SchedulerConfig {
+            day_start_minutes: 0,
+            day_end_minutes: 24 * 60 - 1,
+            ..SchedulerConfig::default()
+        };
+        // 3 x 13h does not fit in the day; 3 x 9h fits in the day but not the period
+        let long = entity("pill", 3, 13, Vec::new());
+        let mut wrapped = entity("pill", 3, 9, Vec::new());
+        wrapped.wrap_minutes = Some(24 * 60);
+        for entities in [vec![long], vec![wrapped]] {
+            assert!(supports(&entities, &config));
+            assert!(solve(&entities, &config).is_none());
+            let milp = build_model(entities, &config, false)
+                .solve(&config, false)
+                .unwrap();
+            assert_eq!(milp.status, ScheduleStatus::Infeasible);
+        }
+    }
+
+    #[test]
+    fn unsupported_shapes_are_rejected() {
+        let default = SchedulerConfig::default();
+        let windows = vec![WindowSpec::Anchor(9 * 60), WindowSpec::Anchor(18 * 60)];
+        assert!(!supports(&[entity("pill", 2, 0, windows)], &default));
+
+        let mut after = entity("pill", 1, 0, Vec::new());
+        after.constraints.push(ConstraintExpr {
+            time_hours: 1,
+            ctype: ConstraintType::After,
+            cref: ConstraintRef::Unresolved("food".into()),
+        });
+        assert!(!supports(
+            &[after, entity("food", 1, 0, Vec::new())],
+            &default
+        ));
+
+        let windowed = entity("pill", 1, 0, vec![WindowSpec::Anchor(9 * 60)]);
+        assert!(!supports(
+            &[windowed],
+            &config(ScheduleStrategy::Earliest, 0.0)
+        ));
+    }
+}
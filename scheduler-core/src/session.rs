@@ -0,0 +1,134 @@
+use rayon::prelude::*;
+
+use crate::domain::{
+    ConstraintExpr, Entity, ScheduleResult, ScheduleStatus, ScheduledEvent, SchedulerConfig,
+};
+use crate::horizon;
+use crate::solver::{merge_results, solve_component_from, solve_schedule, split_components};
+
+/// A schedule that is kept between solves and edited in place.
+///
+/// The entities are split into the independent components of their constraint
+/// graph, and the result of each component is kept after solving. On the next
+/// solve, any component whose entities are unchanged reuses its previous result,
+/// so an edit only re-solves the component(s) it touches.
+///
+/// Reuse is per whole component: when every entity is linked (say, meds scheduled
+/// around food), any edit re-solves the whole schedule. A re-solved component starts
+/// from the previous times of its entities, which HiGHS and CBC take as a MIP start
+/// (microlp solves it from scratch).
+#[derive(Debug, Clone, Default)]
+pub struct SchedulerSession {
+    config: SchedulerConfig,
+    entities: Vec<Entity>,
+    solved: Vec<(Vec<Entity>, ScheduleResult)>,
+}
+
+impl SchedulerSession {
+    pub fn new(config: SchedulerConfig) -> Self {
+        Self {
+            config,
+            entities: Vec::new(),
+            solved: Vec::new(),
+        }
+    }
+
+    pub fn config(&self) -> &SchedulerConfig {
+        &self.config
+    }
+
+    pub fn entities(&self) -> &[Entity] {
+        &self.entities
+    }
+
+    /// Replace the config, discarding the previous results if it changed
+    pub fn set_config(&mut self, config: SchedulerConfig) {
+        if config != self.config {
+            self.config = config;
+            self.solved.clear();
+        }
+    }
+
+    /// Replace all the entities (components left unchanged are not re-solved)
+    pub fn set_entities(&mut self, entities: Vec<Entity>) {
+        self.entities = entities;
+    }
+
+    pub fn add_entity(&mut self, entity: Entity) {
+        self.entities.push(entity);
+    }
+
+    /// Remove an entity by name, returning whether it was present
+    pub fn remove_entity(&mut self, name: &str) -> bool {
+        let before = self.entities.len();
+        self.entities.retain(|e| &*e.name != name);
+        self.entities.len() != before
+    }
+
+    /// Replace the constraints of an entity
+    pub fn set_constraints(
+        &mut self,
+        name: &str,
+        constraints: Vec<ConstraintExpr>,
+    ) -> Result<(), String> {
+        match self.entities.iter_mut().find(|e| &*e.name == name) {
+            Some(entity) => {
+                entity.constraints = constraints;
+                Ok(())
+            }
+            None => Err(format!("No entity named '{}' in the session", name)),
+        }
+    }
+
+    /// Solve the current entities, re-solving only the components that changed
+    /// since the last solve (a timed out component is always re-solved)
+    pub fn solve(&mut self, debug_enabled: bool) -> Result<ScheduleResult, String> {
+        // Multi-day schedules share components between days already
+        if horizon::needed(&self.entities, &self.config) {
+            self.solved.clear();
+            return solve_schedule(self.entities.clone(), self.config.clone(), debug_enabled);
+        }
+        let parts = split_components(self.entities.clone(), debug_enabled);
+        let previous = &self.solved;
+        let config = &self.config;
+
+        let solved = parts
+            .into_par_iter()
+            .map(|part| {
+                let cached = previous.iter().find(|(entities, result)| {
+                    *entities == part && result.status != ScheduleStatus::TimedOut
+                });
+                let result = match cached {
+                    Some((_, result)) => result.clone(),
+                    None => {
+                        let start: Vec<ScheduledEvent> = previous
+                            .iter()
+                            .flat_map(|(_, r)| &r.scheduled_events)
+                            .filter(|ev| part.iter().any(|e| *e.name == *ev.entity_name))
+                            .cloned()
+                            .collect();
+                        solve_component_from(part.clone(), config, debug_enabled, &start)?
+                    }
+                };
+                Ok((part, result, cached.is_none()))
+            })
+            .collect::<Result<Vec<_>, String>>()?;
+
+        if debug_enabled {
+            let n_solved = solved.iter().filter(|(_, _, fresh)| *fresh).count();
+            eprintln!(
+                "--- Session: re-solved {} of {} components ---",
+                n_solved,
+                solved.len()
+            );
+        }
+
+        self.solved = solved
+            .into_iter()
+            .map(|(part, result, _)| (part, result))
+            .collect();
+        Ok(merge_results(
+            self.solved.iter().map(|(_, r)| r.clone()).collect(),
+        ))
+    }
+}
@@ -1,14 +1,26 @@
+#[cfg(any(feature = "highs", feature = "coin_cbc"))]
+use good_lp::solvers::{WithInitialSolution, WithMipGap, WithTimeLimit};
 use good_lp::{
-    constraint, default_solver, variable, variables, Constraint, Expression, ProblemVariables,
-    Solution, SolverModel, Variable,
+    constraint, variable, variables, Constraint, Expression, ProblemVariables, ResolutionError,
+    Solution, SolutionStatus, SolverModel, Variable, VariableDefinition,
 };
+use rayon::prelude::*;
 use std::collections::{HashMap, HashSet};
+use std::sync::mpsc::{self, RecvTimeoutError};
+use std::sync::{Condvar, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
+use tracing::{debug_span, instrument, trace_span};
 
+use crate::components::{constraint_components, RefIndex};
 use crate::domain::{
-    c2str, ClockVar, ConstraintRef, ConstraintType, Entity, ScheduleResult, ScheduleStrategy,
-    ScheduledEvent, SchedulerConfig, WindowSpec,
+    ClockVar, ConstraintRef, ConstraintType, Entity, Interner, ScheduleResult, ScheduleStatus,
+    ScheduleStrategy, ScheduledEvent, SchedulerConfig, SolveStats, SolverBackend, SolverEngine,
+    SymbolId, WindowFormulation, WindowSpec,
 };
-use crate::parse;
+use crate::presolve::{self, Candidates, ClockBounds, Link};
+use crate::trace::{ConstraintKind, ConstraintSink, ConstraintTrace};
+use crate::{horizon, parse, propagation};
 
 // Custom structure to track penalty variables for better reporting
 struct PenaltyVar {
@@ -17,24 +29,91 @@ struct PenaltyVar {
     var: Variable,
 }
 
+/// The variables of a model, counting the binaries among them
+struct ModelVariables {
+    vars: ProblemVariables,
+    binaries: usize,
+}
+
+impl ModelVariables {
+    fn new() -> Self {
+        Self {
+            vars: variables!(),
+            binaries: 0,
+        }
+    }
+
+    fn add(&mut self, definition: VariableDefinition) -> Variable {
+        self.vars.add(definition)
+    }
+
+    fn binary(&mut self) -> Variable {
+        self.binaries += 1;
+        self.vars.add(variable().binary())
+    }
+
+    fn len(&self) -> usize {
+        self.vars.len()
+    }
+}
+
 #[derive(Debug, Clone, Copy, PartialEq, Eq)]
 pub enum Direction {
     Before,
     After,
 }
 
+/// Clock bounds, used to prune link candidates and to size each big-M
+struct ModelBounds {
+    clocks: ClockBounds,
+    /// False when presolve found the model infeasible: build it unpruned
+    prune: bool,
+    /// Uniform big-M from the config, in place of the per-constraint values
+    fixed_big_m: Option<f64>,
+}
+
+impl ModelBounds {
+    /// Smallest M such that `a - b >= offset - M` holds whatever the values of a, b
+    fn big_m(&self, a: &ClockVar, b: &ClockVar, offset: f64) -> f64 {
+        self.fixed_big_m.unwrap_or_else(|| {
+            let (a_lo, _) = self.clocks.of(a);
+            let (_, b_hi) = self.clocks.of(b);
+            (offset - (a_lo - b_hi)).max(0.0)
+        })
+    }
+
+    /// Largest distance from a clock to a window, within the clock's bounds
+    fn max_window_distance(&self, cv: &ClockVar, wspec: &WindowSpec) -> f64 {
+        let (lo, hi) = self.clocks.of(cv);
+        let (start, end) = match wspec {
+            WindowSpec::Anchor(a) => (*a as f64, *a as f64),
+            WindowSpec::Range(start, end) => (*start as f64, *end as f64),
+        };
+        (start - lo).max(hi - end).max(0.0)
+    }
+
+    /// Big-M for a window indicator constraint whose tight value is `m`
+    fn window_m(&self, m: f64) -> f64 {
+        self.fixed_big_m.unwrap_or(m.max(0.0))
+    }
+}
+
 /// For each subject clock s, we create binary vars x_{s,o} for every object clock o,
 /// and require sum(x_{s,o}) >= 1.
 /// If x_{s,o} = 1, then we enforce "s is at least 'offset' [Before|After] o".
+///
+/// With presolved clock bounds, objects that can never satisfy the offset get no
+/// binary, a link left with one candidate becomes a plain constraint, and a subject
+/// that satisfies it whatever the schedule gets nothing at all.
 fn apply_min_offset_at_least_one(
-    builder: &mut ProblemVariables,
-    add_constraint: &mut dyn FnMut(&str, Constraint),
+    builder: &mut ModelVariables,
+    sink: &mut ConstraintSink,
     direction: Direction,
     subjects: &[ClockVar],
     objects: &[ClockVar],
     offset_minutes: f64,
-    big_m: f64,
-    label_prefix: &str,
+    bounds: &ModelBounds,
+    names: &Interner,
 ) {
     // If no object clocks, do nothing or optionally log a warning:
     if objects.is_empty() {
@@ -42,12 +121,46 @@ fn apply_min_offset_at_least_one(
     }
 
     for s_cv in subjects {
+        let candidates = if bounds.prune {
+            bounds
+                .clocks
+                .candidates(direction, s_cv, objects, offset_minutes)
+        } else {
+            Candidates::Choice((0..objects.len()).collect())
+        };
+        let candidates = match candidates {
+            Candidates::Satisfied => continue,
+            Candidates::Forced(k) => {
+                let o_cv = &objects[k];
+                match direction {
+                    Direction::After => {
+                        sink.add(constraint!(s_cv.var - o_cv.var >= offset_minutes), || {
+                            ConstraintTrace::clock(ConstraintKind::After, s_cv, names)
+                                .against(o_cv, names)
+                                .value(offset_minutes)
+                        });
+                    }
+                    Direction::Before => {
+                        sink.add(constraint!(o_cv.var - s_cv.var >= offset_minutes), || {
+                            ConstraintTrace::clock(ConstraintKind::Before, s_cv, names)
+                                .against(o_cv, names)
+                                .value(offset_minutes)
+                        });
+                    }
+                }
+                continue;
+            }
+            Candidates::Choice(ks) => ks,
+            // Presolve returns no bounds for an infeasible model, so this is unreachable
+            Candidates::Infeasible => Vec::new(),
+        };
+
         // We'll gather up the x_{s,o} for each object
-        let mut x_vars = Vec::with_capacity(objects.len());
+        let mut x_vars = Vec::with_capacity(candidates.len());
 
-        for o_cv in objects {
+        for o_cv in candidates.iter().map(|&k| &objects[k]) {
             // Create a binary var x_{s,o}
-            let x_so = builder.add(variable().binary());
+            let x_so = builder.binary();
             x_vars.push(x_so);
 
             // The big-M constraint depends on direction
@@ -55,29 +168,27 @@ fn apply_min_offset_at_least_one(
             // - BEFORE => s_cv.var + offset <= o_cv.var (equivalently o_cv.var - s_cv.var >= offset)
             match direction {
                 Direction::After => {
-                    let desc = format!(
-                        "({label_prefix}) after: {} >= {} + {} if x_so=1",
-                        c2str(s_cv),
-                        c2str(o_cv),
-                        offset_minutes
-                    );
                     // s - o >= offset - M*(1 - x)
-                    add_constraint(
-                        &desc,
+                    let big_m = bounds.big_m(s_cv, o_cv, offset_minutes);
+                    sink.add(
                         constraint!(s_cv.var - o_cv.var >= offset_minutes - big_m * (1.0 - x_so)),
+                        || {
+                            ConstraintTrace::clock(ConstraintKind::AfterSome, s_cv, names)
+                                .against(o_cv, names)
+                                .value(offset_minutes)
+                        },
                     );
                 }
                 Direction::Before => {
-                    let desc = format!(
-                        "({label_prefix}) before: {} + {} <= {} if x_so=1",
-                        c2str(s_cv),
-                        offset_minutes,
-                        c2str(o_cv)
-                    );
                     // o - s >= offset - M*(1 - x)
-                    add_constraint(
-                        &desc,
+                    let big_m = bounds.big_m(o_cv, s_cv, offset_minutes);
+                    sink.add(
                         constraint!(o_cv.var - s_cv.var >= offset_minutes - big_m * (1.0 - x_so)),
+                        || {
+                            ConstraintTrace::clock(ConstraintKind::BeforeSome, s_cv, names)
+                                .against(o_cv, names)
+                                .value(offset_minutes)
+                        },
                     );
                 }
             }
@@ -88,108 +199,381 @@ fn apply_min_offset_at_least_one(
         for x_so in x_vars {
             sum_expr += x_so;
         }
-        let desc = format!(
-            "({label_prefix}) sum_x_{} >= 1 => subject {} must link to at least one object",
-            s_cv.instance,
-            c2str(s_cv)
-        );
-        add_constraint(&desc, constraint!(sum_expr >= 1.0));
+        sink.add(constraint!(sum_expr >= 1.0), || {
+            ConstraintTrace::clock(ConstraintKind::LinkAtLeastOne, s_cv, names)
+        });
     }
 }
 
 /// Main scheduling function that takes entities and config, returns optimized schedule
+///
+/// Entities are first split into connected components of the constraint graph:
+/// components never constrain one another and the objective is a sum over them,
+/// so each is solved as its own (much smaller) MILP, in parallel, and the results
+/// are merged.
+#[instrument(skip_all, fields(entities = entities.len()))]
 pub fn solve_schedule(
     entities: Vec<Entity>,
     config: SchedulerConfig,
     debug_enabled: bool,
 ) -> Result<ScheduleResult, String> {
-    // Build category->entities map
-    let mut category_map = HashMap::new();
-    for e in &entities {
-        category_map
-            .entry(e.category.clone())
-            .or_insert_with(HashSet::new)
-            .insert(e.name.clone());
-    }
-
-    // Create variables for each entity instance, within [start..end]
-    let mut builder = variables!();
-    let mut clock_map = HashMap::new();
-    for e in &entities {
-        let count = e.frequency.instances_per_day();
-        for i in 0..count {
-            let cname = format!("{}_{}", e.name, i + 1);
-            let var = builder.add(
-                variable()
-                    .integer()
-                    .min(config.day_start_minutes as f64)
-                    .max(config.day_end_minutes as f64),
-            );
-            clock_map.insert(
-                cname,
-                ClockVar {
-                    entity_name: e.name.clone(),
-                    instance: i + 1,
-                    var,
-                },
-            );
-        }
+    if horizon::needed(&entities, &config) {
+        return horizon::solve_horizon(entities, &config, debug_enabled);
     }
 
-    // We collect constraints here
-    let mut constraints = Vec::new();
+    let mut parts = split_components(entities, debug_enabled);
+    if parts.len() <= 1 {
+        return solve_component(parts.pop().unwrap_or_default(), &config, debug_enabled);
+    }
 
-    // Add constraint debug helper
-    let mut add_constraint = |desc: &str, c: Constraint| {
-        if debug_enabled {
-            eprintln!("DEBUG => {desc}");
-        }
-        constraints.push(c);
+    let results = parts
+        .into_par_iter()
+        .map(|part| solve_component(part, &config, debug_enabled))
+        .collect::<Result<Vec<_>, String>>()?;
+
+    Ok(merge_results(results))
+}
+
+/// Split entities into the connected components of their constraint graph
+#[instrument(level = "debug", skip_all, fields(entities = entities.len()))]
+pub(crate) fn split_components(entities: Vec<Entity>, debug_enabled: bool) -> Vec<Vec<Entity>> {
+    let components = constraint_components(&entities);
+    if components.len() <= 1 {
+        return vec![entities];
+    }
+
+    if debug_enabled {
+        eprintln!(
+            "--- Split {} entities into {} independent components ---",
+            entities.len(),
+            components.len()
+        );
+    }
+
+    let mut slots: Vec<Option<Entity>> = entities.into_iter().map(Some).collect();
+    components
+        .iter()
+        .map(|c| c.iter().filter_map(|&i| slots[i].take()).collect())
+        .collect()
+}
+
+/// Combine the results of independently solved components into one schedule
+pub(crate) fn merge_results(results: Vec<ScheduleResult>) -> ScheduleResult {
+    let mut scheduled_events = Vec::new();
+    let mut total_penalty = 0.0;
+    let mut window_usage = Vec::new();
+    let mut engine = SolverEngine::Propagation;
+    let mut constraint_trace = Vec::new();
+    let mut stats = SolveStats {
+        objective: Some(0.0),
+        nodes: Some(0),
+        ..SolveStats::default()
     };
+    let mut status = ScheduleStatus::Optimal;
+    for r in results {
+        scheduled_events.extend(r.scheduled_events);
+        total_penalty += r.total_penalty;
+        window_usage.extend(r.window_usage);
+        constraint_trace.extend(r.constraint_trace);
+        status = status.max(r.status);
+        stats.backend = stats.backend.or(r.stats.backend);
+        stats.variables += r.stats.variables;
+        stats.binaries += r.stats.binaries;
+        stats.constraints += r.stats.constraints;
+        stats.parse_time_ms += r.stats.parse_time_ms;
+        stats.build_time_ms += r.stats.build_time_ms;
+        stats.solve_time_ms += r.stats.solve_time_ms;
+        stats.extract_time_ms += r.stats.extract_time_ms;
+        stats.objective = stats.objective.zip(r.stats.objective).map(|(a, b)| a + b);
+        stats.nodes = stats.nodes.zip(r.stats.nodes).map(|(a, b)| a + b);
+        if r.engine == SolverEngine::Milp {
+            engine = SolverEngine::Milp;
+        }
+    }
 
-    // Make a map: entity -> [its clockvars]
-    let mut entity_clocks: HashMap<String, Vec<ClockVar>> = HashMap::new();
-    for cv in clock_map.values() {
-        entity_clocks
-            .entry(cv.entity_name.clone())
-            .or_default()
-            .push(cv.clone());
+    // One infeasible component makes the whole schedule infeasible
+    if status == ScheduleStatus::Infeasible {
+        scheduled_events.clear();
+        window_usage.clear();
+        total_penalty = 0.0;
     }
-    for list in entity_clocks.values_mut() {
-        list.sort_by_key(|c| c.instance);
+
+    // Sort events by time for better display
+    scheduled_events.sort_by_key(|e| e.time_minutes);
+
+    ScheduleResult {
+        scheduled_events,
+        total_penalty,
+        window_usage,
+        engine,
+        status,
+        constraint_trace,
+        stats,
     }
+}
 
-    // Helper to resolve references: either an entity name or a category
-    let resolve_ref = |rstr: &str| -> Vec<ClockVar> {
-        let mut out = Vec::new();
-        for e in &entities {
-            if e.name.eq_ignore_ascii_case(rstr) {
-                if let Some(cl) = entity_clocks.get(&e.name) {
-                    out.extend(cl.clone());
-                }
+/// Start and end of a window, in minutes
+fn window_span(w: &WindowSpec) -> (f64, f64) {
+    match *w {
+        WindowSpec::Anchor(a) => (a as f64, a as f64),
+        WindowSpec::Range(start, end) => (start as f64, end as f64),
+    }
+}
+
+/// Rank of each window by time, if an entity with `n` instances uses its windows in
+/// that order: the windows must be at least as many as the instances, and far enough
+/// apart (beyond the tolerance) that no instance is near two of them at once
+fn ordered_window_ranks(n: usize, windows: &[WindowSpec], tolerance: f64) -> Option<Vec<usize>> {
+    if n < 2 || n > windows.len() {
+        return None;
+    }
+    let mut order: Vec<usize> = (0..windows.len()).collect();
+    order.sort_by(|&a, &b| {
+        window_span(&windows[a])
+            .0
+            .total_cmp(&window_span(&windows[b]).0)
+    });
+    let separated = order
+        .windows(2)
+        .all(|w| window_span(&windows[w[1]]).0 - window_span(&windows[w[0]]).1 > 2.0 * tolerance);
+    if !separated {
+        return None;
+    }
+    let mut ranks = vec![0; windows.len()];
+    for (rank, &w_idx) in order.iter().enumerate() {
+        ranks[w_idx] = rank;
+    }
+    Some(ranks)
+}
+
+/// Groups of entities (by index, in order) that any schedule could swap: the same
+/// category, frequency, constraints and windows, with distinct names that no
+/// constraint refers to
+fn interchangeable_entities(entities: &[Entity]) -> Vec<Vec<usize>> {
+    let named: Vec<String> = entities
+        .iter()
+        .flat_map(|e| &e.constraints)
+        .filter_map(|c| match &c.cref {
+            ConstraintRef::Unresolved(r) => Some(r.to_ascii_lowercase()),
+            ConstraintRef::WithinGroup => None,
+        })
+        .collect();
+    let mut seen = HashSet::new();
+    let repeated: HashSet<String> = entities
+        .iter()
+        .map(|e| e.name.to_ascii_lowercase())
+        .filter(|name| !seen.insert(name.clone()))
+        .collect();
+    let candidates: Vec<usize> = (0..entities.len())
+        .filter(|&i| {
+            let name = entities[i].name.to_ascii_lowercase();
+            !named.contains(&name) && !repeated.contains(&name)
+        })
+        .collect();
+
+    let mut groups: Vec<Vec<usize>> = Vec::new();
+    for i in candidates {
+        let e = &entities[i];
+        let same = |g: &&mut Vec<usize>| {
+            let other = &entities[g[0]];
+            other.category == e.category
+                && other.frequency == e.frequency
+                && other.constraints == e.constraints
+                && other.windows == e.windows
+        };
+        match groups.iter_mut().find(same) {
+            Some(group) => group.push(i),
+            None => groups.push(vec![i]),
+        }
+    }
+    groups.retain(|g| g.len() > 1);
+    groups
+}
+
+/// Solve a single (connected) set of entities, by propagation when the constraints
+/// are simple enough, otherwise by building and solving a MILP
+pub(crate) fn solve_component(
+    entities: Vec<Entity>,
+    config: &SchedulerConfig,
+    debug_enabled: bool,
+) -> Result<ScheduleResult, String> {
+    solve_component_from(entities, config, debug_enabled, &[])
+}
+
+/// Solve a single (connected) set of entities as `solve_component` does, giving the
+/// MILP solver the times of `start` (e.g. a previous schedule) as its starting point
+#[instrument(skip_all, fields(entities = entities.len(), start = start.len()))]
+pub(crate) fn solve_component_from(
+    entities: Vec<Entity>,
+    config: &SchedulerConfig,
+    debug_enabled: bool,
+    start: &[ScheduledEvent],
+) -> Result<ScheduleResult, String> {
+    if propagation::supports(&entities, config) {
+        let propagated =
+            debug_span!("propagation").in_scope(|| propagation::solve(&entities, config));
+        if let Some(result) = propagated {
+            if debug_enabled {
+                eprintln!(
+                    "--- Scheduled {} entities by propagation (no MILP) ---",
+                    entities.len()
+                );
             }
+            return Ok(result);
         }
-        if !out.is_empty() {
-            return out;
+    }
+
+    let mut model = build_model(entities, config, debug_enabled);
+    model.warm_start(start);
+    model.solve(config, debug_enabled)
+}
+
+/// A MILP built for one connected set of entities, ready to be solved
+pub struct ScheduleModel {
+    entities: Vec<Entity>,
+    names: Interner,
+    builder: ModelVariables,
+    objective: Expression,
+    constraints: Vec<Constraint>,
+    constraint_trace: Vec<ConstraintTrace>,
+    entity_clocks: Vec<Vec<ClockVar>>,
+    penalty_vars: Vec<PenaltyVar>,
+    window_usage_vars: Vec<(usize, HashMap<(usize, usize), Variable>)>,
+    build_time_ms: f64,
+    /// Starting values of clock variables, passed to the solver as a MIP start
+    start: Vec<(Variable, f64)>,
+}
+
+/// Build the MILP for a single (connected) set of entities, without trying the
+/// propagation fast path or splitting it into components
+#[instrument(skip_all, fields(entities = entities.len()))]
+pub fn build_model(
+    entities: Vec<Entity>,
+    config: &SchedulerConfig,
+    debug_enabled: bool,
+) -> ScheduleModel {
+    let build_start = Instant::now();
+
+    // Intern entity names: clocks and window-usage tables are indexed by name id
+    let mut names = Interner::new();
+    let entity_ids: Vec<SymbolId> = entities.iter().map(|e| names.intern(&e.name)).collect();
+    let refs = RefIndex::new(&entities);
+
+    // Helper to resolve references: either an entity name or a category
+    let resolve_ids = |rstr: &str| -> Vec<SymbolId> {
+        let mut ids: Vec<SymbolId> = refs.resolve(rstr).iter().map(|&i| entity_ids[i]).collect();
+        ids.sort_unstable();
+        ids.dedup();
+        ids
+    };
+
+    // Presolve: instance counts, "apart" gaps and before/after links per entity id
+    // (a repeated entity name reuses the same instance slots)
+    let mut counts = vec![0; names.len()];
+    let mut gaps = vec![0.0; names.len()];
+    let mut wraps: Vec<Option<f64>> = vec![None; names.len()];
+    let mut links = Vec::new();
+    for (e, &id) in entities.iter().zip(&entity_ids) {
+        counts[id as usize] = counts[id as usize].max(e.frequency.instances_per_day());
+        if let Some(period) = e.wrap_minutes {
+            wraps[id as usize] = Some(f64::from(period));
         }
-        if let Some(nameset) = category_map.get(rstr) {
-            for nm in nameset {
-                if let Some(cl) = entity_clocks.get(nm) {
-                    out.extend(cl.clone());
+        for cexpr in &e.constraints {
+            let tv_min = (cexpr.time_hours as f64) * 60.0;
+            let direction = match cexpr.ctype {
+                ConstraintType::Apart => {
+                    gaps[id as usize] = f64::max(gaps[id as usize], tv_min);
+                    continue;
                 }
+                ConstraintType::Before => Direction::Before,
+                ConstraintType::After => Direction::After,
+                ConstraintType::ApartFrom => continue,
+            };
+            if let ConstraintRef::Unresolved(r) = &cexpr.cref {
+                links.push(Link {
+                    direction,
+                    subject: id,
+                    objects: resolve_ids(r),
+                    offset: tv_min,
+                });
             }
         }
-        out
+    }
+    let day_start = config.day_start_minutes as f64;
+    let day_end = config.day_end_minutes as f64;
+    let presolved = presolve::presolve(&counts, &gaps, &links, day_start, day_end, &wraps);
+    if debug_enabled && presolved.is_none() {
+        eprintln!("--- Presolve found the model infeasible, building it unpruned ---");
+    }
+    let bounds = ModelBounds {
+        prune: presolved.is_some(),
+        clocks: presolved.unwrap_or_else(|| ClockBounds::uniform(&counts, day_start, day_end)),
+        fixed_big_m: config.big_m,
     };
 
-    let big_m = 1440.0;
+    // Create variables for each entity instance, within its presolved bounds
+    // (a repeated entity name reuses, and overwrites, the same instance slots)
+    let span = debug_span!("clock_variables").entered();
+    let mut builder = ModelVariables::new();
+    let mut entity_clocks: Vec<Vec<ClockVar>> = vec![Vec::new(); names.len()];
+    for (e, &id) in entities.iter().zip(&entity_ids) {
+        let count = e.frequency.instances_per_day();
+        let clocks = &mut entity_clocks[id as usize];
+        for i in 0..count {
+            let (lo, hi) = bounds.clocks.get(id, i + 1);
+            let var = builder.add(variable().integer().min(lo).max(hi));
+            let cv = ClockVar {
+                entity: id,
+                instance: i + 1,
+                var,
+            };
+            if i < clocks.len() {
+                clocks[i] = cv;
+            } else {
+                clocks.push(cv);
+            }
+        }
+    }
+
+    drop(span);
+
+    // We collect constraints here (with a trace record of each, only when debugging)
+    let mut sink = ConstraintSink::new(debug_enabled);
+
+    // Clocks of the entities a reference resolves to
+    let resolve_ref = |rstr: &str| -> Vec<ClockVar> {
+        let _span = trace_span!("resolve_ref", reference = rstr).entered();
+        resolve_ids(rstr)
+            .iter()
+            .flat_map(|&id| entity_clocks[id as usize].iter().copied())
+            .collect()
+    };
 
     // (1) Apply "apart/before/after" constraints
-    for e in &entities {
-        let eclocks = match entity_clocks.get(&e.name) {
-            Some(list) => list,
-            None => continue,
-        };
+    let span = debug_span!("link_constraints", links = links.len()).entered();
+    for link in &links {
+        let objects: Vec<ClockVar> = link
+            .objects
+            .iter()
+            .flat_map(|&id| entity_clocks[id as usize].iter().copied())
+            .collect();
+        apply_min_offset_at_least_one(
+            &mut builder,
+            &mut sink,
+            link.direction,
+            &entity_clocks[link.subject as usize], // subject
+            &objects,                              // object
+            link.offset,
+            &bounds,
+            &names,
+        );
+    }
+    drop(span);
+
+    let span = debug_span!("entity_constraints").entered();
+    for (e, &id) in entities.iter().zip(&entity_ids) {
+        let eclocks = &entity_clocks[id as usize];
+        let wrap = wraps[id as usize];
 
         let ba_map: HashMap<String, (Option<f64>, Option<f64>)> = HashMap::new();
         let mut apart_intervals = Vec::new();
@@ -206,46 +590,29 @@ pub fn solve_schedule(
                         apart_from_list.push((tv_min, r.clone()));
                     }
                 }
-                ConstraintType::Before => {
-                    if let ConstraintRef::Unresolved(r) = &cexpr.cref {
-                        let objects = resolve_ref(r);
-                        apply_min_offset_at_least_one(
-                            &mut builder,
-                            &mut add_constraint,
-                            Direction::Before,
-                            &eclocks, // subject
-                            &objects, // object
-                            tv_min,
-                            big_m,
-                            "BeforeSome",
-                        );
-                    }
-                }
-                ConstraintType::After => {
-                    if let ConstraintRef::Unresolved(r) = &cexpr.cref {
-                        let objects = resolve_ref(r);
-                        apply_min_offset_at_least_one(
-                            &mut builder,
-                            &mut add_constraint,
-                            Direction::After,
-                            &eclocks, // subject
-                            &objects, // object
-                            tv_min,
-                            big_m,
-                            "AfterSome",
-                        );
-                    }
-                }
+                // Linked above, with presolve pruning
+                ConstraintType::Before | ConstraintType::After => {}
             }
         }
 
-        // (a) "apart" for consecutive instances
+        // (a) "apart" for consecutive instances (and from the last to the first
+        // instance of the next period, when the schedule repeats)
         for tv in apart_intervals {
             for w in eclocks.windows(2) {
                 let c1 = &w[0];
                 let c2 = &w[1];
-                let desc = format!("(Apart) {} - {} >= {}", c2str(c2), c2str(c1), tv);
-                add_constraint(&desc, constraint!(c2.var - c1.var >= tv));
+                sink.add(constraint!(c2.var - c1.var >= tv), || {
+                    ConstraintTrace::clock(ConstraintKind::Apart, c2, &names)
+                        .against(c1, &names)
+                        .value(tv)
+                });
+            }
+            if let (Some(period), [first, .., last]) = (wrap, eclocks.as_slice()) {
+                sink.add(constraint!(first.var - last.var >= tv - period), || {
+                    ConstraintTrace::clock(ConstraintKind::Apart, first, &names)
+                        .against(last, &names)
+                        .value(tv - period)
+                });
             }
         }
 
@@ -254,25 +621,40 @@ pub fn solve_schedule(
             let rvars = resolve_ref(&refname);
             for c_e in eclocks {
                 for c_r in &rvars {
-                    let b = builder.add(variable().binary());
-                    let d1 = format!(
-                        "(ApartFrom) {} - {} >= {} - bigM*(1-b)",
-                        c2str(c_r),
-                        c2str(c_e),
-                        tv
-                    );
-                    add_constraint(
-                        &d1,
-                        constraint!(c_r.var - c_e.var >= tv - big_m * (1.0 - b)),
+                    let b = builder.binary();
+                    let m_after = bounds.big_m(c_r, c_e, tv);
+                    let m_before = bounds.big_m(c_e, c_r, tv);
+                    sink.add(
+                        constraint!(c_r.var - c_e.var >= tv - m_after * (1.0 - b)),
+                        || {
+                            ConstraintTrace::clock(ConstraintKind::ApartFromAfter, c_e, &names)
+                                .against(c_r, &names)
+                                .value(tv)
+                        },
                     );
-
-                    let d2 = format!(
-                        "(ApartFrom) {} - {} >= {} - bigM*b",
-                        c2str(c_e),
-                        c2str(c_r),
-                        tv
-                    );
-                    add_constraint(&d2, constraint!(c_e.var - c_r.var >= tv - big_m * b));
+                    sink.add(constraint!(c_e.var - c_r.var >= tv - m_before * b), || {
+                        ConstraintTrace::clock(ConstraintKind::ApartFromBefore, c_e, &names)
+                            .against(c_r, &names)
+                            .value(tv)
+                    });
+
+                    // Across the wrap: the referenced clock of the next period is after
+                    // this one (if it repeats), and this one of the next period is after
+                    // the referenced clock (if this entity repeats)
+                    if let Some(period) = wraps[c_r.entity as usize] {
+                        sink.add(constraint!(c_r.var - c_e.var >= tv - period), || {
+                            ConstraintTrace::clock(ConstraintKind::ApartFromAfter, c_e, &names)
+                                .against(c_r, &names)
+                                .value(tv - period)
+                        });
+                    }
+                    if let Some(period) = wrap {
+                        sink.add(constraint!(c_e.var - c_r.var >= tv - period), || {
+                            ConstraintTrace::clock(ConstraintKind::ApartFromBefore, c_e, &names)
+                                .against(c_r, &names)
+                                .value(tv - period)
+                        });
+                    }
                 }
             }
         }
@@ -285,25 +667,26 @@ pub fn solve_schedule(
                     // "≥bv before" OR "≥av after" disjunction
                     for c_e in eclocks {
                         for c_r in &rvars {
-                            let b = builder.add(variable().binary());
-                            let d1 = format!(
-                                "(Before|After) {} - {} >= {} - M*(1-b)",
-                                c2str(c_r),
-                                c2str(c_e),
-                                bv
+                            let b = builder.binary();
+                            let m_before = bounds.big_m(c_r, c_e, bv);
+                            let m_after = bounds.big_m(c_e, c_r, av);
+                            sink.add(
+                                constraint!(c_r.var - c_e.var >= bv - m_before * (1.0 - b)),
+                                || {
+                                    ConstraintTrace::clock(
+                                        ConstraintKind::EitherBefore,
+                                        c_e,
+                                        &names,
+                                    )
+                                    .against(c_r, &names)
+                                    .value(bv)
+                                },
                             );
-                            add_constraint(
-                                &d1,
-                                constraint!(c_r.var - c_e.var >= bv - big_m * (1.0 - b)),
-                            );
-
-                            let d2 = format!(
-                                "(Before|After) {} - {} >= {} - M*b",
-                                c2str(c_e),
-                                c2str(c_r),
-                                av
-                            );
-                            add_constraint(&d2, constraint!(c_e.var - c_r.var >= av - big_m * b));
+                            sink.add(constraint!(c_e.var - c_r.var >= av - m_after * b), || {
+                                ConstraintTrace::clock(ConstraintKind::EitherAfter, c_e, &names)
+                                    .against(c_r, &names)
+                                    .value(av)
+                            });
                         }
                     }
                 }
@@ -311,8 +694,11 @@ pub fn solve_schedule(
                     // only "before"
                     for c_e in eclocks {
                         for c_r in &rvars {
-                            let d = format!("(Before) {} - {} >= {}", c2str(c_r), c2str(c_e), bv);
-                            add_constraint(&d, constraint!(c_r.var - c_e.var >= bv));
+                            sink.add(constraint!(c_r.var - c_e.var >= bv), || {
+                                ConstraintTrace::clock(ConstraintKind::Before, c_e, &names)
+                                    .against(c_r, &names)
+                                    .value(bv)
+                            });
                         }
                     }
                 }
@@ -320,8 +706,11 @@ pub fn solve_schedule(
                     // only "after"
                     for c_e in eclocks {
                         for c_r in &rvars {
-                            let d = format!("(After) {} - {} >= {}", c2str(c_e), c2str(c_r), av);
-                            add_constraint(&d, constraint!(c_e.var - c_r.var >= av));
+                            sink.add(constraint!(c_e.var - c_r.var >= av), || {
+                                ConstraintTrace::clock(ConstraintKind::After, c_e, &names)
+                                    .against(c_r, &names)
+                                    .value(av)
+                            });
                         }
                     }
                 }
@@ -330,7 +719,10 @@ pub fn solve_schedule(
         }
     }
 
+    drop(span);
+
     // (2) SOFT penalty for window preferences
+    let span = debug_span!("window_penalties").entered();
     // Use the penalty weight from config
     let alpha = config.penalty_weight;
 
@@ -344,10 +736,10 @@ pub fn solve_schedule(
     // Track penalty variables for better reporting
     let mut penalty_vars: Vec<PenaltyVar> = Vec::new();
 
-    // Track which windows are used by which instances
-    let mut window_usage_vars: HashMap<String, HashMap<(usize, usize), Variable>> = HashMap::new();
+    // Track which windows are used by which instances, per entity index
+    let mut window_usage_vars: Vec<(usize, HashMap<(usize, usize), Variable>)> = Vec::new();
 
-    for e in &entities {
+    for (e_idx, (e, &id)) in entities.iter().zip(&entity_ids).enumerate() {
         // Skip entities with no windows - they won't have penalties
         if e.windows.is_empty() {
             continue;
@@ -358,14 +750,54 @@ pub fn solve_schedule(
         }
 
         // Get clock variables for this entity
-        let eclocks = match entity_clocks.get(&e.name) {
-            Some(list) => list,
-            None => continue,
-        };
+        let eclocks = &entity_clocks[id as usize];
 
         // If we have multiple instances and multiple windows, track window usage
         let track_window_usage = eclocks.len() > 1 && e.windows.len() > 1;
         let mut instance_window_vars = HashMap::new();
+        let window_ranks = ordered_window_ranks(eclocks.len(), &e.windows, config.window_tolerance);
+
+        // Ordered formulation: each instance picks one of its reachable windows, and its
+        // clock and penalty are bounded by that window's edges as linear expressions in
+        // the picks (exact, since the distribution constraints below pick exactly one)
+        if let (WindowFormulation::Ordered, Some(ranks)) =
+            (config.window_formulation, &window_ranks)
+        {
+            let tol = config.window_tolerance;
+            for cv in eclocks {
+                let p_i = builder.add(variable().min(0.0));
+                penalty_vars.push(PenaltyVar { var: p_i });
+
+                let i = cv.instance - 1;
+                let mut start_expr = Expression::from(0.0);
+                let mut end_expr = Expression::from(0.0);
+                for (w_idx, wspec) in e.windows.iter().enumerate() {
+                    if ranks[w_idx] < i || ranks[w_idx] + eclocks.len() > e.windows.len() + i {
+                        continue;
+                    }
+                    let use_var = builder.binary();
+                    instance_window_vars.insert((cv.instance, w_idx), use_var);
+                    let (start, end) = window_span(wspec);
+                    start_expr += start * use_var;
+                    end_expr += end * use_var;
+                }
+
+                sink.add(constraint!(cv.var >= start_expr.clone() - tol), || {
+                    ConstraintTrace::clock(ConstraintKind::InChosenWindow, cv, &names).value(tol)
+                });
+                sink.add(constraint!(cv.var <= end_expr.clone() + tol), || {
+                    ConstraintTrace::clock(ConstraintKind::InChosenWindow, cv, &names).value(tol)
+                });
+                sink.add(constraint!(p_i >= start_expr - cv.var), || {
+                    ConstraintTrace::clock(ConstraintKind::PenaltyToChosen, cv, &names)
+                });
+                sink.add(constraint!(p_i >= cv.var - end_expr), || {
+                    ConstraintTrace::clock(ConstraintKind::PenaltyToChosen, cv, &names)
+                });
+            }
+            window_usage_vars.push((e_idx, instance_window_vars));
+            continue;
+        }
 
         // Process each clock variable (instance) for this entity
         for cv in eclocks {
@@ -379,14 +811,40 @@ pub fn solve_schedule(
                 var: p_i,
             });
 
+            // Without window usage tracking, p_i is tied to every distance variable, so
+            // they all share one value: bound each by the furthest window, not its own
+            let shared_max_dist = e
+                .windows
+                .iter()
+                .map(|wspec| bounds.max_window_distance(cv, wspec))
+                .fold(config.window_tolerance, f64::max);
+
             // Create one distance variable for each window
             for (w_idx, wspec) in e.windows.iter().enumerate() {
-                let dist_iw = builder.add(variable().min(0.0));
+                // No schedule puts the clock further from the window than this (the
+                // bound must stay above the tolerance, so the window can go unused)
+                let max_dist = bounds
+                    .max_window_distance(cv, wspec)
+                    .max(config.window_tolerance);
+                let dist_max = if track_window_usage {
+                    max_dist
+                } else {
+                    shared_max_dist
+                };
+                let dist_iw = builder.add(variable().min(0.0).max(dist_max));
+
+                // Instances use the windows in order (when no instance can be near two
+                // windows at once), so instance i (from 0) of n can only use one of the
+                // windows ranked i..=k-n+i by time
+                let usable = window_ranks.as_ref().map_or(true, |ranks| {
+                    let i = cv.instance - 1;
+                    ranks[w_idx] >= i && ranks[w_idx] + eclocks.len() <= e.windows.len() + i
+                });
 
                 // For window distribution tracking
-                if track_window_usage {
+                if track_window_usage && usable {
                     // Create binary variable indicating if this instance uses this window
-                    let window_use_var = builder.add(variable().binary());
+                    let window_use_var = builder.binary();
                     instance_window_vars.insert((cv.instance, w_idx), window_use_var);
 
                     // Define "using a window" as being within this many minutes of it
@@ -394,24 +852,26 @@ pub fn solve_schedule(
 
                     // If dist_iw <= use_threshold then window_use_var = 1
                     // Using big-M: dist_iw <= use_threshold + M*(1-window_use_var)
-                    let desc = format!(
-                        "(WinUse) {}_{} uses win{} if dist <= {}",
-                        e.name, cv.instance, w_idx, use_threshold
-                    );
-                    add_constraint(
-                        &desc,
-                        constraint!(dist_iw <= use_threshold + big_m * (1.0 - window_use_var)),
+                    let m_used = bounds.window_m(max_dist - use_threshold);
+                    sink.add(
+                        constraint!(dist_iw <= use_threshold + m_used * (1.0 - window_use_var)),
+                        || {
+                            ConstraintTrace::clock(ConstraintKind::WindowUsed, cv, &names)
+                                .window(w_idx)
+                                .value(use_threshold)
+                        },
                     );
 
                     // If dist_iw > use_threshold then window_use_var = 0
                     // Using big-M: dist_iw >= use_threshold - M*window_use_var
-                    let desc = format!(
-                        "(WinUse) {}_{} doesn't use win{} if dist > {}",
-                        e.name, cv.instance, w_idx, use_threshold
-                    );
-                    add_constraint(
-                        &desc,
-                        constraint!(dist_iw >= use_threshold - big_m * window_use_var),
+                    let m_unused = bounds.window_m(use_threshold);
+                    sink.add(
+                        constraint!(dist_iw >= use_threshold - m_unused * window_use_var),
+                        || {
+                            ConstraintTrace::clock(ConstraintKind::WindowUnused, cv, &names)
+                                .window(w_idx)
+                                .value(use_threshold)
+                        },
                     );
                 }
 
@@ -419,92 +879,83 @@ pub fn solve_schedule(
                     WindowSpec::Anchor(a) => {
                         // For anchors: |t_i - a| represented with two constraints
                         // dist_iw >= t_i - a
-                        let desc = format!(
-                            "(Win+) dist_{}_w{} >= {} - {}",
-                            cv.instance,
-                            w_idx,
-                            c2str(cv),
-                            a
-                        );
-                        add_constraint(&desc, constraint!(dist_iw >= cv.var - (*a as f64)));
+                        sink.add(constraint!(dist_iw >= cv.var - (*a as f64)), || {
+                            ConstraintTrace::clock(ConstraintKind::AnchorAfter, cv, &names)
+                                .window(w_idx)
+                                .value(*a as f64)
+                        });
 
                         // dist_iw >= a - t_i
-                        let desc = format!(
-                            "(Win-) dist_{}_w{} >= {} - {}",
-                            cv.instance,
-                            w_idx,
-                            a,
-                            c2str(cv)
-                        );
-                        add_constraint(&desc, constraint!(dist_iw >= (*a as f64) - cv.var));
+                        sink.add(constraint!(dist_iw >= (*a as f64) - cv.var), || {
+                            ConstraintTrace::clock(ConstraintKind::AnchorBefore, cv, &names)
+                                .window(w_idx)
+                                .value(*a as f64)
+                        });
                     }
                     WindowSpec::Range(start, end) => {
                         // For ranges: 0 if inside, distance to closest edge if outside
                         // dist_iw >= start - t_i (if t_i < start)
-                        let desc = format!(
-                            "(WinS) dist_{}_w{} >= {} - {}",
-                            cv.instance,
-                            w_idx,
-                            start,
-                            c2str(cv)
-                        );
-                        add_constraint(&desc, constraint!(dist_iw >= (*start as f64) - cv.var));
+                        sink.add(constraint!(dist_iw >= (*start as f64) - cv.var), || {
+                            ConstraintTrace::clock(ConstraintKind::RangeStart, cv, &names)
+                                .window(w_idx)
+                                .value(*start as f64)
+                        });
 
                         // dist_iw >= t_i - end (if t_i > end)
-                        let desc = format!(
-                            "(WinE) dist_{}_w{} >= {} - {}",
-                            cv.instance,
-                            w_idx,
-                            c2str(cv),
-                            end
-                        );
-                        add_constraint(&desc, constraint!(dist_iw >= cv.var - (*end as f64)));
+                        sink.add(constraint!(dist_iw >= cv.var - (*end as f64)), || {
+                            ConstraintTrace::clock(ConstraintKind::RangeEnd, cv, &names)
+                                .window(w_idx)
+                                .value(*end as f64)
+                        });
                     }
                 }
 
                 // p_i <= dist_iw => p_i will be minimum distance to any window
-                let desc = format!("(Win) p_{} <= dist_{}_w{}", cv.instance, cv.instance, w_idx);
-                add_constraint(&desc, constraint!(p_i <= dist_iw));
+                sink.add(constraint!(p_i <= dist_iw), || {
+                    ConstraintTrace::clock(ConstraintKind::PenaltyAtMost, cv, &names).window(w_idx)
+                });
 
                 if track_window_usage {
                     // If this window is chosen, force p_i = dist_iw
-                    let window_use_var = instance_window_vars[&(cv.instance, w_idx)];
-                    let desc = format!(
-                        "(Win) p_{} >= dist_{}_w{} - M*(1-use)",
-                        cv.instance, cv.instance, w_idx
-                    );
-                    add_constraint(
-                        &desc,
-                        constraint!(p_i >= dist_iw - big_m * (1.0 - window_use_var)),
-                    );
+                    if let Some(&window_use_var) = instance_window_vars.get(&(cv.instance, w_idx)) {
+                        let m_chosen = bounds.window_m(max_dist);
+                        sink.add(
+                            constraint!(p_i >= dist_iw - m_chosen * (1.0 - window_use_var)),
+                            || {
+                                ConstraintTrace::clock(ConstraintKind::PenaltyChosen, cv, &names)
+                                    .window(w_idx)
+                            },
+                        );
+                    }
                 } else {
                     // For entities with only one window, directly force p_i = dist_iw
-                    let desc =
-                        format!("(Win) p_{} >= dist_{}_w{}", cv.instance, cv.instance, w_idx);
-                    add_constraint(&desc, constraint!(p_i >= dist_iw));
+                    sink.add(constraint!(p_i >= dist_iw), || {
+                        ConstraintTrace::clock(ConstraintKind::PenaltyAtLeast, cv, &names)
+                            .window(w_idx)
+                    });
                 }
             }
         }
 
         // If we're tracking window usage for this entity, save the variables
         if track_window_usage {
-            window_usage_vars.insert(e.name.clone(), instance_window_vars);
+            window_usage_vars.push((e_idx, instance_window_vars));
         }
     }
 
+    drop(span);
+
     // (3) Window distribution constraints
     // Ensure instances of the same entity use different windows when possible
+    let span = debug_span!("window_distribution").entered();
     if debug_enabled {
         eprintln!("--- Adding window distribution constraints ---");
     }
 
-    for (ename, instance_window_map) in &window_usage_vars {
-        let eclocks = entity_clocks.get(ename).unwrap();
-        let window_count = entities
-            .iter()
-            .find(|e| &e.name == ename)
-            .map(|e| e.windows.len())
-            .unwrap_or(0);
+    for (e_idx, instance_window_map) in &window_usage_vars {
+        let ename = &entities[*e_idx].name;
+        let eclocks = &entity_clocks[entity_ids[*e_idx] as usize];
+        let window_count = entities[*e_idx].windows.len();
 
         if debug_enabled {
             eprintln!(
@@ -522,11 +973,9 @@ pub fn solve_schedule(
                 }
             }
 
-            let desc = format!(
-                "(Dist) {}_instance{} must use exactly one window",
-                ename, cv.instance
-            );
-            add_constraint(&desc, constraint!(sum_expr == 1.0));
+            sink.add(constraint!(sum_expr == 1.0), || {
+                ConstraintTrace::clock(ConstraintKind::OneWindowPerInstance, cv, &names)
+            });
         }
 
         // Each window can be used at most once
@@ -539,13 +988,43 @@ pub fn solve_schedule(
                 }
             }
 
-            let desc = format!("(Dist) {}_window{} can be used at most once", ename, w_idx);
-            add_constraint(&desc, constraint!(sum_expr <= 1.0));
+            sink.add(constraint!(sum_expr <= 1.0), || {
+                ConstraintTrace::entity(ConstraintKind::OneInstancePerWindow, ename).window(w_idx)
+            });
+        }
+
+        // Consecutive instances use windows in increasing order of time (breaking the
+        // symmetry between equivalent assignments of instances to windows)
+        let window_ranks = ordered_window_ranks(
+            eclocks.len(),
+            &entities[*e_idx].windows,
+            config.window_tolerance,
+        );
+        if let Some(ranks) = window_ranks {
+            let rank_expr = |cv: &ClockVar| -> Expression {
+                let mut expr = Expression::from(0.0);
+                for (w_idx, &rank) in ranks.iter().enumerate() {
+                    if let Some(&use_var) = instance_window_map.get(&(cv.instance, w_idx)) {
+                        expr += rank as f64 * use_var;
+                    }
+                }
+                expr
+            };
+            for w in eclocks.windows(2) {
+                let (c1, c2) = (&w[0], &w[1]);
+                sink.add(constraint!(rank_expr(c2) >= rank_expr(c1) + 1.0), || {
+                    ConstraintTrace::clock(ConstraintKind::WindowOrder, c2, &names)
+                        .against(c1, &names)
+                });
+            }
         }
     }
 
+    drop(span);
+
     // Add chronological ordering constraints for instances
-    for (ename, eclocks) in &entity_clocks {
+    let span = debug_span!("ordering").entered();
+    for eclocks in &entity_clocks {
         if eclocks.len() <= 1 {
             continue; // Skip entities with only one instance
         }
@@ -554,14 +1033,30 @@ pub fn solve_schedule(
             let c1 = &eclocks[i]; // Earlier instance
             let c2 = &eclocks[i + 1]; // Later instance
 
-            let desc = format!(
-                "(Order) {}_instance{} must be before instance{}",
-                ename, c1.instance, c2.instance
-            );
-            add_constraint(&desc, constraint!(c1.var <= c2.var));
+            sink.add(constraint!(c1.var <= c2.var), || {
+                ConstraintTrace::clock(ConstraintKind::Order, c1, &names).against(c2, &names)
+            });
+        }
+    }
+
+    // Break the symmetry between interchangeable entities: their first instances
+    // follow the order of the entities
+    for group in interchangeable_entities(&entities) {
+        let firsts: Vec<&ClockVar> = group
+            .iter()
+            .filter_map(|&i| entity_clocks[entity_ids[i] as usize].first())
+            .collect();
+        for w in firsts.windows(2) {
+            let (c1, c2) = (w[0], w[1]);
+            sink.add(constraint!(c1.var <= c2.var), || {
+                ConstraintTrace::clock(ConstraintKind::InterchangeableOrder, c1, &names)
+                    .against(c2, &names)
+            });
         }
     }
 
+    drop(span);
+
     // (4) Build objective:
     // For earliest => minimize(sum(t_i) + alpha * sum(p_i))
     // For latest   => maximize(sum(t_i) - alpha * sum(p_i))
@@ -569,7 +1064,7 @@ pub fn solve_schedule(
 
     // Sum of all time variables
     let mut sum_expr = Expression::from(0.0);
-    for cv in clock_map.values() {
+    for cv in entity_clocks.iter().flatten() {
         sum_expr += cv.var;
     }
 
@@ -581,51 +1076,162 @@ pub fn solve_schedule(
 
     // Add all constraints to the problem
     if debug_enabled {
-        eprintln!("Solving problem with {} constraints...", constraints.len());
+        eprintln!("Solving problem with {} constraints...", sink.len());
     }
+    let (constraints, constraint_trace) = sink.into_parts();
 
-    let mut problem = match config.strategy {
+    let objective = match config.strategy {
         ScheduleStrategy::Earliest => {
             if debug_enabled {
                 eprintln!("Objective: minimize(sum(t_i) + {} * sum(p_i))", alpha);
             }
-            builder
-                .minimise(sum_expr + alpha * penalty_expr)
-                .using(default_solver)
+            sum_expr + alpha * penalty_expr
         }
         ScheduleStrategy::Latest => {
             if debug_enabled {
                 eprintln!("Objective: maximize(sum(t_i) - {} * sum(p_i))", alpha);
             }
             // Equivalent to minimize(-sum_expr + alpha * penalty_expr)
-            builder
-                .minimise(Expression::from(0.0) - sum_expr + alpha * penalty_expr)
-                .using(default_solver)
+            Expression::from(0.0) - sum_expr + alpha * penalty_expr
         }
     };
 
-    // Now actually add the constraints
-    for c in constraints {
-        problem = problem.with(c);
+    ScheduleModel {
+        entities,
+        names,
+        builder,
+        objective,
+        constraints,
+        constraint_trace,
+        entity_clocks,
+        penalty_vars,
+        window_usage_vars,
+        build_time_ms: build_start.elapsed().as_secs_f64() * 1000.0,
+        start: Vec::new(),
     }
+}
 
-    // Solve the problem
-    let sol = match problem.solve() {
-        Ok(s) => s,
-        Err(e) => {
-            return Err(format!("Solver error: {}", e));
+impl ScheduleModel {
+    pub fn variables(&self) -> usize {
+        self.builder.len()
+    }
+
+    pub fn binaries(&self) -> usize {
+        self.builder.binaries
+    }
+
+    pub fn constraints(&self) -> usize {
+        self.constraints.len()
+    }
+
+    /// Start the solver from a schedule (such as the previous one, before an edit):
+    /// the times of the events matching an instance of this model are passed to HiGHS
+    /// and CBC as a (partial) MIP start. microlp takes no starting point.
+    pub fn warm_start(&mut self, events: &[ScheduledEvent]) {
+        self.start = events
+            .iter()
+            .filter_map(|ev| {
+                let id = self.names.get(&ev.entity_name)?;
+                let cv = self.entity_clocks[id as usize].get(ev.instance.checked_sub(1)?)?;
+                Some((cv.var, ev.time_minutes as f64))
+            })
+            .collect();
+    }
+
+    /// Solve the model with the configured backend and limits
+    pub fn solve(
+        self,
+        config: &SchedulerConfig,
+        debug_enabled: bool,
+    ) -> Result<ScheduleResult, String> {
+        let mut stats = SolveStats {
+            backend: Some(config.solver_backend),
+            variables: self.variables(),
+            binaries: self.binaries(),
+            constraints: self.constraints(),
+            build_time_ms: self.build_time_ms,
+            ..SolveStats::default()
+        };
+
+        // The variables read back from the solution
+        let wanted: Vec<Variable> = self
+            .entity_clocks
+            .iter()
+            .flatten()
+            .map(|cv| cv.var)
+            .chain(self.penalty_vars.iter().map(|p| p.var))
+            .chain(
+                self.window_usage_vars
+                    .iter()
+                    .flat_map(|(_, m)| m.values().copied()),
+            )
+            .collect();
+
+        let solve_start = Instant::now();
+        let solved = solve_model(
+            config,
+            self.builder.vars,
+            self.objective.clone(),
+            self.constraints,
+            wanted,
+            self.start,
+        )?;
+        stats.solve_time_ms = solve_start.elapsed().as_secs_f64() * 1000.0;
+        if debug_enabled {
+            eprintln!(
+                "Solved with {:?} in {:.2} ms: {:?}",
+                config.solver_backend, stats.solve_time_ms, solved.status
+            );
         }
-    };
 
-    // Extract solution and organize for result
+        // Extract solution and organize for result (nothing to extract without one)
+        let extract_start = Instant::now();
+        let (scheduled_events, total_penalty, window_usage) = if solved.values.is_empty() {
+            (Vec::new(), 0.0, Vec::new())
+        } else {
+            stats.objective = Some(self.objective.eval_with(&solved.values));
+            extract_solution(
+                &|v: Variable| solved.values[&v],
+                &self.entities,
+                &self.names,
+                &self.entity_clocks,
+                &self.penalty_vars,
+                &self.window_usage_vars,
+            )
+        };
+        stats.extract_time_ms = extract_start.elapsed().as_secs_f64() * 1000.0;
+
+        Ok(ScheduleResult {
+            scheduled_events,
+            total_penalty,
+            window_usage,
+            engine: SolverEngine::Milp,
+            status: solved.status,
+            constraint_trace: self.constraint_trace,
+            stats,
+        })
+    }
+}
+
+/// Read the schedule, total penalty and window usage off the solved variable values
+#[instrument(level = "debug", skip_all)]
+fn extract_solution(
+    value: &dyn Fn(Variable) -> f64,
+    entities: &[Entity],
+    names: &Interner,
+    entity_clocks: &[Vec<ClockVar>],
+    penalty_vars: &[PenaltyVar],
+    window_usage_vars: &[(usize, HashMap<(usize, usize), Variable>)],
+) -> (Vec<ScheduledEvent>, f64, Vec<(String, String, Vec<usize>)>) {
     let mut scheduled_events = Vec::new();
-    for cv in clock_map.values() {
-        let val = sol.value(cv.var);
+    for cv in entity_clocks.iter().flatten() {
+        let val = value(cv.var);
         let minutes = val.round() as i32;
         scheduled_events.push(ScheduledEvent {
-            entity_name: cv.entity_name.clone(),
+            entity_name: names.resolve(cv.entity).to_string(),
             instance: cv.instance,
             time_minutes: minutes,
+            day: 0,
         });
     }
 
@@ -634,14 +1240,15 @@ pub fn solve_schedule(
 
     // Calculate total penalty
     let mut total_penalty = 0.0;
-    for p in &penalty_vars {
-        total_penalty += sol.value(p.var);
+    for p in penalty_vars {
+        total_penalty += value(p.var);
     }
 
     // Collect window usage information
     let mut window_usage = Vec::new();
-    for (ename, instance_window_map) in &window_usage_vars {
-        let e = entities.iter().find(|e| e.name == *ename).unwrap();
+    for (e_idx, instance_window_map) in window_usage_vars {
+        let e = &entities[*e_idx];
+        let ename = &e.name;
 
         for w_idx in 0..e.windows.len() {
             let window_desc = match &e.windows[w_idx] {
@@ -656,21 +1263,346 @@ pub fn solve_schedule(
             };
 
             let mut users = Vec::new();
-            for (instance, idx) in instance_window_map.keys() {
-                if *idx == w_idx && sol.value(instance_window_map[&(*instance, *idx)]) > 0.5 {
-                    users.push(*instance);
+            for (&(instance, idx), &use_var) in instance_window_map {
+                if idx == w_idx && value(use_var) > 0.5 {
+                    users.push(instance);
                 }
             }
+            users.sort_unstable();
 
             if !users.is_empty() {
-                window_usage.push((ename.clone(), window_desc, users));
+                window_usage.push((ename.to_string(), window_desc, users));
             }
         }
     }
 
-    Ok(ScheduleResult {
-        scheduled_events,
-        total_penalty,
-        window_usage,
-    })
+    (scheduled_events, total_penalty, window_usage)
+}
+
+/// Values of the variables read back from a solve, and how the solve ended
+struct Solved {
+    values: HashMap<Variable, f64>,
+    status: ScheduleStatus,
+}
+
+impl Solved {
+    /// A solve that ended without any schedule
+    fn without_solution(status: ScheduleStatus) -> Self {
+        Self {
+            values: HashMap::new(),
+            status,
+        }
+    }
+}
+
+/// Solve the model with the backend and limits from the config
+#[instrument(skip_all, fields(backend = ?config.solver_backend, constraints = constraints.len()))]
+fn solve_model(
+    config: &SchedulerConfig,
+    builder: ProblemVariables,
+    objective: Expression,
+    constraints: Vec<Constraint>,
+    wanted: Vec<Variable>,
+    #[allow(unused_variables)] start: Vec<(Variable, f64)>,
+) -> Result<Solved, String> {
+    match config.solver_backend {
+        backend
+            if !backend.has_mip_limits()
+                && (config.mip_gap.is_some() || config.node_limit.is_some()) =>
+        {
+            Err(format!(
+                "{:?} has no MIP gap or node limit: use the HiGHS or CBC backend",
+                backend
+            ))
+        }
+        SolverBackend::Microlp => solve_microlp(
+            config.time_limit_ms,
+            builder,
+            objective,
+            constraints,
+            wanted,
+        ),
+        #[cfg(feature = "highs")]
+        SolverBackend::Highs => {
+            let mut model = builder
+                .minimise(objective)
+                .using(good_lp::solvers::highs::highs);
+            if !start.is_empty() {
+                model = model.with_initial_solution(start);
+            }
+            if let Some(ms) = config.time_limit_ms {
+                model = model.with_time_limit(ms as f64 / 1000.0);
+            }
+            if let Some(gap) = config.mip_gap {
+                model = model
+                    .with_mip_gap(gap as f32)
+                    .map_err(|e| format!("Invalid MIP gap {}: {}", gap, e))?;
+            }
+            if let Some(nodes) = config.node_limit {
+                model = model.set_option("mip_max_nodes", nodes.min(i32::MAX as u64) as i32);
+            }
+            finish_solve(model, constraints, &wanted, config.node_limit.is_some())
+        }
+        #[cfg(feature = "coin_cbc")]
+        SolverBackend::Cbc => {
+            let mut model = builder
+                .minimise(objective)
+                .using(good_lp::solvers::coin_cbc::coin_cbc);
+            if !start.is_empty() {
+                model = model.with_initial_solution(start);
+            }
+            if let Some(ms) = config.time_limit_ms {
+                model = model.with_time_limit(ms as f64 / 1000.0);
+            }
+            if let Some(gap) = config.mip_gap {
+                model = model
+                    .with_mip_gap(gap as f32)
+                    .map_err(|e| format!("Invalid MIP gap {}: {}", gap, e))?;
+            }
+            if let Some(nodes) = config.node_limit {
+                model.set_parameter("maxNodes", &nodes.to_string());
+            }
+            finish_solve(model, constraints, &wanted, config.node_limit.is_some())
+        }
+        #[allow(unreachable_patterns)]
+        other => Err(format!(
+            "Solver backend {:?} is not available in this build (enable its cargo feature)",
+            other
+        )),
+    }
+}
+
+/// Most microlp workers left running past their deadline at any one time
+fn max_microlp_workers() -> usize {
+    thread::available_parallelism().map_or(4, |n| n.get())
+}
+
+/// Number of microlp worker threads still running, and a signal when one finishes
+static MICROLP_WORKERS: (Mutex<usize>, Condvar) = (Mutex::new(0), Condvar::new());
+
+/// A slot for one microlp worker thread, given back when the worker finishes
+struct WorkerSlot;
+
+impl WorkerSlot {
+    /// Wait for a free slot until the deadline, or return None
+    fn acquire(deadline: Instant) -> Option<Self> {
+        let (running, freed) = &MICROLP_WORKERS;
+        let mut running = running.lock().unwrap_or_else(|e| e.into_inner());
+        while *running >= max_microlp_workers() {
+            let timeout = deadline.checked_duration_since(Instant::now())?;
+            running = freed
+                .wait_timeout(running, timeout)
+                .unwrap_or_else(|e| e.into_inner())
+                .0;
+        }
+        *running += 1;
+        Some(WorkerSlot)
+    }
+}
+
+impl Drop for WorkerSlot {
+    fn drop(&mut self) {
+        let (running, freed) = &MICROLP_WORKERS;
+        *running.lock().unwrap_or_else(|e| e.into_inner()) -= 1;
+        freed.notify_one();
+    }
+}
+
+/// microlp has no limits of its own: with a time limit, solve on a worker thread and
+/// stop waiting for it at the deadline. microlp keeps no incumbent to fall back on,
+/// so a timed out solve has no schedule.
+///
+/// microlp cannot be interrupted either, so the worker of a timed out solve runs on
+/// until it finishes, and the time limit bounds the wait rather than the CPU time.
+/// To keep abandoned workers from piling up, at most one per available core runs at
+/// once: a solve waits for a free slot (within its own deadline) before starting.
+fn solve_microlp(
+    time_limit_ms: Option<u64>,
+    builder: ProblemVariables,
+    objective: Expression,
+    constraints: Vec<Constraint>,
+    wanted: Vec<Variable>,
+) -> Result<Solved, String> {
+    let solve = move || {
+        let model = builder
+            .minimise(objective)
+            .using(good_lp::solvers::microlp::microlp);
+        finish_solve(model, constraints, &wanted, false)
+    };
+    let Some(ms) = time_limit_ms else {
+        return solve();
+    };
+
+    let deadline = Instant::now() + Duration::from_millis(ms);
+    let Some(slot) = WorkerSlot::acquire(deadline) else {
+        return Ok(Solved::without_solution(ScheduleStatus::TimedOut));
+    };
+    let (tx, rx) = mpsc::channel();
+    thread::spawn(move || {
+        let _slot = slot;
+        // The receiver is gone if the deadline already passed
+        let _ = tx.send(solve());
+    });
+    let wait = deadline.saturating_duration_since(Instant::now());
+    match rx.recv_timeout(wait) {
+        Ok(result) => result,
+        Err(RecvTimeoutError::Timeout) => Ok(Solved::without_solution(ScheduleStatus::TimedOut)),
+        Err(RecvTimeoutError::Disconnected) => Err("Solver thread exited early".to_string()),
+    }
+}
+
+/// Add the constraints to a configured model and solve it. Infeasibility is reported
+/// as a status rather than an error.
+///
+/// good_lp does not report whether a node limit stopped the search, so a solve with
+/// a node limit that ends as "optimal" is reported as `NodeLimited` instead.
+fn finish_solve<M>(
+    mut model: M,
+    constraints: Vec<Constraint>,
+    wanted: &[Variable],
+    node_limited: bool,
+) -> Result<Solved, String>
+where
+    M: SolverModel<Error = ResolutionError>,
+{
+    for c in constraints {
+        model = model.with(c);
+    }
+    match model.solve() {
+        Ok(sol) => {
+            let status = match sol.status() {
+                SolutionStatus::TimeLimit => ScheduleStatus::TimedOut,
+                SolutionStatus::GapLimit => ScheduleStatus::FeasibleWithinGap,
+                SolutionStatus::Optimal if node_limited => ScheduleStatus::NodeLimited,
+                SolutionStatus::Optimal => ScheduleStatus::Optimal,
+            };
+            let values = wanted.iter().map(|&v| (v, sol.value(v))).collect();
+            Ok(Solved { values, status })
+        }
+        Err(ResolutionError::Infeasible) => {
+            Ok(Solved::without_solution(ScheduleStatus::Infeasible))
+        }
+        Err(e) => Err(format!("Solver error: {}", e)),
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::domain::Frequency;
+
+    fn windowed(name: &str, n: u32, windows: Vec<WindowSpec>) -> Entity {
+        Entity {
+            name: name.into(),
+            category: "med".into(),
+            frequency: Frequency::TimesPerDay(n),
+            constraints: Vec::new(),
+            windows,
+            wrap_minutes: None,
+        }
+    }
+
+    fn milp_times(entities: Vec<Entity>, config: &SchedulerConfig) -> Vec<i32> {
+        let result = build_model(entities, config, false)
+            .solve(config, false)
+            .unwrap();
+        let mut times: Vec<i32> = result
+            .scheduled_events
+            .iter()
+            .map(|ev| ev.time_minutes)
+            .collect();
+        times.sort_unstable();
+        times
+    }
+
+    #[test]
+    fn single_instance_reaches_beyond_nearest_window() {
+        // One instance and two anchors: the distances to both windows share a value,
+        // which must be allowed to reach the furthest window (14h from 08:00 at 22:00)
+        let config = SchedulerConfig {
+            strategy: ScheduleStrategy::Latest,
+            ..SchedulerConfig::default()
+        };
+        let entities = vec![windowed(
+            "pill",
+            1,
+            vec![WindowSpec::Anchor(8 * 60), WindowSpec::Anchor(18 * 60)],
+        )];
+        let propagated = propagation::solve(&entities, &config).unwrap();
+        assert_eq!(milp_times(entities, &config), vec![22 * 60]);
+        assert_eq!(propagated.scheduled_events[0].time_minutes, 22 * 60);
+    }
+
+    #[test]
+    fn single_instance_with_ranges_matches_propagation() {
+        for strategy in [ScheduleStrategy::Earliest, ScheduleStrategy::Latest] {
+            let config = SchedulerConfig {
+                strategy,
+                penalty_weight: 2.0,
+                ..SchedulerConfig::default()
+            };
+            let entities = vec![windowed(
+                "pill",
+                1,
+                vec![
+                    WindowSpec::Range(9 * 60, 10 * 60),
+                    WindowSpec::Anchor(13 * 60),
+                    WindowSpec::Range(19 * 60, 20 * 60),
+                ],
+            )];
+            let propagated = propagation::solve(&entities, &config).unwrap();
+            assert_eq!(
+                milp_times(entities, &config),
+                vec![propagated.scheduled_events[0].time_minutes]
+            );
+        }
+    }
+
+    /// Backends with MIP limits in this build
+    fn limited_backends() -> Vec<SolverBackend> {
+        #[allow(unused_mut)]
+        let mut backends = Vec::new();
+        #[cfg(feature = "highs")]
+        backends.push(SolverBackend::Highs);
+        #[cfg(feature = "coin_cbc")]
+        backends.push(SolverBackend::Cbc);
+        backends
+    }
+
+    #[test]
+    fn node_limited_solve_has_its_own_status() {
+        for solver_backend in limited_backends() {
+            let config = SchedulerConfig {
+                solver_backend,
+                node_limit: Some(1_000),
+                ..SchedulerConfig::default()
+            };
+            let entities = vec![windowed(
+                "pill",
+                2,
+                vec![WindowSpec::Anchor(9 * 60), WindowSpec::Anchor(18 * 60)],
+            )];
+            let result = build_model(entities, &config, false)
+                .solve(&config, false)
+                .unwrap();
+            assert_eq!(result.status, ScheduleStatus::NodeLimited);
+            assert_eq!(result.scheduled_events.len(), 2);
+        }
+    }
+
+    #[test]
+    fn invalid_mip_gap_is_an_error() {
+        for solver_backend in limited_backends() {
+            let config = SchedulerConfig {
+                solver_backend,
+                mip_gap: Some(-0.5),
+                ..SchedulerConfig::default()
+            };
+            let entities = vec![windowed("pill", 1, Vec::new())];
+            let err = build_model(entities, &config, false)
+                .solve(&config, false)
+                .unwrap_err();
+            assert!(err.contains("Invalid MIP gap"), "{}", err);
+        }
+    }
 }
@@ -0,0 +1,213 @@
+use good_lp::Constraint;
+use serde::{Deserialize, Serialize};
+use std::fmt;
+
+use crate::domain::{ClockVar, Interner};
+
+/// The family a model constraint belongs to
+#[derive(Debug, Clone, Copy, PartialEq, Eq, Serialize, Deserialize)]
+pub enum ConstraintKind {
+    /// s + offset <= o, if the link x_{s,o} is chosen
+    BeforeSome,
+    /// s >= o + offset, if the link x_{s,o} is chosen
+    AfterSome,
+    /// sum_o x_{s,o} >= 1
+    LinkAtLeastOne,
+    /// Consecutive instances at least `value` apart
+    Apart,
+    /// Referenced clock at least `value` after the subject, if b = 1
+    ApartFromAfter,
+    /// Subject at least `value` after the referenced clock, if b = 0
+    ApartFromBefore,
+    /// Either-before branch of a before/after disjunction
+    EitherBefore,
+    /// Either-after branch of a before/after disjunction
+    EitherAfter,
+    Before,
+    After,
+    /// Instance uses the window if its distance is within tolerance
+    WindowUsed,
+    /// Instance does not use the window if its distance exceeds tolerance
+    WindowUnused,
+    /// Distance to an anchor, when later than it
+    AnchorAfter,
+    /// Distance to an anchor, when earlier than it
+    AnchorBefore,
+    /// Distance to a range, when before its start
+    RangeStart,
+    /// Distance to a range, when after its end
+    RangeEnd,
+    /// Penalty at most the distance to each window
+    PenaltyAtMost,
+    /// Penalty equal to the distance to the chosen window
+    PenaltyChosen,
+    /// Penalty at least the distance to the (only) window
+    PenaltyAtLeast,
+    /// Each instance uses exactly one window
+    OneWindowPerInstance,
+    /// Each window is used at most once
+    OneInstancePerWindow,
+    /// Consecutive instances use windows in increasing order of time
+    WindowOrder,
+    /// Interchangeable entities have their first instances in entity order
+    InterchangeableOrder,
+    /// Instance within tolerance of the edge of its chosen window (ordered windows)
+    InChosenWindow,
+    /// Penalty at least the distance past the edge of the chosen window
+    PenaltyToChosen,
+    /// Instances are chronologically ordered
+    Order,
+}
+
+/// Structured record of one constraint added to the model, built only when tracing
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct ConstraintTrace {
+    pub kind: ConstraintKind,
+    pub entity: String,
+    pub instance: Option<usize>,
+    /// The other clock involved, as (entity, instance)
+    pub other: Option<(String, usize)>,
+    pub window: Option<usize>,
+    pub value: Option<f64>,
+}
+
+impl ConstraintTrace {
+    /// A record about a whole entity
+    pub fn entity(kind: ConstraintKind, entity: &str) -> Self {
+        Self {
+            kind,
+            entity: entity.to_string(),
+            instance: None,
+            other: None,
+            window: None,
+            value: None,
+        }
+    }
+
+    /// A record about one instance's clock
+    pub fn clock(kind: ConstraintKind, cv: &ClockVar, names: &Interner) -> Self {
+        Self {
+            instance: Some(cv.instance),
+            ..Self::entity(kind, names.resolve(cv.entity))
+        }
+    }
+
+    pub fn against(mut self, cv: &ClockVar, names: &Interner) -> Self {
+        self.other = Some((names.resolve(cv.entity).to_string(), cv.instance));
+        self
+    }
+
+    pub fn window(mut self, w_idx: usize) -> Self {
+        self.window = Some(w_idx);
+        self
+    }
+
+    pub fn value(mut self, value: f64) -> Self {
+        self.value = Some(value);
+        self
+    }
+}
+
+impl fmt::Display for ConstraintTrace {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        let s = format!("({}_var{})", self.entity, self.instance.unwrap_or_default());
+        let o = match &self.other {
+            Some((entity, instance)) => format!("({entity}_var{instance})"),
+            None => String::new(),
+        };
+        let w = self.window.unwrap_or_default();
+        let v = self.value.unwrap_or_default();
+        match self.kind {
+            ConstraintKind::BeforeSome => {
+                write!(f, "(BeforeSome) before: {s} + {v} <= {o} if x_so=1")
+            }
+            ConstraintKind::AfterSome => write!(f, "(AfterSome) after: {s} >= {o} + {v} if x_so=1"),
+            ConstraintKind::LinkAtLeastOne => {
+                write!(
+                    f,
+                    "sum_x >= 1 => subject {s} must link to at least one object"
+                )
+            }
+            ConstraintKind::Apart => write!(f, "(Apart) {s} - {o} >= {v}"),
+            ConstraintKind::ApartFromAfter => write!(f, "(ApartFrom) {o} - {s} >= {v} - M*(1-b)"),
+            ConstraintKind::ApartFromBefore => write!(f, "(ApartFrom) {s} - {o} >= {v} - M*b"),
+            ConstraintKind::EitherBefore => write!(f, "(Before|After) {o} - {s} >= {v} - M*(1-b)"),
+            ConstraintKind::EitherAfter => write!(f, "(Before|After) {s} - {o} >= {v} - M*b"),
+            ConstraintKind::Before => write!(f, "(Before) {o} - {s} >= {v}"),
+            ConstraintKind::After => write!(f, "(After) {s} - {o} >= {v}"),
+            ConstraintKind::WindowUsed => write!(f, "(WinUse) {s} uses win{w} if dist <= {v}"),
+            ConstraintKind::WindowUnused => {
+                write!(f, "(WinUse) {s} doesn't use win{w} if dist > {v}")
+            }
+            ConstraintKind::AnchorAfter => write!(f, "(Win+) dist_w{w} >= {s} - {v}"),
+            ConstraintKind::AnchorBefore => write!(f, "(Win-) dist_w{w} >= {v} - {s}"),
+            ConstraintKind::RangeStart => write!(f, "(WinS) dist_w{w} >= {v} - {s}"),
+            ConstraintKind::RangeEnd => write!(f, "(WinE) dist_w{w} >= {s} - {v}"),
+            ConstraintKind::PenaltyAtMost => write!(f, "(Win) p{s} <= dist_w{w}"),
+            ConstraintKind::PenaltyChosen => write!(f, "(Win) p{s} >= dist_w{w} - M*(1-use)"),
+            ConstraintKind::PenaltyAtLeast => write!(f, "(Win) p{s} >= dist_w{w}"),
+            ConstraintKind::OneWindowPerInstance => {
+                write!(f, "(Dist) {s} must use exactly one window")
+            }
+            ConstraintKind::OneInstancePerWindow => {
+                write!(
+                    f,
+                    "(Dist) {}_window{w} can be used at most once",
+                    self.entity
+                )
+            }
+            ConstraintKind::WindowOrder => write!(f, "(Dist) {s} uses a later window than {o}"),
+            ConstraintKind::InChosenWindow => {
+                write!(f, "(OrdWin) {s} within {v} of its window's edge")
+            }
+            ConstraintKind::PenaltyToChosen => {
+                write!(f, "(OrdWin) p{s} >= distance past its window's edge")
+            }
+            ConstraintKind::InterchangeableOrder => {
+                write!(f, "(Symmetry) {s} must not be after {o}")
+            }
+            ConstraintKind::Order => write!(f, "(Order) {s} must be before {o}"),
+        }
+    }
+}
+
+/// Collects model constraints, and, only when tracing, a record of each one.
+///
+/// Records are passed as closures so that nothing is formatted or allocated
+/// for them unless tracing is enabled.
+pub struct ConstraintSink {
+    constraints: Vec<Constraint>,
+    trace: Option<Vec<ConstraintTrace>>,
+}
+
+impl ConstraintSink {
+    pub fn new(tracing: bool) -> Self {
+        Self {
+            constraints: Vec::new(),
+            trace: tracing.then(Vec::new),
+        }
+    }
+
+    #[inline]
+    pub fn add(&mut self, c: Constraint, record: impl FnOnce() -> ConstraintTrace) {
+        if let Some(trace) = &mut self.trace {
+            let r = record();
+            eprintln!("DEBUG => {r}");
+            trace.push(r);
+        }
+        self.constraints.push(c);
+    }
+
+    pub fn len(&self) -> usize {
+        self.constraints.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.constraints.is_empty()
+    }
+
+    /// The collected constraints, and the trace (empty when tracing was disabled)
+    pub fn into_parts(self) -> (Vec<Constraint>, Vec<ConstraintTrace>) {
+        (self.constraints, self.trace.unwrap_or_default())
+    }
+}